@@ -0,0 +1,13 @@
+"""
+Rolling-Origin Backtest of the Capacity Forecasts
+=================================================
+Entry point kept for existing workflows — equivalent to
+``python -m sustainable_energy backtest [options]`` (see sustainable_energy/backtest.py).
+"""
+
+import sys
+
+from sustainable_energy.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["backtest", *sys.argv[1:]]))
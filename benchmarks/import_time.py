@@ -0,0 +1,65 @@
+"""
+Import-Time Benchmark
+=====================
+Guards the start-up cost of the package: every scenario runs in a fresh
+interpreter (best of ``--repeat`` runs), must finish within its budget and
+must not have imported sklearn, matplotlib or seaborn.  Exits 1 on any
+violation, so it can run in CI.
+
+Usage:
+  python benchmarks/import_time.py
+  python benchmarks/import_time.py --scale 2    # double every budget on slow runners
+"""
+
+import os, sys, json, argparse, subprocess
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("sklearn", "matplotlib", "seaborn")
+
+# name → (code run after the timer starts, budget in seconds, extra forbidden modules)
+SCENARIOS = {
+    "import package":        ("import sustainable_energy", 0.05, ("numpy", "pandas")),
+    "cli --help parser":     ("from sustainable_energy.cli import build_parser; build_parser()", 0.05, ("numpy", "pandas")),
+    "poly_fit (numpy only)": ("import sustainable_energy.poly_fit", 0.25, ("pandas",)),
+    "predict --no-charts":   ("import sustainable_energy.predict", 0.75, ()),
+    "analyze (no sklearn)":  ("import sustainable_energy.analyze", 0.75, ()),
+    "backtest":              ("import sustainable_energy.backtest", 0.75, ()),
+}
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+{code}
+dt = time.perf_counter() - t0
+print(json.dumps({{"seconds": dt, "modules": sorted({{m.split(".")[0] for m in sys.modules}})}}))
+"""
+
+
+def measure(code, repeat):
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(code=code)], cwd=BASE,
+                             capture_output=True, text=True, check=True).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        if best is None or res["seconds"] < best["seconds"]:
+            best = res
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time budget check for sustainable_energy.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per scenario (default 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (default 1.0)")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"⏱️  Import-time budgets (best of {args.repeat}):")
+    for name, (code, budget, forbidden) in SCENARIOS.items():
+        res = measure(code, args.repeat)
+        budget *= args.scale
+        loaded = [m for m in (*HEAVY, *forbidden) if m in res["modules"]]
+        ok = res["seconds"] <= budget and not loaded
+        failures += not ok
+        note = f"  — imported {', '.join(loaded)}" if loaded else ""
+        print(f"   {'✅' if ok else '❌'} {name:<22} {res['seconds'] * 1000:7.1f} ms  (budget {budget * 1000:.0f} ms){note}")
+    sys.exit(1 if failures else 0)
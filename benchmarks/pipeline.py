@@ -0,0 +1,539 @@
+"""
+Pipeline Stage Benchmarks
+=========================
+Times each pipeline stage on synthetic OPSD inputs (sustainable_energy/
+synthetic.py) at several sizes and compares against a stored baseline:
+
+  csv_load      plant CSVs → frame (no date parsing)        plants
+  date_parse    mixed-format commissioning dates (dates.py)  plants
+  clean         steps 2a–2d, 2f per country (clean_chunk)   plants
+  median_fill   step 2e — country median commissioning date plants
+  report        report sections 4a–4h (plant_report)        plants
+  crosstab      section 4h source × country cross-tab       plants
+  cube_build    capacity cube of the plant frame (cube.py)  plants
+  cube_query    section 4h as a cube roll-up                plants
+  stream_agg    --stream aggregates + report                plants
+  spatial_index grid-sorted plant index + cell table         plants
+  spatial_query 200 capacity-within-25-km queries            plants
+  rollup        daily → daily / monthly / yearly last value series
+  downsample    LTTB of every daily series to the bundle's points series
+  fit           batched polynomial fits (forecast_series)   series
+  fit_cached    the same, every series a fit-cache hit      series
+  online_update one new day folded into running fit sums       series
+  bootstrap     P10/P50/P90 residual bootstrap              series
+  scenario      Monte-Carlo 2030 scenario trajectories       series
+  render        every analysis chart, drawn serially        charts
+
+Every (case, size) runs in a fresh interpreter, so peak memory is its own:
+``peak_mb`` is the highest RSS while the stage ran minus the RSS before it
+(sampled from /proc; the getrusage high-water mark elsewhere).  Timings are
+the best of ``--repeat`` runs.  Generated CSVs are kept in
+benchmarks/.data/ between runs.
+
+With a baseline (``--save-baseline`` writes one), a case regresses when its
+time or peak memory exceeds the baseline by more than ``--threshold``; the
+script then exits 1, so it can gate a nightly job.
+
+Usage:
+  python benchmarks/pipeline.py                               # 10k / 1M plants, 10 / 100 / 1000 series
+  python benchmarks/pipeline.py --plants 10k,1M,10M --cases clean,report
+  python benchmarks/pipeline.py --save-baseline               # record benchmarks/baseline.json
+"""
+
+import os, sys, json, time, argparse, threading, subprocess, tempfile
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(BASE, "benchmarks", ".data")
+BASELINE = os.path.join(BASE, "benchmarks", "baseline.json")
+SEED = 42
+BOOTSTRAP_SAMPLES = 500
+SCENARIO_TRAJECTORIES = 20_000
+SPATIAL_QUERIES, SPATIAL_KM = 200, 25.0
+# Regressions smaller than this are noise, whatever the ratio
+MIN_SECONDS, MIN_MB = 0.005, 5.0
+
+
+# ═══════════════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════════════
+def rss_mb():
+    """Current RSS (Linux /proc), or the getrusage high-water mark where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        from sustainable_energy.metrics import usage
+        return usage()[2] or 0.0
+
+
+class PeakSampler:
+    """Highest RSS seen (every ``interval`` s) while the ``with`` block runs."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def parse_size(text):
+    """``"10k"`` → 10_000, ``"1M"`` → 1_000_000."""
+    text = text.strip()
+    scale = {"k": 10 ** 3, "m": 10 ** 6}.get(text[-1].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def size_label(n):
+    for unit, scale in (("M", 10 ** 6), ("k", 10 ** 3)):
+        if n >= scale and n % scale == 0:
+            return f"{n // scale}{unit}"
+    return str(n)
+
+
+# ═══════════════════════════════════════════════════════════════
+# INPUTS
+# ═══════════════════════════════════════════════════════════════
+def dataset(n_plants):
+    """Directory of synthetic OPSD files with ``n_plants`` plants (generated once, then reused)."""
+    from sustainable_energy import synthetic
+    out = os.path.join(DATA, f"opsd-{size_label(n_plants)}-seed{SEED}")
+    if not os.path.exists(os.path.join(out, ".complete")):
+        os.makedirs(out, exist_ok=True)
+        synthetic.write_plants(out, n_plants, SEED, log=lambda *a: None)
+        synthetic.write_timeseries(os.path.join(out, "renewable_capacity_timeseries.csv"), seed=SEED,
+                                   log=lambda *a: None)
+        open(os.path.join(out, ".complete"), "w").close()
+    return out
+
+
+def raw_plants(n):
+    """``{country: raw OPSD-style frame}`` with ``n`` plants in total, built in memory."""
+    import pandas as pd
+    from sustainable_energy import synthetic
+    frames = {}
+    for country, rows in synthetic.country_rows(n).items():
+        parts = [synthetic.plant_chunk(SEED, country, c, min(synthetic.CHUNK_ROWS, rows - lo))
+                 for c, lo in enumerate(range(0, rows, synthetic.CHUNK_ROWS))]
+        if parts:
+            frames[country] = pd.concat(parts, ignore_index=True)
+    return frames
+
+
+def cleaned_plants(n):
+    """Cleaned (2a–2d, 2f) frames per country, dates still missing where unparseable."""
+    from sustainable_energy.load import COMMON_COLS
+    from sustainable_energy.plant_stream import clean_chunk
+    return {c: clean_chunk(df[COMMON_COLS], c)[0] for c, df in raw_plants(n).items()}
+
+
+def compact_plants(n):
+    """The in-memory pipeline's plant frame: median-filled, compact, concatenated."""
+    from sustainable_energy.clean import compact_plants as compact, concat_plants
+    frames = []
+    for df in cleaned_plants(n).values():
+        df["commissioning_date"] = df["commissioning_date"].fillna(df["commissioning_date"].median())
+        df["year"] = df["commissioning_date"].dt.year
+        frames.append(compact(df))
+    return concat_plants(frames)
+
+
+def yearly_matrix(n_series):
+    """``(years, Y)`` — noisy yearly capacity ramps with leading gaps, like the OPSD snapshots."""
+    import numpy as np
+    rng = np.random.default_rng(SEED)
+    years = np.arange(2000, 2021)
+    t = years - years[0]
+    final = np.exp(rng.normal(np.log(5000), 1.0, (n_series, 1)))
+    mid = rng.uniform(5, 20, (n_series, 1))
+    Y = final / (1 + np.exp(-(t - mid) / rng.uniform(2, 6, (n_series, 1))))
+    Y *= rng.uniform(0.97, 1.03, Y.shape)
+    Y[t < rng.integers(0, 12, (n_series, 1))] = np.nan
+    return years, Y
+
+
+# ═══════════════════════════════════════════════════════════════
+# CASES — setup(size) → state;  run(state) → rows processed
+# ═══════════════════════════════════════════════════════════════
+def _csv_load_setup(n):
+    from sustainable_energy.load import COUNTRY_FILES
+    d = dataset(n)
+    return [os.path.join(d, f) for f in COUNTRY_FILES.values()]
+
+
+def _csv_load(paths):
+    from sustainable_energy.csv_cache import read_cached
+    from sustainable_energy.load import COMMON_COLS
+    from sustainable_energy.plant_stream import PLANT_DTYPES
+    return sum(len(read_cached(p, columns=COMMON_COLS, dtype=PLANT_DTYPES, use_cache=False)) for p in paths)
+
+
+def _date_parse_setup(n):
+    import pandas as pd
+    return pd.concat([df["commissioning_date"] for df in raw_plants(n).values()], ignore_index=True)
+
+
+def _date_parse(values):
+    from sustainable_energy import dates
+    dates.clear_cache()     # every run parses cold
+    return len(dates.parse_dates(values))
+
+
+def _clean_setup(n):
+    from sustainable_energy.load import COMMON_COLS
+    return {c: df[COMMON_COLS] for c, df in raw_plants(n).items()}
+
+
+def _clean(frames):
+    from sustainable_energy.plant_stream import clean_chunk
+    return sum(len(clean_chunk(df, c)[0]) for c, df in frames.items())
+
+
+def _median_fill_setup(n):
+    import pandas as pd
+    return pd.concat(cleaned_plants(n).values(), ignore_index=True)
+
+
+def _median_fill(df):
+    dates = df["commissioning_date"]
+    return len(dates.fillna(dates.groupby(df["country"]).transform("median")))
+
+
+def _report(plants):
+    from sustainable_energy.analyze import plant_report
+    plant_report(plants)
+    return len(plants)
+
+
+def _crosstab(plants):
+    import pandas as pd
+    pd.crosstab(plants["energy_source_level_2"], plants["country"],
+                values=plants["electrical_capacity"], aggfunc="sum").round(2).fillna(0)
+    return len(plants)
+
+
+def _cube_build(plants):
+    from sustainable_energy.cube import CapacityCube
+    CapacityCube.from_frame(plants)
+    return len(plants)
+
+
+def _cube_setup(n):
+    from sustainable_energy.cube import CapacityCube
+    plants = compact_plants(n)
+    return CapacityCube.from_frame(plants), len(plants)
+
+
+def _cube_query(state):
+    cube, n = state
+    cube.rollup(["energy_source_level_2", "country"])["sum"].unstack(fill_value=0).round(2)
+    return n
+
+
+def _stream_agg(frames):
+    from sustainable_energy.plant_stream import PlantAggregates
+    agg = PlantAggregates()
+    for df in frames.values():
+        agg.add(df)
+    agg.report()
+    return agg.n
+
+
+def _spatial_setup(n):
+    import pandas as pd
+    pts = pd.concat(raw_plants(n).values(), ignore_index=True)
+    codes, sources = pd.factorize(pts["energy_source_level_2"].fillna("Unknown"), sort=True)
+    return (pts["lat"].to_numpy(), pts["lon"].to_numpy(),
+            pd.to_numeric(pts["electrical_capacity"], errors="coerce").fillna(0).to_numpy(), codes, sources)
+
+
+def plant_index(data):
+    from sustainable_energy.spatial import PlantIndex
+    lat, lon, cap, codes, sources = data
+    return PlantIndex(lat, lon, cap, codes, codes * 0, sources, ["all"])
+
+
+def _spatial_index(data):
+    return len(plant_index(data))
+
+
+def _spatial_query_setup(n):
+    import numpy as np
+    index = plant_index(_spatial_setup(n))
+    rng = np.random.default_rng(SEED)
+    pick = rng.integers(0, len(index), SPATIAL_QUERIES)
+    return index, index.lat[pick].astype(float), index.lon[pick].astype(float)
+
+
+def _spatial_query(state):
+    index, lats, lons = state
+    for lat, lon in zip(lats, lons):
+        index.capacity_near(lat, lon, SPATIAL_KM)
+    return len(index)
+
+
+def daily_matrix(n_series):
+    """``(days, V)`` — daily capacity ramps 2000–2020 (rows = days), with leading gaps and blanks."""
+    import numpy as np
+    rng = np.random.default_rng(SEED)
+    days = np.arange("2000-01-01", "2021-01-01", dtype="datetime64[D]")
+    t = np.arange(len(days))[:, None]
+    V = rng.uniform(100, 10000, n_series) / (1 + np.exp(-(t - rng.uniform(1000, 6000, n_series)) / 800))
+    V[t < rng.integers(0, 4000, n_series)] = np.nan
+    V[rng.random(V.shape) < 0.05] = np.nan
+    return days, V
+
+
+def _rollup(data):
+    from sustainable_energy.rollups import filled_rows, last_valid, period_starts
+    days, V = data
+    filled = filled_rows(V)
+    for ordinals, starts in period_starts(days).values():
+        last_valid(V, filled, starts)
+    return V.shape[1]
+
+
+def _downsample(data):
+    import numpy as np
+    from sustainable_energy.bundle import POINTS, decimal_years, lttb
+    days, V = data
+    x = decimal_years(days)
+    for v in V.T:
+        ok = np.isfinite(v)
+        lttb(x[ok], v[ok], POINTS)
+    return V.shape[1]
+
+
+def _fit(data):
+    from sustainable_energy.poly_fit import DEGREES, DEGREE_PENALTY, forecast_series
+    years, Y = data
+    forecast_series(years, Y, 2030, degrees=DEGREES, penalty=DEGREE_PENALTY)
+    return len(Y)
+
+
+def _fit_cached_setup(n):
+    from sustainable_energy.fit_cache import FitCache, forecast_cached
+    years, Y = yearly_matrix(n)
+    path = os.path.join(DATA, f"fit_cache-{n}.sqlite")
+    os.makedirs(DATA, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    cache = FitCache(path)
+    names = [f"series_{i}" for i in range(n)]
+    forecast_cached(cache, years, Y, 2030, names)
+    return cache, years, Y, names
+
+
+def _fit_cached(state):
+    from sustainable_energy.fit_cache import forecast_cached
+    cache, years, Y, names = state
+    forecast_cached(cache, years, Y, 2030, names)
+    return len(Y)
+
+
+def _online_setup(n):
+    import numpy as np
+    from sustainable_energy.poly_fit import DEGREES, PolyMoments
+    days, V = daily_matrix(n)
+    x = 2000 + np.arange(len(days)) / 365.25
+    Y = V.T
+    M = np.isfinite(Y) & (Y > 0)
+    return PolyMoments.of(x[:-1], Y[:, :-1], M[:, :-1], DEGREES), x[-1:], Y[:, -1:], M[:, -1:]
+
+
+def _online_update(state):
+    moments, x, y, m = state
+    moments.add(x, y, m)
+    moments.fit()
+    moments.add(x, y, m, sign=-1)       # back to the setup state for the next repeat
+    return len(y)
+
+
+def _bootstrap_setup(n):
+    from sustainable_energy.poly_fit import DEGREES, DEGREE_PENALTY, forecast_series
+    years, Y = yearly_matrix(n)
+    return forecast_series(years, Y, 2030, degrees=DEGREES, penalty=DEGREE_PENALTY)
+
+
+def _bootstrap(fc):
+    from sustainable_energy.poly_fit import prediction_intervals
+    prediction_intervals(fc, quantiles=(10, 50, 90), n_samples=BOOTSTRAP_SAMPLES)
+    return int(fc["keep"].sum())
+
+
+def _scenario_setup(n):
+    import numpy as np
+    from sustainable_energy.poly_fit import DEGREES, DEGREE_PENALTY, bootstrap_paths, forecast_series
+    years, Y = yearly_matrix(n)
+    fc = forecast_series(years, Y, 2030, degrees=DEGREES, penalty=DEGREE_PENALTY)
+    at = np.searchsorted(fc["grid"], [2030])
+    columns = [f"C{i}_solar_capacity" for i in range(int(fc["keep"].sum()))]
+    return {"labels": columns, "columns": columns, "years": [2030], "last_x": fc["last_x"],
+            "last_y": fc["last_y"], "trend": fc["pred"][:, at],
+            "adds": (bootstrap_paths(fc, BOOTSTRAP_SAMPLES)[:, :, at]
+                     - fc["last_y"][:, None, None]).astype(np.float32)}
+
+
+def _scenario(base):
+    from sustainable_energy.scenarios import simulate
+    spec = {"multipliers": [{"source": "solar", "multiplier": {"dist": "normal", "mean": 1.2, "sd": 0.1}}],
+            "targets": [{"source": "solar", "at_least_MW": float(base["trend"].sum())}]}
+    simulate(base, spec, SCENARIO_TRAJECTORIES)
+    return len(base["columns"])
+
+
+def _render_setup(n):
+    os.environ["OPSD_DATA_DIR"] = dataset(n)
+    from sustainable_energy import load, rollups
+    from sustainable_energy.analyze import plant_report, timeseries_report
+    from sustainable_energy.plot import analysis_charts, _pyplot
+    _pyplot()       # backend start-up is not part of drawing
+    plants, _ = load.load_plants(use_cache=False, log=lambda *a: None)
+    report = plant_report(plants)
+    report.update(timeseries_report(rollups.build(use_cache=False)))
+    return analysis_charts(report)
+
+
+def _render(specs):
+    from sustainable_energy.plot import render
+    with tempfile.TemporaryDirectory() as out:
+        drawn, _ = render(specs, out, "all", workers=1)
+    return drawn
+
+
+# name → (size kind, setup, run)
+CASES = {
+    "csv_load":    ("plants", _csv_load_setup, _csv_load),
+    "date_parse":  ("plants", _date_parse_setup, _date_parse),
+    "clean":       ("plants", _clean_setup, _clean),
+    "median_fill": ("plants", _median_fill_setup, _median_fill),
+    "report":      ("plants", compact_plants, _report),
+    "crosstab":    ("plants", compact_plants, _crosstab),
+    "cube_build":  ("plants", compact_plants, _cube_build),
+    "cube_query":  ("plants", _cube_setup, _cube_query),
+    "stream_agg":  ("plants", cleaned_plants, _stream_agg),
+    "spatial_index": ("plants", _spatial_setup, _spatial_index),
+    "spatial_query": ("plants", _spatial_query_setup, _spatial_query),
+    "rollup":      ("series", daily_matrix, _rollup),
+    "downsample":  ("series", daily_matrix, _downsample),
+    "fit":         ("series", yearly_matrix, _fit),
+    "fit_cached":  ("series", _fit_cached_setup, _fit_cached),
+    "online_update": ("series", _online_setup, _online_update),
+    "bootstrap":   ("series", _bootstrap_setup, _bootstrap),
+    "scenario":    ("series", _scenario_setup, _scenario),
+    "render":      ("charts", _render_setup, _render),
+}
+RENDER_PLANTS = 10_000      # render is sized by its chart count, on a 10k-plant report
+
+
+def run_case(name, size, repeat):
+    """Run one case in this process; returns its result record."""
+    sys.path.insert(0, BASE)
+    import warnings
+    warnings.filterwarnings("ignore")
+    kind, setup, fn = CASES[name]
+    state = setup(size)
+    best, rows, peak = None, 0, 0.0
+    for _ in range(repeat):
+        with PeakSampler() as mem:
+            t0 = time.perf_counter()
+            rows = fn(state)
+            dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+        peak = max(peak, mem.peak - mem.start)
+    return {"case": name, "kind": kind, "size": size, "seconds": round(best, 5), "rows": rows,
+            "rows_per_s": round(rows / best, 1) if best else None, "peak_mb": round(peak, 1),
+            "rss_mb": round(rss_mb(), 1)}
+
+
+def measure(name, size, repeat):
+    """Run one case in a fresh interpreter."""
+    out = subprocess.run([sys.executable, __file__, "--run-case", name, str(size), "--repeat", str(repeat)],
+                         cwd=BASE, capture_output=True, text=True)
+    if out.returncode:
+        return {"case": name, "size": size, "error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(res, base, threshold):
+    """``(note, regressed)`` for one result against its baseline record."""
+    if not base:
+        return "  (no baseline)", False
+    notes, bad = [], False
+    for key, floor, unit in (("seconds", MIN_SECONDS, "time"), ("peak_mb", MIN_MB, "mem")):
+        old, new = base.get(key), res[key]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change > threshold and new - old > floor
+        bad |= worse
+        notes.append(f"{unit} {change:+.0%}{' ❗' if worse else ''}")
+    return "  (" + ", ".join(notes) + ")", bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage benchmarks for the sustainable_energy pipeline.")
+    parser.add_argument("--plants", default="10k,1M", help="plant counts (default 10k,1M; e.g. 10k,1M,10M)")
+    parser.add_argument("--series", default="10,100,1000", help="series counts for rollup / fit / fit_cached / bootstrap (default 10,100,1000)")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, best time kept (default 3)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slow-down / memory growth counted as a regression (default 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--run-case", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case[0], int(args.run_case[1]), args.repeat)))
+        sys.exit(0)
+
+    sizes = {"plants": [parse_size(s) for s in args.plants.split(",")],
+             "series": [parse_size(s) for s in args.series.split(",")],
+             "charts": [RENDER_PLANTS]}
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+
+    results, failures = {}, 0
+    print(f"⏱️  Stage benchmarks (best of {args.repeat}, regression threshold {args.threshold:.0%}):")
+    for name in args.cases.split(","):
+        kind = CASES[name][0]
+        for size in sizes[kind]:
+            key = f"{name}@{size_label(size)}"
+            res = measure(name, size, args.repeat)
+            if "error" in res:
+                failures += 1
+                print(f"   ❌ {key:<20} {res['error']}")
+                continue
+            results[key] = res
+            note, bad = compare(res, baseline.get(key), args.threshold)
+            failures += bad
+            rate = f"{res['rows_per_s']:>14,.0f} {kind}/s" if res["rows_per_s"] else ""
+            print(f"   {'❌' if bad else '✅'} {key:<20} {res['seconds'] * 1000:10.1f} ms {rate}"
+                  f"  peak {res['peak_mb']:7.1f} MB{note}")
+
+    doc = {"python": sys.version.split()[0], "threshold": args.threshold, "repeat": args.repeat,
+           "results": results}
+    for path in ([args.baseline] if args.save_baseline else []) + ([args.json] if args.json else []):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"💾 Results saved → {path}")
+    sys.exit(1 if failures else 0)
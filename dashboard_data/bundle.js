@@ -0,0 +1,5 @@
+window.DASHBOARD_BUNDLE = {"overview":{"plantsPerCountry":{"labels":["Denmark","France","Czechia","Switzerland","Sweden","Poland"],"values":[84353,56097,31604,12718,5529,3451]},"capBySource":{"labels":["Wind","Solar","Hydro","Bioenergy","Marine","Geothermal","Other Or Unspecified"],"values":[41159.4,12162,4539.5,4232.5,2.8,1.8,0.6]},"capByCountry":{"labels":["France","Sweden","Poland","Denmark","Czechia","Switzerland"],"values":[26126.8,13763.3,9106.2,6736.2,5152.4,1213.7]},"span":[1990,2020]},
+"timeseries":{"deTimeseries":{"Solar":{"x":[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],"v":[73.9,171.9,265.4,387.5,1019.8,1927.3,2757,3978,5902.1,10243.4,17718.9,25646.5,32429.7,35514.5,37247.1,38630.5,40085.5,41717,47462.6,50508.4,50508.4]},"Wind Onshore":{"x":[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],"v":[2286.5,3935.1,5910.3,7683.7,9118.4,10405.8,11990.8,13289,13902.4,15952.2,17039.4,18507.2,20611.4,23274.9,27244,30649.7,34557.6,39379.9,43923.4,44710,44710]},"Wind Offshore":{"x":[2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],"v":[35,75,146.1,226.1,426.1,666.8,2162.4,2587.2,3482.6,5050.8,5741.6,5741.6]},"Bioenergy":{"x":[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],"v":[497.1,686.2,846.4,1062.5,1684.4,2477.5,3448.7,4159.2,4572.2,5108.5,5869.9,7104.1,7402.6,7669.9,7892.4,7907.5,7934.3,7950.9,8001.8,8021.3,8021.3]}}},
+"charts":{"yearly":{"years":[1990,1991,1992,1993,1994,1995,1996,1997,1998,1999,2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],"count":[85,126,83,74,127,163,388,1172,534,548,825,203,469,298,511,580,852,2312,5275,7631,6615,27698,61322,16652,5233,6683,4122,2990,4143,469,160],"mw":[16.2,26,20.1,24.3,53.8,79.4,203.9,745.2,374.6,418.4,667.7,174.5,678.9,466.3,461.9,778.8,1171.7,1316,1685.6,2440.9,2743,5482.7,7316.2,2854.1,2839.5,2818.2,2829.5,2803.3,3836.4,1616.6,635.9]},"techCounts":{"labels":["Photovoltaics","Other or unspecified technology","Onshore","Unknown","Run-of-river","Offshore","Unknown or unspecified technology","Combustion engine"],"values":[141529,34605,12778,2315,1814,657,51,3]},"deCorr":{"labels":["Bioenergy","Geothermal","Solar","Wind","Wind Offshore","Wind Onshore"],"data":[[1,0.845,0.929,0.868,0.632,0.89],[0.845,1,0.964,0.963,0.895,0.961],[0.929,0.964,1,0.945,0.815,0.952],[0.868,0.963,0.945,1,0.925,0.999],[0.632,0.895,0.815,0.925,1,0.904],[0.89,0.961,0.952,0.999,0.904,1]]},"srcCountry":{"sources":["Bioenergy","Geothermal","Hydro","Marine","Other Or Unspecified","Solar","Wind"],"countries":["Czechia","Denmark","France","Poland","Sweden","Switzerland"],"data":[[1571.1,0,836,1738.2,0,87.2],[0,0,1.8,0,0,0],[1105.4,0,2019,973.1,0,442],[0,0,2.8,0,0,0],[0.6,0,0,0,0,0],[2134.5,548.3,8381.2,477.7,0,620.4],[340.8,6187.9,14886,5917.2,13763.3,64.2]]}},
+"stats":{"stats":{"labels":["count","mean","std","min","25%","50%","75%","max"],"values":[193752,0.3205,2.5206,0,0.005,0.006,0.0742,569.5]}},
+"predictions":{"pred":{"series":["DE Solar","DE Wind Onshore","DE Wind Offshore","DE Bioenergy","DK Solar","DK Wind Onshore","UK Solar","UK Wind Onshore","UK Wind Offshore","CH Solar","SE Wind Onshore","FR Wind Onshore","FR Solar"],"actual_y":[[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020],[2000,2001,2002,2003,2004,2005,2006,2007,2008,2009,2010,2011,2012,2013,2014,2015,2016,2017,2018,2019,2020]],"actual_v":[[73.9,171.9,265.4,387.5,1019.8,1927.3,2757,3978,5902.1,10243.4,17718.9,25646.5,32429.7,35514.5,37247.1,38630.5,40085.5,41717,47462.6,50508.4,50508.4],[2286.5,3935.1,5910.3,7683.7,9118.4,10405.8,11990.8,13289,13902.4,15952.2,17039.4,18507.2,20611.4,23274.9,27244,30649.7,34557.6,39379.9,43923.4,44710,44710],[35,75,146.1,226.1,426.1,666.8,2162.4,2587.2,3482.6,5050.8,5741.6,5741.6],[497.1,686.2,846.4,1062.5,1684.4,2477.5,3448.7,4159.2,4572.2,5108.5,5869.9,7104.1,7402.6,7669.9,7892.4,7907.5,7934.3,7950.9,8001.8,8021.3,8021.3],[0.3,0.4,0.4,0.4,0.6,0.7,0.7,0.7,0.9,1,3.2,19.6,314.8,455,488.3,536.1,547.4,547.4,547.4,547.4,547.4],[1778.4,1887.5,2210.1,2230.1,2232.3,2254.5,2265.8,2268.4,2337.4,2439.8,2593.8,2777.6,2935.6,3278.4,3378.8,3606.6,3831.1,4161.2,4368.8,4390.2,4487.1],[145.9,262,877.9,2664.4,5637.4,7520,8307.5,8407,8465.3,8473.3],[342.1,434.3,561.8,630.4,994.3,1416.1,1834.2,2406.2,3026.1,3420.4,4018.1,4474.8,5803,7331.6,8173,8769.6,10090.7,12143.9,13020.9,13297.4,13327.3],[60,120,210,300,400,594.4,941.2,1331.2,1514.8,2669.4,3643.5,4039.5,5094,5094,6512,7904.7,8492.7,9692.7],[1.6,5.7,20.3,52.9,91.1,202.6,323.7,424.2,454.2,547,605.6,619.4,620.4,620.4,620.4],[191.4,229.2,304.5,357.6,415.4,471.8,534.6,652,853,1230.3,1794.7,2539.1,3339.4,3990.1,4728.7,5567.7,6175.4,6341.7,7192.8,8784,9323],[28.3,43.7,106.3,182.4,326.1,806.6,1640.8,2427.3,3327.8,4441.4,5577,6334.8,7073.9,7627.2,8648,9591.9,10883.4,12349.6,13852.2,13852.2,13852.2],[4.7,5.2,24.7,53.5,274.3,448,520.7,748.2,1174,1630.7,2129.5,3405.6,4009.7,4487.5,5234.2,5766.2,6233.5,6941.8,7704.4,7704.4,7704.4]],"forecast_y":[[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030],[2021,2022,2023,2024,2025,2026,2027,2028,2029,2030]],"forecast_v":[[60913.3,65671.1,70577.9,75633.8,80838.8,86193,91696.2,97348.5,103149.9,109100.4],[51510.6,55498.2,59643.1,63945.2,68404.5,73021.1,77795,82726.1,87814.4,93060],[7770.6,9138.6,10615.9,12202.5,13898.4,15703.6,17618.2,19642.1,21775.4,24017.9],[8418.2,8418.2,8418.2,8418.2,8418.2,8418.2,8418.2,8418.2,8418.2,8418.2],[775.7,853.9,935.8,1021.2,1110.2,1202.8,1298.9,1398.7,1502,1608.9],[4967.7,5246.4,5537.3,5840.5,6156,6483.7,6823.8,7176.2,7540.8,7917.7],[9231.9,9231.9,9231.9,9231.9,9231.9,9231.9,9231.9,9231.9,9231.9,9231.9],[16127.1,17560.4,19054.6,20609.7,22225.7,23902.7,25640.6,27439.5,29299.3,31220.1],[11054.6,12371.6,13763,15228.9,16769.2,18383.9,20073,21836.6,23674.5,25586.9],[713,738.4,760.2,778.3,792.9,803.9,811.3,815.2,815.4,815.4],[10624,11746.1,12925.3,14161.6,15455.1,16805.6,18213.2,19678,21199.8,22778.7],[16499.4,17797.1,19137.9,20521.8,21948.7,23418.7,24931.7,26487.9,28087,29729.3],[9588.7,10419.8,11283,12178.2,13105.6,14065,15056.6,16080.2,17135.9,18223.7]],"latest":[50508.4,44710,5741.6,8021.3,547.4,4487.1,8473.3,13327.3,9692.7,620.4,9323,13852.2,7704.4],"r2":[0.945,0.982,0.962,0.963,0.837,0.974,0.923,0.983,0.989,0.941,0.987,0.982,0.97],"growth":[116,108.1,318.3,4.9,193.9,76.5,9,134.3,164,31.4,144.3,114.6,136.5]}}};
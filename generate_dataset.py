@@ -2,15 +2,19 @@
 Generate a realistic Renewable Energy Dataset with intentional
 data quality issues (missing values, inconsistent dates, mixed formats)
 so the cleaning/preprocessing pipeline has real work to do.
+
+    python generate_dataset.py            # renewable_energy_data.csv (900 rows)
+    python generate_dataset.py --opsd [--plants N] [--workers N] [--seed S] ...
+        # OPSD-schema plant CSVs + capacity timeseries at any scale
+        # (= python -m sustainable_energy generate, see sustainable_energy/synthetic.py)
 """
 
 import csv
 import random
 import os
+import sys
 from datetime import datetime, timedelta
 
-random.seed(42)
-
 # Configuration
 OUTPUT = os.path.join(os.path.dirname(__file__), "renewable_energy_data.csv")
 START_DATE = datetime(2022, 1, 1)
@@ -54,59 +58,69 @@ EFFICIENCY = {"Solar": 22, "Wind": 35, "Hydro": 90, "Biomass": 25, "Geothermal":
 CO2_SAVED_PER_MWH = {"Solar": 0.5, "Wind": 0.6, "Hydro": 0.4, "Biomass": 0.3, "Geothermal": 0.35}
 CAPACITY = {"Solar": 500, "Wind": 600, "Hydro": 300, "Biomass": 200, "Geothermal": 150}
 
-rows = []
-header = [
-    "Date", "Region", "Energy_Source", "Energy_Generated_MWh",
-    "Energy_Consumed_MWh", "Cost_USD", "Efficiency_Percent",
-    "CO2_Saved_Tons", "Installed_Capacity_MW", "Revenue_USD",
-    "Storage_MWh", "Grid_Feed_MWh"
-]
-
-for m in range(NUM_MONTHS):
-    current = START_DATE + timedelta(days=m * 30)
-    month = current.month
-    year_offset = (current.year - 2022)           # gradual growth factor
-
-    for region in REGIONS:
-        for source in SOURCES:
-            # Pick a random date format to create inconsistency
-            fmt = random.choice(DATE_FORMATS)
-            date_str = current.strftime(fmt)
-
-            sf = seasonal_factor(month, source)
-            base = BASE_GENERATION[source][region]
-            growth = 1 + 0.05 * year_offset       # 5 % annual growth
-
-            gen = round(base * sf * growth * random.uniform(0.85, 1.15), 2)
-            consumed = round(gen * random.uniform(0.6, 0.95), 2)
-            cost = round(BASE_COST[source] * gen / 100 * random.uniform(0.9, 1.1), 2)
-            eff = round(EFFICIENCY[source] * random.uniform(0.9, 1.1), 2)
-            co2 = round(gen * CO2_SAVED_PER_MWH[source] * random.uniform(0.9, 1.1), 2)
-            cap = CAPACITY[source] + year_offset * 20
-            revenue = round(gen * random.uniform(40, 70), 2)
-            storage = round(gen * random.uniform(0.05, 0.20), 2)
-            grid_feed = round(gen - consumed, 2)
-
-            row = [
-                date_str, region, source, gen, consumed, cost,
-                eff, co2, cap, revenue, storage, grid_feed
-            ]
-
-            # Introduce ~5 % missing values at random positions (skip Date/Region/Source)
-            for i in range(3, len(row)):
-                if random.random() < 0.05:
-                    row[i] = ""
-
-            rows.append(row)
-
-# Shuffle a little for realism
-random.shuffle(rows)
-
-with open(OUTPUT, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(header)
-    writer.writerows(rows)
-
-print(f"✅ Dataset written to {OUTPUT}")
-print(f"   Rows : {len(rows)}")
-print(f"   Cols : {len(header)}")
+def generate_legacy():
+    """The original custom-schema dataset: 36 months × 5 regions × 5 sources."""
+    random.seed(42)
+    rows = []
+    header = [
+        "Date", "Region", "Energy_Source", "Energy_Generated_MWh",
+        "Energy_Consumed_MWh", "Cost_USD", "Efficiency_Percent",
+        "CO2_Saved_Tons", "Installed_Capacity_MW", "Revenue_USD",
+        "Storage_MWh", "Grid_Feed_MWh"
+    ]
+
+    for m in range(NUM_MONTHS):
+        current = START_DATE + timedelta(days=m * 30)
+        month = current.month
+        year_offset = (current.year - 2022)           # gradual growth factor
+
+        for region in REGIONS:
+            for source in SOURCES:
+                # Pick a random date format to create inconsistency
+                fmt = random.choice(DATE_FORMATS)
+                date_str = current.strftime(fmt)
+
+                sf = seasonal_factor(month, source)
+                base = BASE_GENERATION[source][region]
+                growth = 1 + 0.05 * year_offset       # 5 % annual growth
+
+                gen = round(base * sf * growth * random.uniform(0.85, 1.15), 2)
+                consumed = round(gen * random.uniform(0.6, 0.95), 2)
+                cost = round(BASE_COST[source] * gen / 100 * random.uniform(0.9, 1.1), 2)
+                eff = round(EFFICIENCY[source] * random.uniform(0.9, 1.1), 2)
+                co2 = round(gen * CO2_SAVED_PER_MWH[source] * random.uniform(0.9, 1.1), 2)
+                cap = CAPACITY[source] + year_offset * 20
+                revenue = round(gen * random.uniform(40, 70), 2)
+                storage = round(gen * random.uniform(0.05, 0.20), 2)
+                grid_feed = round(gen - consumed, 2)
+
+                row = [
+                    date_str, region, source, gen, consumed, cost,
+                    eff, co2, cap, revenue, storage, grid_feed
+                ]
+
+                # Introduce ~5 % missing values at random positions (skip Date/Region/Source)
+                for i in range(3, len(row)):
+                    if random.random() < 0.05:
+                        row[i] = ""
+
+                rows.append(row)
+
+    # Shuffle a little for realism
+    random.shuffle(rows)
+
+    with open(OUTPUT, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    print(f"✅ Dataset written to {OUTPUT}")
+    print(f"   Rows : {len(rows)}")
+    print(f"   Cols : {len(header)}")
+
+
+if __name__ == "__main__":
+    if "--opsd" in sys.argv[1:]:
+        from sustainable_energy.cli import main
+        sys.exit(main(["generate", *(a for a in sys.argv[1:] if a != "--opsd")]))
+    generate_legacy()
@@ -0,0 +1,43 @@
+"""
+Sustainable Energy Prediction
+=============================
+Analysis and 2030 capacity forecasts from the OPSD renewable power plant
+data.  Stages are plain functions in submodules:
+
+  load      country plant files and the capacity timeseries
+  rollups   daily / monthly / yearly timeseries rollups, memory-mapped
+  clean     cleaning summary, timeseries filter, encoding
+  cube      capacity cube (country × source × technology × year) and its queries
+  dates     multi-format date parsing with per-format counts
+  analyze   analysis report sections (``run`` = the analyze command)
+  bundle    dashboard data bundle: columnar, downsampled, pre-compressed (``run`` = export)
+  predict   dashboard forecasts and the indexed store (``run`` = predict)
+  fit_cache per-series fit cache — unchanged series are not refitted
+  scenarios Monte-Carlo what-if scenarios for the 2030 targets (``run`` = scenario)
+  online    appended timeseries rows → rollups, running fits, forecast store (``run`` = update)
+  server    local HTTP forecast server + dashboard (``run`` = serve)
+  backtest  rolling-origin backtest (``run`` = backtest)
+  plot      charts (matplotlib / seaborn imported on first use)
+  metrics   per-stage timing / memory → run_metrics.json (+ cProfile)
+  synthetic OPSD-schema load-test data (``run`` = generate)
+  orchestrate make-style stage graph with concurrent stages (``run`` = pipeline)
+  spatial   plant location index, radius / grid-cell capacity queries
+
+Submodules are imported on first attribute access, so ``import
+sustainable_energy`` itself loads nothing heavy.
+"""
+
+import importlib
+
+_SUBMODULES = {
+    "analyze", "backtest", "bundle", "clean", "cli", "csv_cache", "cube", "dates", "fit_cache", "forecast_store", "load",
+    "metrics", "online", "orchestrate", "paths", "plant_stream", "plot", "poly_fit", "predict", "rollups", "scenarios", "server", "spatial", "synthetic",
+}
+
+__all__ = sorted(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
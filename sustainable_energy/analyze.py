@@ -0,0 +1,224 @@
+"""
+Renewable Energy Analysis — Using REAL OPSD CSV Data
+=====================================================
+Uses the actual Open Power System Data (OPSD) renewable power plant CSVs.
+Combines country-level plant data + capacity timeseries.
+Produces: cleaned CSV, analysis JSON, charts, and the web dashboard data bundle.
+
+``plant_report`` and ``timeseries_report`` build the report sections from
+loaded data; ``run`` is the ``analyze`` command.
+"""
+
+import os, json
+import pandas as pd
+
+from . import bundle, clean, load, rollups
+from .dates import format_summary, merge_counts
+from .csv_cache import enabled as parquet_available
+from .cube import CapacityCube
+from .metrics import RunMetrics
+from .paths import CLEAN, CLEAN_PARQUET, CUBE, REPORT, PARTIALS, CHARTS
+from .plant_stream import CHUNK_ROWS, write_clean
+
+# Key capacity columns for visualization
+KEY_TS_COLS = {
+    "DE_solar": "DE_solar_capacity",
+    "DE_wind_onshore": "DE_wind_onshore_capacity",
+    "DE_wind_offshore": "DE_wind_offshore_capacity",
+    "DE_bioenergy": "DE_bioenergy_capacity",
+    "DK_solar": "DK_solar_capacity",
+    "DK_wind_onshore": "DK_wind_onshore_capacity",
+    "UK_solar": "GB-UKM_solar_capacity",
+    "UK_wind_onshore": "GB-UKM_wind_onshore_capacity",
+    "CH_solar": "CH_solar_capacity",
+    "SE_wind_onshore": "SE_wind_onshore_capacity",
+}
+
+
+def plant_report(plants, cube=None):
+    """Report sections 4a–4h of the cleaned in-memory plant frame, as capacity-cube queries.
+
+    Only the capacity quartiles are read from the frame itself — cube
+    cells cannot merge order statistics.
+    """
+    cube = cube if cube is not None else CapacityCube.from_frame(plants)
+    # Quartiles in float64 — the compact frame stores capacity as float32
+    cap = clean.capacity_float64(plants["electrical_capacity"])
+    return cube.report({f"{q:.0%}": cap.quantile(q) for q in (0.25, 0.5, 0.75)})
+
+
+def timeseries_report(store):
+    """Report sections 4i–4k from the capacity timeseries rollups (a :class:`rollups.RollupStore`)."""
+    report = {}
+
+    # 4i. Timeseries: yearly snapshots (last value per year) for key countries
+    yearly = store.frame(KEY_TS_COLS.values(), "yearly")
+    ts_trend = {}
+    for label, col in KEY_TS_COLS.items():
+        if col not in yearly.columns:
+            continue
+        snap = yearly[col].dropna()
+        snap = snap[snap > 0]
+        ts_trend[label] = {
+            "years": snap.index.strftime("%Y").tolist(),
+            "values": snap.round(2).tolist()
+        }
+    report["capacity_timeseries_yearly"] = ts_trend
+
+    # 4j. Country total from timeseries (latest values)
+    country_totals_ts = {}
+    for col, val in store.latest().items():
+        if "_capacity" in col and pd.notna(val) and val > 0:
+            country_totals_ts[col.replace("_capacity", "")] = round(float(val), 2)
+    report["latest_installed_capacity_MW"] = dict(sorted(country_totals_ts.items(), key=lambda x: -x[1])[:20])
+
+    # 4k. Correlation for timeseries (DE sources)
+    de_cols = [c for c in store.columns if c.startswith("DE_") and "_capacity" in c]
+    if de_cols:
+        corr = store.frame(de_cols, "daily").corr().round(3)
+        short_labels = [c.replace("DE_", "").replace("_capacity", "").replace("_", " ").title() for c in de_cols]
+        report["de_correlation_matrix"] = {
+            "labels": short_labels,
+            "data": corr.values.tolist()
+        }
+    return report
+
+
+def run(stream=False, incremental=False, chunksize=CHUNK_ROWS, workers=1, use_cache=True, charts="changed",
+        clean_format="both", profile=False, export=True):
+    """The ``analyze`` command: load → clean → preprocess → report → bundle → charts.
+
+    ``charts`` is a :data:`plot.MODES` value; ``clean_format`` picks the
+    cleaned outputs (``"csv"``, ``"parquet"`` or ``"both"``); ``export=False``
+    leaves the dashboard bundle to the caller.  Stage metrics go to
+    run_metrics.json (``profile`` adds a cProfile dump).
+    """
+    stream = stream or incremental
+    write_csv = clean_format in ("csv", "both")
+    write_parquet = clean_format in ("parquet", "both")
+    if write_parquet and not parquet_available():
+        print("   ⚠️  pyarrow not installed — cleaned Parquet dataset skipped")
+        write_parquet = False
+    metrics = RunMetrics("analyze", profile)
+    metrics.info["options"] = {"stream": stream, "incremental": incremental, "chunksize": chunksize,
+                               "workers": workers, "clean_format": clean_format}
+    metrics.info["input_mb"] = round(sum(os.path.getsize(p) for _, p in load.country_jobs()
+                                         if os.path.exists(p)) / 1e6, 2)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 1. LOAD ALL COUNTRY CSVs
+    # ═══════════════════════════════════════════════════════════════
+    pool_note = f", {workers} workers" if workers > 1 else ""
+    with metrics.stage("load") as st:
+        if stream:
+            print(f"📥 Streaming OPSD renewable power plant data ({chunksize:,} rows/chunk{pool_note}) ...")
+            agg, loaded = load.stream_plants(chunksize, workers, PARTIALS if incremental else None, use_cache,
+                                             metrics=metrics)
+            print(f"\n   Combined dataset: {agg.rows_in} rows × {len(load.COMMON_COLS) + 1} cols")
+            st.rows_in, st.rows_out = agg.rows_in, agg.n
+        else:
+            # Each country is loaded and cleaned (steps 2a–2f) on its own — in parallel with --workers
+            print(f"📥 Loading OPSD renewable power plant data{' (' + pool_note[2:] + ')' if pool_note else ''} ...")
+            plants, load_stats = load.load_plants(workers, use_cache, metrics=metrics)
+            print(f"\n   Combined dataset: {sum(s['rows'] for s in load_stats)} rows × {len(load.COMMON_COLS) + 1} cols")
+            clean.memory_report(plants, "loaded + cleaned (compact)")
+            st.rows_in, st.rows_out = sum(s["rows"] for s in load_stats), len(plants)
+
+    # Also load capacity timeseries
+    # (rolled up to every resolution once, then served from the rollup store)
+    with metrics.stage("load_timeseries") as st:
+        ts = rollups.open_store(use_cache=use_cache, log=lambda msg: print(f"   {msg}"))
+        print(f"   Timeseries loaded: {ts.rows} rows × {len(ts) + 1} cols")
+        st.rows_out = ts.rows
+
+    # ═══════════════════════════════════════════════════════════════
+    # 2. CLEAN
+    # ═══════════════════════════════════════════════════════════════
+    print("\n🧹 Cleaning ...")
+    with metrics.stage("clean", rows_in=ts.rows) as st:
+        # --- Plants data ---
+        if stream:
+            # 2a–2d, 2f already applied per chunk; 2e is resolved from the date histograms
+            clean.print_summary(clean.missing_summary(agg=agg), agg.rows_dropped, agg.remaining_nan(),
+                                (agg.n, len(load.COMMON_COLS) + 2))
+            date_formats = agg.date_formats
+        else:
+            # 2a–2f already applied per country file (plant_stream.load_clean_country)
+            clean.print_summary(clean.missing_summary(load_stats), sum(s["dropped"] for s in load_stats),
+                                plants.isnull().sum().sum(), plants.shape)
+            date_formats = merge_counts(*(s["date_formats"] for s in load_stats))
+        print(f"   commissioning_date formats: {format_summary(date_formats)}")
+        metrics.info["date_formats"] = date_formats
+
+        # --- Timeseries data (cleaned when the rollups were built) ---
+        print(f"   Timeseries (2000+): {(ts.rows_clean, len(ts) + 1)} — rollups: "
+              + ", ".join(f"{len(ts.periods[res])} {res}" for res in rollups.FREQ))
+        st.rows_out = ts.rows_clean
+
+    # ═══════════════════════════════════════════════════════════════
+    # 3. PREPROCESS
+    # ═══════════════════════════════════════════════════════════════
+    print("\n⚙️  Preprocessing ...")
+    # The partitioned dataset is written next to the old one and swapped in at the end
+    parquet_tmp = f"{CLEAN_PARQUET}.{os.getpid()}.tmp" if write_parquet else None
+    with metrics.stage("preprocess") as st:
+        if incremental:
+            # A global rescale/re-encode would touch every country — defeats the point
+            print("   ⏭️  Cleaned outputs not rewritten in --incremental mode (run --stream for a full rewrite)")
+        elif stream:
+            # Second pass: re-stream with the medians, capacity range and label sets from pass one
+            n_clean = write_clean(loaded, agg, load.COMMON_COLS, CLEAN if write_csv else None, parquet_tmp,
+                                  chunksize, use_cache)
+            if write_csv:
+                print(f"   Cleaned CSV streamed ({n_clean} rows) → {CLEAN}")
+            st.rows_in = st.rows_out = n_clean
+        else:
+            clean.encode_plants(plants)
+            clean.memory_report(plants, "preprocessed")
+            if write_csv:
+                plants.to_csv(CLEAN, index=False)
+                print(f"   Cleaned CSV saved → {CLEAN}")
+            if write_parquet:
+                clean.write_partitioned(plants, parquet_tmp)
+            st.rows_in = st.rows_out = len(plants)
+        if parquet_tmp and not incremental:
+            clean.replace_dir(parquet_tmp, CLEAN_PARQUET)
+            print(f"   Cleaned Parquet (partitioned by {' / '.join(clean.PARTITION_COLS)}) → {CLEAN_PARQUET}/")
+
+    # ═══════════════════════════════════════════════════════════════
+    # 4. ANALYSIS
+    # ═══════════════════════════════════════════════════════════════
+    print("\n📊 Analysing ...")
+    with metrics.stage("analyze", rows_in=agg.n if stream else len(plants)):
+        # 4a–4h are queries of the capacity cube (quartiles come from a sketch or the frame)
+        cube = agg.filled_cube() if stream else CapacityCube.from_frame(plants)
+        cube.save(CUBE)
+        print(f"   Capacity cube: {len(cube):,} cells → {CUBE}")
+        report = agg.report(cube) if stream else plant_report(plants, cube)
+        report.update(timeseries_report(ts))
+
+        with open(REPORT, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"   Report JSON saved → {REPORT}")
+
+    # ═══════════════════════════════════════════════════════════════
+    # 5. DASHBOARD BUNDLE
+    # ═══════════════════════════════════════════════════════════════
+    if export:
+        print("\n📦 Exporting the dashboard data bundle ...")
+        with metrics.stage("export"):
+            bundle.export(report, store=ts, use_cache=use_cache)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 6. CHARTS
+    # ═══════════════════════════════════════════════════════════════
+    if charts != "none":
+        from .plot import analysis_charts, render
+        print("\n🎨 Generating charts ...")
+        with metrics.stage("charts"):
+            drawn, skipped = render(analysis_charts(report), CHARTS, charts)
+        print(f"   {drawn} charts saved → {os.path.basename(CHARTS)}/"
+              f"{f' ({skipped} unchanged, skipped)' if skipped else ''}")
+    metrics.save()
+    print("\n✅ All done!")
+    return report
@@ -0,0 +1,193 @@
+"""
+Rolling-Origin Backtest of the Capacity Forecasts
+=================================================
+Re-runs the polynomial model selection of predict.py from every historical
+cut-off year: only the data up to the cut-off is used to fit and pick the
+degree, and the forecasts for the following years are scored against what
+was actually installed.  Out-of-sample error is reported per series and
+horizon for the selected model, every candidate degree and a naive
+"no further growth" baseline.
+
+All (series × cut-off) fits go through one batched closed-form solve
+(poly_fit.py), so a backtest of every capacity column takes seconds.
+
+Usage:
+  python -m sustainable_energy backtest                # the dashboard series
+  python -m sustainable_energy backtest --all-series   # every *_capacity column
+  python -m sustainable_energy backtest --horizon 5 --first-cutoff 2010
+
+Outputs:
+  • backtest_report.json  (leaderboards + per-series / per-horizon errors)
+"""
+
+import json, time
+import numpy as np
+
+from . import load
+from .forecast_store import SERIES, capacity_columns, series_label
+from .paths import BACKTEST_FILE
+from .poly_fit import DEGREES, DEGREE_PENALTY, fit_polynomials, last_observed, clamp_monotone
+
+MIN_POINTS = 4      # same threshold as predict.py
+
+
+def backtest(years, Y, cutoffs, horizon, degrees=DEGREES, penalty=DEGREE_PENALTY, min_points=MIN_POINTS):
+    """Rolling-origin forecasts of every series from every cut-off year.
+
+    ``Y`` is ``(S, T)`` over ``years``.  Each (series, cut-off) pair becomes
+    one row of a stacked ``(S·C, T)`` batch that only sees data up to its
+    cut-off; all rows and degrees are fitted in a single solve.  Returns a
+    dict of ``(S, C, H)`` arrays — ``actual``, ``naive`` and the forecasts of
+    each model (``"selected"`` and ``"degree_<d>"``) — plus the ``(S, C)``
+    mask ``valid`` of origins with enough history and the in-sample
+    penalised R² ``r2`` of the selected model.
+    """
+    years = np.asarray(years)
+    Y = np.asarray(Y, dtype="float64")
+    S, T, C = Y.shape[0], len(years), len(cutoffs)
+    M = np.isfinite(Y) & (Y > 0)
+
+    # (S, C, T) mask of what each origin is allowed to see
+    seen = M[:, None, :] & (years[None, None, :] <= np.asarray(cutoffs)[None, :, None])
+    Yb = np.broadcast_to(Y[:, None, :], (S, C, T)).reshape(S * C, T)
+    Mb = seen.reshape(S * C, T)
+    fit = fit_polynomials(years, Yb, Mb, degrees=degrees)
+    best, adj = fit.select(penalty)
+    last_x, last_y = last_observed(years, Yb, Mb)
+
+    # Target years cut-off + 1 … cut-off + H, per origin
+    target = np.asarray(cutoffs)[:, None] + np.arange(1, horizon + 1)[None, :]      # (C, H)
+    grid = np.arange(years.min(), target.max() + 1)
+    col = np.broadcast_to(target - grid[0], (S, C, horizon)).reshape(S * C, horizon)
+
+    def at_targets(which):
+        pred = clamp_monotone(fit.predict(grid, which), grid, last_x, last_y)
+        return np.take_along_axis(pred, col, axis=1).reshape(S, C, horizon)
+
+    forecasts = {"selected": at_targets(best)}
+    for i, d in enumerate(degrees):
+        forecasts[f"degree_{d}"] = at_targets(np.full(S * C, i))
+
+    # Actual values at the targets (NaN past the end of the data / unobserved)
+    pos = np.searchsorted(years, target)
+    inside = (pos < T) & (years[np.minimum(pos, T - 1)] == target)
+    idx = np.minimum(pos, T - 1)
+    actual = np.where(inside[None] & M[:, idx], Y[:, idx], np.nan)
+
+    return {
+        "valid": (fit.n >= min_points).reshape(S, C),
+        "r2": adj.reshape(S, C),
+        "actual": actual,
+        "naive": np.broadcast_to(last_y.reshape(S, C, 1), (S, C, horizon)),
+        "forecasts": forecasts,
+    }
+
+
+def error_table(bt):
+    """MAE (MW) and MAPE (%) per model, series and horizon → ``(S, H)`` arrays."""
+    models = {**bt["forecasts"], "naive": bt["naive"]}
+    scored = bt["valid"][..., None] & np.isfinite(bt["actual"])
+    n = scored.sum(axis=1)                                                     # (S, H)
+    out = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, pred in models.items():
+            abs_err = np.where(scored, np.abs(pred - bt["actual"]), 0.0)
+            pct_err = np.where(scored, abs_err / np.abs(bt["actual"]), 0.0)
+            out[name] = {"mae": abs_err.sum(axis=1) / n, "mape": 100 * pct_err.sum(axis=1) / n}
+    return out, n
+
+
+def _r(v, nd=2):
+    return None if not np.isfinite(v) else round(float(v), nd)
+
+
+def run(all_series=False, horizon=5, first_cutoff=2008, use_cache=True):
+    """The ``backtest`` command; returns the report written to backtest_report.json."""
+    # ═══════════════════════════════════════════════════════════════
+    # 1. LOAD TIMESERIES
+    # ═══════════════════════════════════════════════════════════════
+    t0 = time.perf_counter()
+    available = load.timeseries_columns(use_cache)
+    if all_series:
+        labels = {c: series_label(c) for c in capacity_columns(available)}
+    else:
+        labels = {v: k for k, v in SERIES.items() if v in available}
+    cols = list(labels)
+    yearly = load.load_yearly(cols, use_cache)
+    years = yearly["year"].values.astype(int)
+    cutoffs = np.arange(first_cutoff, years.max())
+    if not len(cutoffs):
+        raise ValueError(f"No cut-off years between {first_cutoff} and {years.max() - 1}")
+    print(f"📥 {len(cols)} series × {len(years)} years — cut-offs {cutoffs[0]}–{cutoffs[-1]}, "
+          f"horizon {horizon} years")
+
+    # ═══════════════════════════════════════════════════════════════
+    # 2. BACKTEST (one batched fit of every series × cut-off × degree)
+    # ═══════════════════════════════════════════════════════════════
+    t1 = time.perf_counter()
+    bt = backtest(years, yearly[cols].values.T, cutoffs, horizon)
+    errors, n_scored = error_table(bt)
+    t2 = time.perf_counter()
+    print(f"🔁 {bt['valid'].sum()} (series, cut-off) origins fitted in {(t2 - t1) * 1000:.1f} ms "
+          f"(load {t1 - t0:.2f}s)")
+
+    # ═══════════════════════════════════════════════════════════════
+    # 3. LEADERBOARDS
+    # ═══════════════════════════════════════════════════════════════
+    horizons = list(range(1, horizon + 1))
+    models = list(errors)
+
+    # Models: error by horizon, averaged over every scored series
+    model_board = []
+    for name in models:
+        with np.errstate(invalid="ignore"):
+            mape_h = [np.nanmean(errors[name]["mape"][:, h]) if np.isfinite(errors[name]["mape"][:, h]).any()
+                      else np.nan for h in range(horizon)]
+        model_board.append({"model": name, "mape_by_horizon": [_r(v) for v in mape_h],
+                            "mean_mape": _r(np.nanmean(mape_h)) if np.isfinite(mape_h).any() else None})
+    model_board.sort(key=lambda e: np.inf if e["mean_mape"] is None else e["mean_mape"])
+
+    # Series: out-of-sample error of the selected model vs in-sample R²
+    series_board = []
+    for i, col in enumerate(cols):
+        mape = errors["selected"]["mape"][i]
+        if not np.isfinite(mape).any():
+            continue
+        valid = bt["valid"][i]
+        series_board.append({
+            "series": labels[col],
+            "column": col,
+            "origins": int(valid.sum()),
+            "mean_in_sample_r2": _r(bt["r2"][i, valid].mean(), 4),
+            "mean_mape": _r(np.nanmean(mape)),
+            "naive_mean_mape": _r(np.nanmean(errors["naive"]["mape"][i])),
+            "mape_by_horizon": [_r(v) for v in mape],
+            "mae_MW_by_horizon": [_r(v) for v in errors["selected"]["mae"][i]],
+            "scored_by_horizon": n_scored[i].tolist(),
+        })
+    series_board.sort(key=lambda e: e["mean_mape"])
+
+    report = {
+        "cutoffs": cutoffs.tolist(),
+        "horizons": horizons,
+        "degrees": list(DEGREES),
+        "degree_penalty": DEGREE_PENALTY,
+        "fit_ms": round((t2 - t1) * 1000, 2),
+        "models": model_board,
+        "series": series_board,
+    }
+    with open(BACKTEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n🏆 Models — mean out-of-sample MAPE by horizon:")
+    for e in model_board:
+        hs = "  ".join(f"h{h}={'—' if v is None else f'{v:.1f}%'}" for h, v in zip(horizons, e["mape_by_horizon"]))
+        print(f"   {e['model']:<10} {hs}")
+    print("\n📋 Series (selected model):")
+    for e in series_board[:20]:
+        print(f"   {e['series']:<22} MAPE {e['mean_mape']:>7.2f}%  (naive {e['naive_mean_mape']:>7.2f}%, "
+              f"in-sample R² {e['mean_in_sample_r2']:.4f}, {e['origins']} origins)")
+    if len(series_board) > 20:
+        print(f"   … {len(series_board) - 20} more in the report")
+    print(f"\n💾 Backtest report saved → {BACKTEST_FILE}")
+    return report
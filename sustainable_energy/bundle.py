@@ -0,0 +1,282 @@
+"""
+Dashboard Data Bundle
+=====================
+The data behind the web dashboard, exported from analysis_report.json and
+predictions.json instead of pasted into app.js by hand.  ``export``:
+
+  1. splits the data into one section per dashboard area (overview, DE
+     timeseries, charts, statistics, predictions), so the page fetches a
+     section only when it scrolls into view
+  2. stores every table columnar — ``{"labels": […], "values": […]}``
+     rather than one object per row — with numbers rounded to a fixed
+     precision (``DIGITS``)
+  3. charts the DE capacity timeseries at daily resolution from the
+     rollup store, downsampled to ``POINTS`` points per series with
+     Largest-Triangle-Three-Buckets (``lttb``), which keeps the steps and
+     ramps a plain stride would skip
+  4. writes each section as ``<section>.<content hash>.json`` plus
+     pre-compressed ``.gz`` and ``.br`` twins (brotli only if installed),
+     and a ``manifest.json`` naming the current files
+  5. writes every section once more into ``bundle.js``, which the page
+     loads with a ``<script>`` tag only when the manifest cannot be
+     fetched (``file://``)
+
+Section files never change under a name, so they can be cached forever;
+only the small manifest is revalidated.  The previous generation's files
+are kept, so a page loaded before an export still finds its sections.
+"""
+
+import os, json, gzip, hashlib
+import numpy as np
+
+try:
+    import brotli
+except ImportError:     # .br variants are skipped
+    brotli = None
+
+from .paths import BUNDLE, PRED_FILE, REPORT
+
+MANIFEST = "manifest.json"
+FALLBACK = "bundle.js"  # every section as one script, for pages that cannot fetch
+BUNDLE_VERSION = 1
+POINTS = 400            # LTTB target per timeseries
+HASH_LEN = 12
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Decimals kept per kind of number
+DIGITS = {"mw": 1, "ratio": 3, "stat": 4, "year": 3, "pct": 1}
+# Dashboard label → timeseries column of the DE growth chart
+DE_SERIES = {
+    "Solar": "DE_solar_capacity",
+    "Wind Onshore": "DE_wind_onshore_capacity",
+    "Wind Offshore": "DE_wind_offshore_capacity",
+    "Bioenergy": "DE_bioenergy_capacity",
+}
+
+
+def fixed(values, digits):
+    """``values`` rounded to ``digits`` decimals as a JSON-ready list (whole numbers as ints, NaN as null)."""
+    out = np.round(np.asarray(values, dtype="float64"), digits).tolist()
+    return [None if v != v else int(v) if v.is_integer() else v for v in out]
+
+
+def lttb(x, y, n):
+    """Indices of ``n`` points of ``(x, y)`` chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; every bucket in between keeps the
+    point spanning the largest triangle with the point kept before it and
+    the mean of the next bucket.
+    """
+    N = len(x)
+    if n >= N or n < 3:
+        return np.arange(N)
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    edges = np.linspace(1, N - 1, n - 1).astype(np.int64)
+    # Mean of every bucket after the first, then of the last point alone
+    sizes = np.diff(np.r_[edges, N])
+    mx, my = np.add.reduceat(x, edges) / sizes, np.add.reduceat(y, edges) / sizes
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, N - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mx[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (my[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def decimal_years(days):
+    """Day ordinals (days since 1970-01-01) → fractional years, e.g. 2012-07-02 → 2012.5."""
+    d = np.asarray(days, dtype="datetime64[D]")
+    year = d.astype("datetime64[Y]")
+    start, end = year.astype("datetime64[D]"), (year + 1).astype("datetime64[D]")
+    return year.astype(np.int64) + 1970 + (d - start) / (end - start)
+
+
+def _column(mapping, digits):
+    return {"labels": list(mapping), "values": fixed(list(mapping.values()), digits)}
+
+
+# ═══════════════════════════════════════════════════════════════
+# SECTIONS
+# ═══════════════════════════════════════════════════════════════
+def overview_section(report):
+    """KPI cards, capacity by source / country and plants per country."""
+    years = report["yearly_commissioning"]["years"]
+    return {
+        "plantsPerCountry": _column(report["plants_per_country"], 0),
+        "capBySource": _column(report["total_capacity_by_source_MW"], DIGITS["mw"]),
+        "capByCountry": _column(report["total_capacity_by_country_MW"], DIGITS["mw"]),
+        "span": [int(min(years)), int(max(years))] if years else None,
+    }
+
+
+def timeseries_section(report, store=None, points=POINTS):
+    """DE capacity growth: daily rollups downsampled with LTTB, or the report's yearly snapshots without a store."""
+    series = {}
+    if store is not None:
+        cols, values = store.series(DE_SERIES.values(), "daily")
+        x = decimal_years(store.periods["daily"])
+        label = {c: k for k, c in DE_SERIES.items()}
+        for col, v in zip(cols, values):
+            ok = np.isfinite(v) & (v > 0)
+            xs, vs = x[ok], np.asarray(v[ok])
+            keep = lttb(xs, vs, points)
+            series[label[col]] = {"x": fixed(xs[keep], DIGITS["year"]), "v": fixed(vs[keep], DIGITS["mw"])}
+    else:
+        for label, col in DE_SERIES.items():
+            snap = report["capacity_timeseries_yearly"].get(col.replace("_capacity", ""))
+            if snap:
+                series[label] = {"x": [int(y) for y in snap["years"]], "v": fixed(snap["values"], DIGITS["mw"])}
+    return {"deTimeseries": series}
+
+
+def charts_section(report):
+    """Commissioning trend, technologies and the two heatmaps."""
+    yearly = report["yearly_commissioning"]
+    corr = report.get("de_correlation_matrix", {"labels": [], "data": []})
+    matrix = report["source_country_matrix"]
+    return {
+        "yearly": {"years": [int(y) for y in yearly["years"]], "count": fixed(yearly["plant_count"], 0),
+                   "mw": fixed(yearly["total_MW"], DIGITS["mw"])},
+        "techCounts": _column(report["plants_by_technology_top10"], 0),
+        "deCorr": {"labels": corr["labels"], "data": [fixed(r, DIGITS["ratio"]) for r in corr["data"]]},
+        "srcCountry": {"sources": matrix["sources"], "countries": matrix["countries"],
+                       "data": [fixed(r, DIGITS["mw"]) for r in matrix["data"]]},
+    }
+
+
+def stats_section(report):
+    stats = report["basic_statistics"]["electrical_capacity"]
+    return {"stats": _column(stats, DIGITS["stat"])}
+
+
+def predictions_section(predictions):
+    """Dashboard forecasts, one column per field and one row per series."""
+    entries = {k: v for k, v in predictions.items() if isinstance(v, dict) and "forecast_values" in v}
+    rows = list(entries.values())
+    return {"pred": {
+        "series": list(entries),
+        "actual_y": [[int(y) for y in e["actual_years"]] for e in rows],
+        "actual_v": [fixed(e["actual_values"], DIGITS["mw"]) for e in rows],
+        "forecast_y": [[int(y) for y in e["forecast_years"]] for e in rows],
+        "forecast_v": [fixed(e["forecast_values"], DIGITS["mw"]) for e in rows],
+        "latest": fixed([e["latest_actual_MW"] for e in rows], DIGITS["mw"]),
+        "r2": fixed([e["r2_score"] for e in rows], DIGITS["ratio"]),
+        "growth": fixed([next((v for k, v in e.items() if k.startswith("growth_")), np.nan) for e in rows],
+                        DIGITS["pct"]),
+    }}
+
+
+def sections(report, predictions=None, store=None, points=POINTS):
+    """``{section: data}`` of everything the dashboard shows."""
+    out = {
+        "overview": overview_section(report),
+        "timeseries": timeseries_section(report, store, points),
+        "charts": charts_section(report),
+        "stats": stats_section(report),
+    }
+    if predictions:
+        out["predictions"] = predictions_section(predictions)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# WRITE
+# ═══════════════════════════════════════════════════════════════
+def encode(data):
+    """Compact JSON bytes of one section."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def read_manifest(path=BUNDLE):
+    try:
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def manifest_files(manifest):
+    """Every file (with its compressed twins) a manifest names."""
+    names = set()
+    for entry in (manifest or {}).get("sections", {}).values():
+        names.add(entry["file"])
+        names.update(entry["file"] + ext for ext in entry.get("encodings", {}).values())
+    return names
+
+
+def write_bundle(parts, path=BUNDLE):
+    """Write ``parts`` (``{section: data}``) as hashed, pre-compressed files and swap in a new manifest."""
+    os.makedirs(path, exist_ok=True)
+    previous = read_manifest(path)
+    manifest = {"version": BUNDLE_VERSION, "sections": {}}
+    inline = []
+    for name, data in parts.items():
+        raw = encode(data)
+        inline.append(f"{json.dumps(name)}:".encode("utf-8") + raw)
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()[:HASH_LEN]
+        fname = f"{name}.{digest}.json"
+        variants = {"gzip": (".gz", gzip.compress(raw, GZIP_LEVEL, mtime=0))}
+        if brotli is not None:
+            variants["br"] = (".br", brotli.compress(raw, quality=BROTLI_QUALITY))
+        for ext, body in [("", raw), *variants.values()]:
+            if not os.path.exists(os.path.join(path, fname + ext)):     # same name, same bytes
+                _write(os.path.join(path, fname + ext), body)
+        manifest["sections"][name] = {
+            "file": fname, "bytes": len(raw),
+            "encodings": {enc: ext for enc, (ext, _) in variants.items()},
+            "encoded_bytes": {enc: len(body) for enc, (_, body) in variants.items()},
+        }
+    manifest["hash"] = hashlib.blake2b("".join(sorted(e["file"] for e in manifest["sections"].values())).encode(),
+                                       digest_size=8).hexdigest()
+    _write(os.path.join(path, FALLBACK), b"window.DASHBOARD_BUNDLE = {" + b",\n".join(inline) + b"};\n")
+    _write(os.path.join(path, MANIFEST), json.dumps(manifest, indent=2).encode("utf-8"))
+    # Keep this and the previous generation; drop anything older
+    keep = manifest_files(manifest) | manifest_files(previous) | {MANIFEST, FALLBACK}
+    for f in os.listdir(path):
+        if f not in keep and not f.endswith(".tmp"):
+            os.remove(os.path.join(path, f))
+    return manifest
+
+
+def export(report=None, predictions=None, store=None, path=BUNDLE, use_cache=True, log=print):
+    """The export stage: read whatever of the report / predictions / rollups is not passed in and write the bundle."""
+    if report is None:
+        with open(REPORT, encoding="utf-8") as f:
+            report = json.load(f)
+    if predictions is None and os.path.exists(PRED_FILE):
+        with open(PRED_FILE, encoding="utf-8") as f:
+            predictions = json.load(f)
+    if store is None:
+        from .rollups import open_store
+        try:
+            store = open_store(list(DE_SERIES.values()), use_cache=use_cache, log=log)
+        except OSError as e:
+            log(f"   ⚠️  No capacity timeseries ({e.__class__.__name__}) — yearly snapshots from the report")
+    manifest = write_bundle(sections(report, predictions, store), path)
+    raw = sum(e["bytes"] for e in manifest["sections"].values())
+    packed = sum(e["encoded_bytes"].get("br", e["encoded_bytes"]["gzip"]) for e in manifest["sections"].values())
+    log(f"   Dashboard bundle: {len(manifest['sections'])} sections, {raw / 1024:.1f} KB "
+        f"({packed / 1024:.1f} KB {'brotli' if brotli else 'gzip'}) → {os.path.basename(path)}/")
+    return manifest
+
+
+def run(use_cache=True):
+    """The ``export`` command."""
+    print("📦 Exporting the dashboard data bundle ...")
+    try:
+        export(use_cache=use_cache)
+    except FileNotFoundError:
+        print(f"❌ {REPORT} not found — run analyze first")
+        return 1
+    print("\n✅ Bundle ready!")
+    return 0
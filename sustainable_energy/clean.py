@@ -0,0 +1,195 @@
+"""
+Cleaning & Preprocessing
+========================
+Plant rows are cleaned per country while they load (steps 2a–2f in
+plant_stream.py) and kept in a compact frame: categorical labels, float32
+capacity and int16 year.  This module holds that representation and the
+whole-dataset steps that follow: the missing-value summary, the timeseries
+filter, the scaling / encoding (category codes — no LabelEncoder needed)
+and the cleaned outputs, cleaned_data.csv and a Parquet dataset
+partitioned by country and year — plus the cleaner for the custom-schema
+dataset of generate_dataset.py.
+"""
+
+import os, json, shutil
+import numpy as np
+import pandas as pd
+
+from .dates import format_summary, parse_dates
+
+CATEGORY_COLS = ["energy_source_level_1", "energy_source_level_2", "energy_source_level_3",
+                 "technology", "country"]
+ENCODED = {"source_encoded": "energy_source_level_2", "country_encoded": "country",
+           "tech_encoded": "technology"}
+PARTITION_COLS = ["country", "year"]
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMPACT FRAME
+# ═══════════════════════════════════════════════════════════════
+def compact_plants(df, categories=None):
+    """Categorical labels, float32 capacity and int16 year (nullable only if a year is missing).
+
+    ``categories`` (column → labels) fixes the categories, so chunks of one
+    dataset share the same codes.
+    """
+    categories = categories or {}
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = pd.Categorical(df[c], categories=categories.get(c))
+    df["electrical_capacity"] = df["electrical_capacity"].astype("float32")
+    if "year" in df.columns:
+        df["year"] = df["year"].astype("int16" if df["year"].notna().all() else "Int16")
+    return df
+
+
+def concat_plants(frames):
+    """Concatenate compact frames, unioning (and sorting) their categories."""
+    frames = [f for f in frames if len(f.columns)]
+    for c in CATEGORY_COLS:
+        if frames and all(c in f.columns for f in frames):
+            cats = sorted(set().union(*(f[c].cat.categories for f in frames)))
+            for f in frames:
+                f[c] = f[c].cat.set_categories(cats)
+    return pd.concat(frames, ignore_index=True)
+
+
+def capacity_float64(s):
+    """float32 capacity back to float64, rounded to float32's 7 significant digits.
+
+    A plain upcast carries the float32 rounding error into sums and
+    quantiles; rounding restores the source values (OPSD capacities have
+    at most 7 significant digits).  ``round(x · 10^k) / 10^k`` is exact
+    division of two exactly representable numbers, so each value is the
+    nearest float64 to its decimal form.
+    """
+    x = s.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        digits = 6 - np.floor(np.log10(np.abs(x)))
+    scale = 10.0 ** np.where(np.isfinite(digits), digits, 0)
+    return pd.Series(np.round(x * scale) / scale, index=s.index, name=s.name)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def memory_report(df, stage, log=print):
+    """Log the deep memory use of ``df`` after ``stage``, largest columns first."""
+    cols = df.memory_usage(deep=True, index=False).sort_values(ascending=False) / 1024 ** 2
+    top = ", ".join(f"{c} {mb:.2f}" for c, mb in cols.head(4).items())
+    log(f"   💾 {stage}: {memory_mb(df):.2f} MB for {len(df)} rows ({top} MB)")
+
+
+def missing_summary(load_stats=None, agg=None):
+    """Initial missing values per column, from the in-memory load stats or the stream aggregates."""
+    if agg is not None:
+        missing = {k: int(v) for k, v in agg.initial_missing.items()}
+    else:
+        missing = {k: int(v) for k, v in sum(s["missing"] for s in load_stats).items()}
+    missing["country"] = 0
+    return missing
+
+
+def print_summary(missing, dropped, remaining, shape, log=print):
+    log(f"   Initial missing values:\n{json.dumps(missing, indent=4)}")
+    log(f"   Dropped {dropped} rows with no capacity data")
+    log(f"   Remaining NaN: {remaining}")
+    log(f"   Clean dataset: {shape}")
+
+
+def clean_timeseries(ts):
+    """Drop unparseable days, keep 2000+ (meaningful data) and sort by day (file order within a day)."""
+    ts["day"] = parse_dates(ts["day"])
+    ts = ts.dropna(subset=["day"])
+    ts = ts[ts["day"] >= "2000-01-01"].copy()
+    ts.sort_values("day", inplace=True, kind="stable")
+    return ts
+
+
+def encode_plants(plants, capacity_range=None):
+    """Add the min-max scaled capacity and the encoded source, country and technology.
+
+    The codes are those of the sorted categories — what a LabelEncoder would
+    learn.  ``capacity_range`` overrides the ``(min, max)`` of this frame.
+    """
+    cap = plants["electrical_capacity"]
+    lo, hi = capacity_range or (cap.min(), cap.max())
+    plants["capacity_scaled"] = ((cap - lo) / ((hi - lo) or 1.0)).astype("float32")
+    for name, col in ENCODED.items():
+        plants[name] = plants[col].cat.codes
+    return plants
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLEANED OUTPUTS
+# ═══════════════════════════════════════════════════════════════
+def write_partitioned(df, out_dir, tag="part"):
+    """Add ``df`` to the Parquet dataset at ``out_dir``, partitioned by country and year.
+
+    Files are named ``<tag>-<n>.parquet`` inside ``country=…/year=…``
+    directories, so repeated calls with distinct tags append.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, out_dir, partition_cols=PARTITION_COLS,
+                        basename_template=f"{tag}-{{i}}.parquet",
+                        existing_data_behavior="overwrite_or_ignore")
+
+
+def replace_dir(tmp_dir, out_dir):
+    """Swap a freshly written dataset directory into place."""
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+
+def read_clean(parquet_dir, country=None, year=None, columns=None):
+    """Read one slice of the partitioned cleaned dataset (only its files are opened)."""
+    filters = [(c, "in", v if isinstance(v, (list, tuple)) else [v])
+               for c, v in (("country", country), ("year", year)) if v is not None]
+    df = pd.read_parquet(parquet_dir, columns=columns, filters=filters or None)
+    # Hive partition keys come back as categories
+    if "year" in df.columns:
+        df["year"] = df["year"].astype("int16")
+    return df
+
+
+# ═══════════════════════════════════════════════════════════════
+# GENERATED DATASET (generate_dataset.py)
+# ═══════════════════════════════════════════════════════════════
+GENERATED_KEYS = ["Date", "Region", "Energy_Source"]
+
+
+def clean_generated(df, date_counts=None):
+    """Clean renewable_energy_data.csv: mixed-format dates, blank measures.
+
+    Dates go through the multi-format parser (rows whose date cannot be
+    parsed are dropped); a blank grid feed is generation minus consumption,
+    any other blank measure takes the median of its region and source.
+    """
+    df = df.copy()
+    df["Date"] = parse_dates(df["Date"], date_counts)
+    df = df.dropna(subset=["Date"])
+    measures = [c for c in df.columns if c not in GENERATED_KEYS]
+    df[measures] = df[measures].apply(pd.to_numeric, errors="coerce")
+    if {"Grid_Feed_MWh", "Energy_Generated_MWh", "Energy_Consumed_MWh"} <= set(df.columns):
+        feed = (df["Energy_Generated_MWh"] - df["Energy_Consumed_MWh"]).round(2)
+        df["Grid_Feed_MWh"] = df["Grid_Feed_MWh"].fillna(feed)
+    df[measures] = df[measures].fillna(df.groupby(["Region", "Energy_Source"])[measures].transform("median"))
+    return df.sort_values(GENERATED_KEYS, ignore_index=True)
+
+
+def clean_generated_file(src, out, log=print):
+    """The ``clean-generated`` command: clean ``src`` into ``out`` and report the date formats."""
+    raw = pd.read_csv(src, dtype={"Date": "object"})
+    counts = {}
+    df = clean_generated(raw, counts)
+    log(f"🧹 {os.path.basename(src)}: {len(raw)} rows")
+    log(f"   Date formats: {format_summary(counts)}")
+    log(f"   Missing values before cleaning: {int(raw.isnull().sum().sum())}, after: {int(df.isnull().sum().sum())}")
+    log(f"   Dropped {len(raw) - len(df)} rows with an unparseable date")
+    df.to_csv(out, index=False, date_format="%Y-%m-%d")
+    log(f"   Cleaned CSV saved → {out}")
+    return df
@@ -0,0 +1,309 @@
+"""
+Command Line Interface
+======================
+``python -m sustainable_energy <command>`` with one subcommand per stage:
+
+  analyze   load → clean → preprocess → analysis_report.json → charts
+  predict   predictions.json (+ charts), or the indexed forecast store
+  backtest  rolling-origin backtest → backtest_report.json
+  generate  synthetic OPSD-schema plant CSVs + timeseries for load tests
+  clean-generated  clean generate_dataset.py's renewable_energy_data.csv
+  spatial   plant location index: capacity near a point / per grid cell
+  cube      roll-ups and slices of the capacity cube written by analyze
+  serve     local HTTP forecast server (on-demand /forecast) + the dashboard
+  export    dashboard data bundle (dashboard_data/) from the saved report / predictions
+  scenario  Monte-Carlo what-if scenarios: 2030 target probabilities and quantiles
+  update    fold rows appended to the timeseries CSV into the rollups, fits and forecast store
+  pipeline  every stage as a dependency graph: rerun only what is stale, independent stages concurrently
+
+analyze, predict and spatial build record per-stage metrics in run_metrics.json.
+
+Only the stage that runs is imported, so ``--help`` and chart-less runs
+never load sklearn, matplotlib or seaborn.
+"""
+
+import argparse, json, sys, warnings
+from functools import partial
+
+CHUNK_ROWS = 200_000    # plant_stream.CHUNK_ROWS, repeated so --help stays import-free
+CHART_MODES = ("none", "changed", "all")    # plot.MODES
+
+
+def _cache_flags(p):
+    p.add_argument("--no-cache", action="store_true", help="parse the CSVs directly, bypassing the columnar cache")
+    p.add_argument("--rebuild-cache", action="store_true", help="drop the columnar cache and rebuild it from CSV")
+
+
+def _chart_flags(p):
+    p.add_argument("--charts", choices=CHART_MODES, default="changed",
+                   help="redraw charts whose data changed (default), all of them, or none")
+    p.add_argument("--no-charts", dest="charts", action="store_const", const="none", help="same as --charts=none")
+
+
+def _profile_flag(p):
+    p.add_argument("--profile", action="store_true",
+                   help="run every stage under cProfile and dump the slowest one to run_profile.prof")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sustainable_energy",
+                                     description="OPSD renewable capacity analysis and 2030 forecasts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("analyze", help="analyse OPSD renewable power plant data")
+    p.add_argument("--stream", action="store_true",
+                   help="stream plant CSVs in chunks into running aggregates (bounded memory, includes DE)")
+    p.add_argument("--chunksize", type=int, default=CHUNK_ROWS,
+                   help=f"rows per chunk in --stream mode (default {CHUNK_ROWS:,})")
+    p.add_argument("--incremental", action="store_true",
+                   help="--stream, but reuse saved per-country partials whose CSV is unchanged")
+    p.add_argument("--workers", type=int, default=1,
+                   help="load and clean country files in N parallel processes (default 1)")
+    p.add_argument("--clean-format", choices=["csv", "parquet", "both"], default="both",
+                   help="cleaned outputs: cleaned_data.csv, the cleaned_data/ Parquet dataset "
+                        "partitioned by country and year, or both (default)")
+    _chart_flags(p)
+    _cache_flags(p)
+    _profile_flag(p)
+
+    p = sub.add_parser("predict", help="forecast renewable capacity to 2030")
+    p.add_argument("--all-series", action="store_true",
+                   help="forecast every *_capacity column into the indexed store (no JSON/charts)")
+    p.add_argument("--batch", type=int, default=256, help="series per batch in --all-series mode (default 256)")
+    p.add_argument("--samples", type=int, default=2000,
+                   help="bootstrap resamples per series for the P10/P50/P90 bands (default 2000)")
+    p.add_argument("--resolution", choices=["yearly", "monthly", "daily"], default="yearly",
+                   help="fit and forecast on yearly snapshots (default) or monthly / daily observations; "
+                        "non-yearly runs go to the indexed store")
+    _chart_flags(p)
+    _cache_flags(p)
+    _profile_flag(p)
+
+    p = sub.add_parser("backtest", help="rolling-origin backtest of the forecast models")
+    p.add_argument("--all-series", action="store_true", help="backtest every *_capacity column")
+    p.add_argument("--horizon", type=int, default=5, help="years ahead to score (default 5)")
+    p.add_argument("--first-cutoff", type=int, default=2008, help="earliest cut-off year (default 2008)")
+    _cache_flags(p)
+
+    p = sub.add_parser("generate", help="write synthetic OPSD-schema data for load tests")
+    p.add_argument("--out", help="output directory (default synthetic-opsd/)")
+    p.add_argument("--plants", type=int, default=1_000_000, help="plant rows over all countries (default 1,000,000)")
+    p.add_argument("--series", type=int, default=15, help="timeseries capacity columns (default 15)")
+    p.add_argument("--seed", type=int, default=42, help="random seed — same seed, same files (default 42)")
+    p.add_argument("--chunk-rows", type=int, default=500_000, help="rows generated per chunk (default 500,000)")
+    p.add_argument("--shard-rows", type=int, default=4_000_000,
+                   help="rows per process job when sharding with --workers (default 4,000,000)")
+    p.add_argument("--workers", type=int, default=1, help="write shards in N parallel processes (default 1)")
+    p.add_argument("--mixed-dates", type=float, default=0.2,
+                   help="share of commissioning dates in a non-ISO format (default 0.2)")
+    p.add_argument("--blank-rate", type=float, default=0.05, help="share of blank cells (default 0.05)")
+
+    p = sub.add_parser("clean-generated", help="clean generate_dataset.py's mixed-format dataset")
+    p.add_argument("--input", help="dataset to clean (default renewable_energy_data.csv)")
+    p.add_argument("--output", help="cleaned CSV (default renewable_energy_data_clean.csv)")
+
+    p = sub.add_parser("spatial", help="geospatial plant index and regional capacity queries")
+    spatial = p.add_subparsers(dest="action", required=True)
+    q = spatial.add_parser("build", help="build plant_index.npz and the dashboard rasters (plant_rasters.json)")
+    q.add_argument("--workers", type=int, default=1, help="read country files in N parallel processes (default 1)")
+    q.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help=f"rows per chunk (default {CHUNK_ROWS:,})")
+    _cache_flags(q)
+    _profile_flag(q)
+    q = spatial.add_parser("near", help="capacity by source within a radius of a point")
+    q.add_argument("lat", type=float)
+    q.add_argument("lon", type=float)
+    q.add_argument("--km", type=float, default=25.0, help="radius in km (default 25)")
+    q.add_argument("--source", help="only this energy source (e.g. Solar)")
+    q.add_argument("--json", action="store_true", help="print the result as JSON")
+    _cache_flags(q)
+    q = spatial.add_parser("cells", help="capacity per grid cell, largest first")
+    q.add_argument("--deg", type=float, default=0.25, help="cell size in degrees, a multiple of 0.05 (default 0.25)")
+    q.add_argument("--source", help="only this energy source (e.g. Wind)")
+    q.add_argument("--top", type=int, default=20, help="cells listed (default 20)")
+    q.add_argument("--csv", help="write every cell to this CSV instead")
+    _cache_flags(q)
+
+    p = sub.add_parser("cube", help="query the capacity cube (capacity_cube.npz, written by analyze)")
+    p.add_argument("--by", default="", help="comma-separated dimensions to group by: country, source, source3, "
+                                            "tech, year (default: one grand total)")
+    p.add_argument("--where", action="append", metavar="DIM=VALUE",
+                   help="keep only these labels, e.g. source=Solar, country=France,Denmark, year=2010:2020 "
+                        "(repeatable)")
+    p.add_argument("--csv", help="write the result to this CSV instead of printing it")
+
+    p = sub.add_parser("serve", help="local HTTP forecast server (/forecast, /series, /stats) and the dashboard")
+    p.add_argument("--host", default="127.0.0.1", help="interface to listen on (default 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8000, help="port (default 8000)")
+    p.add_argument("--workers", type=int, default=4, help="threads fitting and rendering forecasts (default 4)")
+    p.add_argument("--cache-size", type=int, default=256,
+                   help="fitted models and responses kept, each (LRU, default 256)")
+    p.add_argument("--samples", type=int, default=2000,
+                   help="bootstrap resamples for the yearly P10/P50/P90 bands, 0 for none (default 2000)")
+    _cache_flags(p)
+
+    p = sub.add_parser("export", help="rebuild the dashboard data bundle from analysis_report.json / predictions.json")
+    _cache_flags(p)
+
+    p = sub.add_parser("scenario", help="Monte-Carlo what-if scenarios for the 2030 capacity forecasts")
+    p.add_argument("spec", nargs="?", help="JSON scenario spec (multipliers, targets; see scenarios.py)")
+    p.add_argument("--multiplier", action="append", default=[], metavar="COUNTRY/SOURCE=VALUE",
+                   help="scale the trend additions, e.g. DE/solar=1.2 or DE/wind=normal(1,0.15) (repeatable)")
+    p.add_argument("--target", action="append", default=[], metavar="COUNTRY/SOURCE>=VALUE",
+                   help="capacity target, e.g. DE/wind>=70GW or DE/solar>=90000@2028 (MW; repeatable)")
+    p.add_argument("--trajectories", type=int, help="simulated trajectories (default: the spec's, or 200,000)")
+    p.add_argument("--samples", type=int, default=2000,
+                   help="bootstrap paths per series the trajectories draw from, 0 for the trend only (default 2000)")
+    p.add_argument("--seed", type=int, help="random seed (default: the spec's, or 0)")
+    p.add_argument("--all-series", action="store_true", help="every *_capacity column, not just the dashboard series")
+    p.add_argument("--json", help="also write the results to this JSON file")
+    _cache_flags(p)
+
+    p = sub.add_parser("update", help="fold new timeseries rows into the forecast store without a batch rerun")
+    p.add_argument("--resolution", action="extend", nargs="+", choices=["yearly", "monthly", "daily"],
+                   help="forecast-store resolutions to update (one or more, default yearly)")
+    p.add_argument("--all-series", action="store_true",
+                   help="every *_capacity column, as predict --all-series (default: the dashboard series)")
+    p.add_argument("--every", type=float, metavar="SECONDS",
+                   help="keep running, checking the CSV for new rows every SECONDS")
+
+    p = sub.add_parser("pipeline", help="run the stages as a dependency graph, rebuilding only stale ones")
+    p.add_argument("targets", nargs="*", metavar="STAGE",
+                   help="stages to bring up to date, with everything upstream (default: all; "
+                        "generate, load, analyze, forecast, predict, charts, pred_charts, export)")
+    p.add_argument("--jobs", "-j", type=int, default=None,
+                   help="stages run at once (default: CPU count, at most 4)")
+    p.add_argument("--force", action="append", default=[], metavar="STAGE",
+                   help="rerun this stage even if it is up to date; 'all' for every stage (repeatable)")
+    p.add_argument("--dry-run", "-n", action="store_true", help="print which stages would run and why")
+    p.add_argument("--stream", action="store_true", help="analyze in --stream mode (includes DE)")
+    p.add_argument("--chunksize", type=int, default=CHUNK_ROWS,
+                   help=f"rows per chunk in --stream mode (default {CHUNK_ROWS:,})")
+    p.add_argument("--workers", type=int, default=1, help="analyze's country worker processes (default 1)")
+    p.add_argument("--clean-format", choices=["csv", "parquet", "both"], default="both",
+                   help="cleaned outputs written by analyze (default both)")
+    p.add_argument("--samples", type=int, default=2000,
+                   help="bootstrap resamples per forecast series (default 2000)")
+    p.add_argument("--charts", choices=CHART_MODES, default="changed",
+                   help="chart stages: redraw changed charts (default), redraw all, or leave them out")
+    p.add_argument("--rebuild-cache", action="store_true", help="drop the columnar cache and rebuild it from CSV")
+    return parser
+
+
+def cube_main(args):
+    from .cube import CapacityCube, parse_where, print_rollup
+    from .paths import CUBE
+    try:
+        cube = CapacityCube.load(CUBE)
+        by = [d.strip() for d in args.by.split(",") if d.strip()]
+        table = cube.rollup(by, parse_where(args.where))
+    except FileNotFoundError:
+        print(f"❌ {CUBE} not found — run analyze first")
+        return 1
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.csv:
+        table.to_csv(args.csv)
+        print(f"   {len(table):,} rows → {args.csv}")
+    else:
+        print(f"🧊 Capacity cube ({len(cube):,} cells) by {', '.join(by) or 'total'}:")
+        print_rollup(table)
+    return 0
+
+
+def spatial_main(args, use_cache):
+    from . import spatial
+    if args.action == "build":
+        spatial.run_build(args.workers, args.chunksize, use_cache, profile=args.profile)
+        return 0
+    # Keep stdout clean for --json; rebuild progress goes to stderr
+    log = partial(print, file=sys.stderr) if getattr(args, "json", False) else print
+    index = spatial.load_index(use_cache=use_cache, log=log)
+    if args.action == "near":
+        result = index.capacity_near(args.lat, args.lon, args.km, args.source)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            spatial.print_near(result)
+        return 0
+    try:
+        cells = index.cell_capacity(args.deg, args.source)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.csv:
+        cells.to_csv(args.csv, index=False)
+        print(f"   {len(cells):,} cells → {args.csv}")
+    else:
+        spatial.print_cells(cells, args.deg, args.top)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    warnings.filterwarnings("ignore")
+    if args.command == "generate":
+        from .paths import SYNTH_DIR
+        from .synthetic import run
+        run(args.out or SYNTH_DIR, n_plants=args.plants, n_series=args.series, seed=args.seed,
+            chunk_rows=args.chunk_rows, shard_rows=args.shard_rows, workers=args.workers,
+            mixed_dates=args.mixed_dates, blank_rate=args.blank_rate)
+        return 0
+    if args.command == "clean-generated":
+        from .clean import clean_generated_file
+        from .paths import GENERATED, GENERATED_CLEAN
+        clean_generated_file(args.input or GENERATED, args.output or GENERATED_CLEAN)
+        return 0
+    if args.command == "cube":
+        return cube_main(args)
+    use_cache = not getattr(args, "no_cache", False)
+    if getattr(args, "rebuild_cache", False):
+        from .csv_cache import clear_cache
+        clear_cache()
+
+    if args.command == "spatial":
+        return spatial_main(args, use_cache)
+    if args.command == "scenario":
+        from .scenarios import run
+        try:
+            run(args.spec, args.multiplier, args.target, args.trajectories, args.samples, args.seed,
+                args.all_series, args.json, use_cache)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        return 0
+    if args.command == "update":
+        from .online import run
+        return run(list(dict.fromkeys(args.resolution or ["yearly"])), args.all_series, args.every)
+    if args.command == "pipeline":
+        from .orchestrate import JOBS, run
+        try:
+            return run(args.targets, args.jobs or JOBS, args.force, args.dry_run, args.stream, args.chunksize,
+                       args.workers, args.clean_format, args.samples, args.charts)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    if args.command == "analyze":
+        from .analyze import run
+        run(stream=args.stream, incremental=args.incremental, chunksize=args.chunksize,
+            workers=args.workers, use_cache=use_cache, charts=args.charts,
+            clean_format=args.clean_format, profile=args.profile)
+    elif args.command == "predict":
+        from .predict import run
+        run(all_series=args.all_series, resolution=args.resolution, batch=args.batch,
+            samples=args.samples, use_cache=use_cache, charts=args.charts, profile=args.profile)
+    elif args.command == "serve":
+        from .server import run
+        run(args.host, args.port, args.workers, args.cache_size, args.samples, use_cache)
+    elif args.command == "export":
+        from .bundle import run
+        return run(use_cache)
+    elif args.command == "backtest":
+        from .backtest import run
+        try:
+            run(all_series=args.all_series, horizon=args.horizon, first_cutoff=args.first_cutoff,
+                use_cache=use_cache)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    return 0
@@ -0,0 +1,265 @@
+"""
+Columnar Cache for OPSD CSV Inputs
+==================================
+Parsing the OPSD CSVs (and the dates in them, see dates.py) is the slowest
+part of every run.  The first read of a CSV converts it to a typed Parquet
+file — date columns already parsed — keyed by the file's path, content hash
+and conversion options; later runs read that file instead, with column
+projection.  The cache is capped in size and evicts least-recently-used
+entries.  Without pyarrow every call falls back to plain ``pd.read_csv``.
+pyarrow is only imported on the first cached read.
+"""
+
+import os, json, time, hashlib
+import numpy as np
+import pandas as pd
+
+from . import dates
+from .paths import CACHE_DIR
+
+pa = pq = None
+INDEX = os.path.join(CACHE_DIR, "index.json")
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CONVERT_ROWS = 200_000
+# Bump when conversion changes (2: multi-format date parser) — invalidates cached files
+CACHE_VERSION = 2
+
+
+# ═══════════════════════════════════════════════════════════════
+# INDEX
+# ═══════════════════════════════════════════════════════════════
+def _load_index():
+    try:
+        with open(INDEX, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"entries": {}, "stamps": {}}
+
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{INDEX}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, INDEX)
+
+
+def enabled():
+    """Import pyarrow on first use; False when it is not installed."""
+    global pa, pq
+    if pq is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:  # cache disabled, plain CSV reads
+            return False
+    return True
+
+
+def clear_cache():
+    """Drop every cached Parquet file and the index — the next reads rebuild them from CSV.
+
+    Other state kept in CACHE_DIR (rollups, fit cache, online sums,
+    pipeline state and logs) is left alone.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for fname in os.listdir(CACHE_DIR):
+        # Converted files, their interrupted temporaries and the index
+        if fname.endswith(".parquet") or ".parquet." in fname or fname == os.path.basename(INDEX):
+            try:
+                os.remove(os.path.join(CACHE_DIR, fname))
+            except OSError:
+                pass
+
+
+def file_hash(path, index=None):
+    """BLAKE2 content hash; re-hashed only when size or mtime changed."""
+    st = os.stat(path)
+    stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    stamps = index["stamps"] if index is not None else {}
+    known = stamps.get(os.path.abspath(path))
+    if known and all(known.get(k) == v for k, v in stamp.items()):
+        return known["sha"]
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    stamps[os.path.abspath(path)] = {**stamp, "sha": h.hexdigest()}
+    return h.hexdigest()
+
+
+def source_hash(path):
+    """Content hash of ``path``, memoised in the cache index by size + mtime."""
+    index = _load_index()
+    sha = file_hash(path, index)
+    _save_index(index)
+    return sha
+
+
+def appended_hash(path, sha, offset):
+    """Identity of ``path`` after bytes were appended at ``offset``, without re-reading the start.
+
+    ``sha`` (the identity of the first ``offset`` bytes) chained with the
+    hash of the new bytes — stamped in the cache index, so
+    :func:`source_hash` returns it until the file changes again.
+    """
+    st = os.stat(path)
+    h = hashlib.blake2b(sha.encode(), digest_size=20)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        left = st.st_size - offset
+        while left > 0:
+            block = f.read(min(left, 1 << 20))
+            if not block:
+                break
+            h.update(block)
+            left -= len(block)
+    index = _load_index()
+    index["stamps"][os.path.abspath(path)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha": h.hexdigest()}
+    _save_index(index)
+    return h.hexdigest()
+
+
+def _evict(index, keep):
+    """Delete least-recently-used files until the cache fits CACHE_MAX_BYTES.
+
+    Scans the directory rather than trusting the index alone: worker
+    processes update the index concurrently and may drop each other's
+    entries, and such files must still count (and be evictable).
+    """
+    entries = index["entries"]
+    by_file = {e["file"]: key for key, e in entries.items()}
+    files = []
+    for fname in os.listdir(CACHE_DIR):
+        if not fname.endswith(".parquet"):
+            continue
+        fpath = os.path.join(CACHE_DIR, fname)
+        key = by_file.get(fname)
+        used = entries[key]["last_used"] if key else os.path.getmtime(fpath)
+        files.append((used, fname, key, os.path.getsize(fpath)))
+    total = sum(f[3] for f in files)
+    for used, fname, key, size in sorted(files):
+        if total <= CACHE_MAX_BYTES:
+            break
+        if key == keep:
+            continue
+        try:
+            os.remove(os.path.join(CACHE_DIR, fname))
+        except OSError:
+            pass
+        total -= size
+        entries.pop(key, None)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONVERSION
+# ═══════════════════════════════════════════════════════════════
+def _arrow_type(col, dtype, parse_dates):
+    if col in parse_dates:
+        return pa.timestamp("ns")
+    kind = np.dtype(dtype.get(col, "object")).kind
+    return {"f": pa.float64(), "i": pa.int64(), "b": pa.bool_()}.get(kind, pa.string())
+
+
+def _convert(path, out, dtype, parse_dates, streamed):
+    """Convert a CSV to a typed Parquet file.
+
+    Whole-file conversion keeps ``pd.read_csv``'s type inference for the
+    columns without an explicit dtype.  ``streamed`` conversion never holds
+    the whole file: it writes one row group per chunk against a fixed schema
+    (explicit dtypes, strings for everything else).
+    """
+    if not streamed:
+        df = pd.read_csv(path, dtype=dtype, low_memory=False)
+        for c in parse_dates:
+            if c in df.columns:
+                df[c] = dates.parse_dates(df[c])
+        tmp = f"{out}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, out)
+        return
+
+    header = pd.read_csv(path, nrows=0).columns
+    schema = pa.schema([(c, _arrow_type(c, dtype, parse_dates)) for c in header])
+    read_dtype = {c: ("object" if c in parse_dates else dtype.get(c, "object")) for c in header}
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for chunk in pd.read_csv(path, dtype=read_dtype, chunksize=CONVERT_ROWS):
+            for c in parse_dates:
+                if c in chunk.columns:
+                    chunk[c] = dates.parse_dates(chunk[c])
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    os.replace(tmp, out)
+
+
+def cached_path(path, dtype=None, parse_dates=(), streamed=False):
+    """Path of the Parquet copy of ``path``, converting it on first use."""
+    dtype, parse_dates = dict(dtype or {}), list(parse_dates)
+    index = _load_index()
+    spec = json.dumps({"version": CACHE_VERSION, "dtype": {k: str(v) for k, v in sorted(dtype.items())},
+                       "parse_dates": sorted(parse_dates), "streamed": streamed})
+    key = hashlib.blake2b(
+        f"{os.path.abspath(path)}|{file_hash(path, index)}|{spec}".encode(), digest_size=16).hexdigest()
+    fname = f"{os.path.splitext(os.path.basename(path))[0]}-{key}.parquet"
+    out = os.path.join(CACHE_DIR, fname)
+
+    if not os.path.exists(out):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _convert(path, out, dtype, parse_dates, streamed)
+    # Files are written atomically under a content-derived name, so one
+    # that exists without an index entry (lost to a concurrent writer) is valid
+    entry = index["entries"].setdefault(key, {"file": fname, "source": os.path.abspath(path)})
+    entry["bytes"] = os.path.getsize(out)
+    entry["last_used"] = time.time()
+    _evict(index, keep=key)
+    _save_index(index)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════════════
+def _project(available, columns):
+    return list(available) if columns is None else [c for c in columns if c in available]
+
+
+def cached_columns(path, dtype=None, parse_dates=(), use_cache=True):
+    """Column names of a CSV (from the Parquet schema when cached)."""
+    if use_cache and enabled():
+        return pq.read_schema(cached_path(path, dtype, parse_dates)).names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_cached(path, columns=None, dtype=None, parse_dates=(), use_cache=True):
+    """``pd.read_csv`` equivalent served from the columnar cache.
+
+    ``columns`` that do not exist in the file are silently skipped, so
+    callers can ask for a superset (as the country loaders do).
+    """
+    if use_cache and enabled():
+        src = cached_path(path, dtype, parse_dates)
+        return pd.read_parquet(src, columns=_project(pq.read_schema(src).names, columns))
+    cols = _project(pd.read_csv(path, nrows=0).columns, columns)
+    df = pd.read_csv(path, usecols=cols, dtype=dict(dtype or {}), low_memory=False)
+    for c in parse_dates:
+        if c in df.columns:
+            df[c] = dates.parse_dates(df[c])
+    return df
+
+
+def iter_cached(path, columns, chunksize, dtype=None, parse_dates=(), use_cache=True):
+    """Yield ``columns`` of a CSV in bounded chunks (Parquet row batches when cached)."""
+    if use_cache and enabled():
+        pf = pq.ParquetFile(cached_path(path, dtype, parse_dates, streamed=True))
+        cols = _project(pf.schema_arrow.names, columns)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=cols):
+            yield batch.to_pandas()
+        return
+    cols = _project(pd.read_csv(path, nrows=0).columns, columns)
+    usable = {c: v for c, v in (dtype or {}).items() if c in cols}
+    for chunk in pd.read_csv(path, usecols=cols, dtype=usable, chunksize=chunksize):
+        for c in parse_dates:
+            if c in chunk.columns:
+                chunk[c] = dates.parse_dates(chunk[c])
+        yield chunk
@@ -0,0 +1,348 @@
+"""
+Capacity Cube
+=============
+Plant capacity pre-aggregated over every analysis dimension:
+
+  country × energy_source_level_2 × energy_source_level_3 × technology × year
+
+Each occupied cell holds the plant count and the sum, M2 (sum of squared
+deviations from the cell mean), min and max of ``electrical_capacity``, so
+any roll-up or slice — and the report sections 4a–4h — is answered from
+the cells alone, without another pass over the plants.  M2 combines
+exactly across cells (Chan et al.), so standard deviations of any slice
+are as accurate as a two-pass computation over the rows.
+
+Sums are kept in two parts: ``sum`` holds every value rounded to a
+multiple of 2⁻²⁰ — such sums are exact in float64 up to 2³³ MW, in any
+order — and ``sum_lo`` the tiny remainders.  Roll-ups therefore do not
+depend on how the plants were grouped into cells or chunks, and totals
+that sit on a rounding boundary (…5 at the report's 2 decimals) round the
+same way as pandas' compensated group sums.
+
+The cube is sparse: one row of dimension codes per occupied cell plus one
+array per measure; labels are kept per dimension.  Plants without a year
+are in ``year`` cell ``NO_YEAR``.  It is saved as capacity_cube.npz by
+the analyze command and queried with ``python -m sustainable_energy cube``.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+from .clean import capacity_float64
+
+DIMS = ["country", "energy_source_level_2", "energy_source_level_3", "technology", "year"]
+MEASURES = ["count", "sum", "sum_lo", "m2", "min", "max"]
+SPLIT = 2.0 ** 20       # sum / sum_lo split — see the module docstring
+DENSE_KEYS = 1 << 20    # key spaces up to this size are reduced without sorting
+ALIASES = {"source": "energy_source_level_2", "source3": "energy_source_level_3", "tech": "technology"}
+NO_YEAR = -1
+UNKNOWN = "Unknown"     # label of missing text values, as step 2b fills them
+
+# Bump whenever the saved layout changes
+CUBE_VERSION = 1
+
+
+def dim_name(name):
+    """Full dimension name for a short alias (``source`` → ``energy_source_level_2``)."""
+    name = ALIASES.get(name, name)
+    if name not in DIMS:
+        raise ValueError(f"unknown cube dimension {name!r} (one of {', '.join([*DIMS, *ALIASES])})")
+    return name
+
+
+def parse_where(items):
+    """``["source=Solar", "year=2010:2020", "country=France,Denmark"]`` → a ``where`` dict."""
+    where = {}
+    for item in items or ():
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--where needs DIM=VALUE, got {item!r}")
+        d = dim_name(name.strip())
+        if d == "year":
+            lo, colon, hi = value.partition(":")
+            where[d] = range(int(lo), int(hi) + 1) if colon else [int(v) for v in value.split(",")]
+        else:
+            where[d] = [v.strip() for v in value.split(",")]
+    return where
+
+
+def _plain(v):
+    return v.item() if hasattr(v, "item") else v
+
+
+def _factorize(values, dim):
+    """``(codes, labels)`` of one dimension column; missing values get ``NO_YEAR`` / ``UNKNOWN``."""
+    if dim == "year":
+        years = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        values = np.where(np.isnan(years), NO_YEAR, years).astype(np.int64)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Compact frame: reuse the category codes, keeping only the categories in use
+        codes = values.cat.codes.to_numpy(dtype=np.int64)
+        used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)))
+        remap = np.full(len(values.cat.categories), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        codes = np.where(codes >= 0, remap[codes], -1)
+        uniques = values.cat.categories[used]
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+    labels = [_plain(u) for u in np.asarray(uniques, dtype=object)]
+    if (codes < 0).any():
+        if UNKNOWN not in labels:
+            labels.append(UNKNOWN)
+        codes = np.where(codes < 0, labels.index(UNKNOWN), codes)
+    return codes, labels
+
+
+def _reduce(key, m):
+    """Merge rows with equal ``key`` — raw plants or cells — into one cell each.
+
+    Returns the distinct keys (sorted) and their merged measures.  Small
+    key spaces are reduced with bincount (no sort), others by sorting.
+    """
+    size = int(key.max()) + 1 if len(key) else 0
+    if size <= max(4 * len(key), DENSE_KEYS):
+        return _reduce_dense(key, m, size)
+    order = np.argsort(key)
+    key = key[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+    if not len(starts):
+        return key, {k: np.zeros(0) for k in MEASURES}
+    m = {k: v[order] for k, v in m.items()}
+    count = np.add.reduceat(m["count"], starts)
+    hi, lo = np.add.reduceat(m["sum"], starts), np.add.reduceat(m["sum_lo"], starts)
+    # Chan et al.: M2 of a union = Σ M2 + Σ n·(mean_i − mean)²
+    mean = np.repeat((hi + lo) / count, np.diff(np.append(starts, len(key))))
+    dev = (m["sum"] + m["sum_lo"]) / m["count"] - mean
+    return key[starts], {
+        "count": count, "sum": hi, "sum_lo": lo,
+        "m2": np.add.reduceat(m["m2"] + m["count"] * dev ** 2, starts),
+        "min": np.minimum.reduceat(m["min"], starts),
+        "max": np.maximum.reduceat(m["max"], starts),
+    }
+
+
+def _reduce_dense(key, m, size):
+    count = np.bincount(key, m["count"], size)
+    used = np.flatnonzero(count)
+    hi, lo = np.bincount(key, m["sum"], size), np.bincount(key, m["sum_lo"], size)
+    dev = (m["sum"] + m["sum_lo"]) / m["count"] - ((hi + lo)[key] / count[key])
+    lowest, highest = np.full(size, np.inf), np.full(size, -np.inf)
+    np.minimum.at(lowest, key, m["min"])
+    np.maximum.at(highest, key, m["max"])
+    return used, {
+        "count": count[used], "sum": hi[used], "sum_lo": lo[used],
+        "m2": np.bincount(key, m["m2"] + m["count"] * dev ** 2, size)[used],
+        "min": lowest[used], "max": highest[used],
+    }
+
+
+def _combine(codes, shape, m):
+    """:func:`_reduce` of rows given as dimension codes (n × k); returns ``(cells, measures)``."""
+    if not codes.shape[1]:
+        key, out = _reduce(np.zeros(len(codes), dtype=np.int64), m)
+        return np.zeros((len(key), 0), dtype=np.int64), out
+    key, out = _reduce(np.ravel_multi_index(tuple(codes.T), shape), m)
+    return np.stack(np.unravel_index(key, shape), axis=1), out
+
+
+class CapacityCube:
+    """Sparse capacity cube over :data:`DIMS`; see the module docstring."""
+
+    def __init__(self, labels, cells, measures, dims=DIMS):
+        self.dims = list(dims)
+        self.labels = {d: list(labels[d]) for d in self.dims}
+        self.cells = np.asarray(cells, dtype=np.int64).reshape(-1, len(self.dims))
+        self.m = {k: np.asarray(measures[k], dtype="float64") for k in MEASURES}
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def shape(self):
+        return tuple(max(len(self.labels[d]), 1) for d in self.dims)
+
+    @classmethod
+    def empty(cls):
+        return cls({d: [] for d in DIMS}, np.zeros((0, len(DIMS))), {k: [] for k in MEASURES})
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cube of a cleaned plant frame (compact or not) with every :data:`DIMS` column."""
+        cap = df["electrical_capacity"]
+        x = (capacity_float64(cap) if cap.dtype == "float32" else cap).to_numpy(dtype="float64")
+        labels, key = {}, np.zeros(len(df), dtype=np.int64)
+        for d in DIMS:
+            codes, labels[d] = _factorize(df[d], d)
+            key = key * max(len(labels[d]), 1) + codes      # row-major, as np.ravel_multi_index
+        ok = ~np.isnan(x)
+        x, key = x[ok], key[ok]
+        hi = np.round(x * SPLIT) / SPLIT
+        raw = {"count": np.ones(len(x)), "sum": hi, "sum_lo": x - hi, "m2": np.zeros(len(x)),
+               "min": x, "max": x}
+        cube = cls(labels, np.zeros((0, len(DIMS))), {k: [] for k in MEASURES})
+        key, cube.m = _reduce(key, raw)
+        cube.cells = np.stack(np.unravel_index(key, cube.shape), axis=1)
+        return cube
+
+    # --- combining ------------------------------------------------
+    def _relabel(self, labels):
+        """Cells recoded onto ``labels`` (a superset of this cube's labels per dimension)."""
+        cols = []
+        for j, d in enumerate(self.dims):
+            pos = {label: i for i, label in enumerate(labels[d])}
+            lookup = np.array([pos[label] for label in self.labels[d]], dtype=np.int64)
+            cols.append(lookup[self.cells[:, j]] if len(lookup) else self.cells[:, j])
+        return np.stack(cols, axis=1) if cols else self.cells
+
+    def merge(self, other):
+        """A new cube holding the cells of both (labels are unioned and sorted)."""
+        labels = {d: sorted(set(self.labels[d]) | set(other.labels[d])) for d in self.dims}
+        merged = CapacityCube(labels, np.zeros((0, len(self.dims))), {k: [] for k in MEASURES}, self.dims)
+        codes = np.concatenate([self._relabel(labels), other._relabel(labels)])
+        m = {k: np.concatenate([self.m[k], other.m[k]]) for k in MEASURES}
+        merged.cells, merged.m = _combine(codes, merged.shape, m)
+        return merged
+
+    def fill_years(self, years):
+        """A new cube with each country's ``NO_YEAR`` cells moved to ``years[country]`` (step 2e)."""
+        if "year" not in self.dims or NO_YEAR not in self.labels["year"]:
+            return self
+        labels = dict(self.labels)
+        labels["year"] = sorted(set(labels["year"]) | {int(y) for y in years.values() if y is not None})
+        cells = self._relabel(labels)
+        jy, jc = self.dims.index("year"), self.dims.index("country")
+        no_year = labels["year"].index(NO_YEAR)
+        target = np.array([labels["year"].index(int(years[c])) if years.get(c) is not None else no_year
+                           for c in labels["country"]], dtype=np.int64)
+        moved = cells[:, jy] == no_year
+        cells[moved, jy] = target[cells[moved, jc]]
+        filled = CapacityCube(labels, np.zeros((0, len(self.dims))), {k: [] for k in MEASURES}, self.dims)
+        filled.cells, filled.m = _combine(cells, filled.shape, self.m)
+        return filled
+
+    # --- queries ----------------------------------------------------
+    def _mask(self, where):
+        keep = np.ones(len(self.cells), dtype=bool)
+        for name, values in (where or {}).items():
+            d = dim_name(name)
+            values = {values} if isinstance(values, (str, int, np.integer)) else set(values)
+            codes = [i for i, label in enumerate(self.labels[d]) if label in values]
+            keep &= np.isin(self.cells[:, self.dims.index(d)], codes)
+        return keep
+
+    def slice(self, where):
+        """A sub-cube of the cells matching ``where`` (dimension → label or list of labels)."""
+        keep = self._mask(where)
+        return CapacityCube(self.labels, self.cells[keep], {k: v[keep] for k, v in self.m.items()}, self.dims)
+
+    def rollup(self, by=(), where=None):
+        """Measures summed over every dimension not in ``by``, for the cells matching ``where``.
+
+        Returns a DataFrame indexed by the ``by`` labels (sorted) with
+        ``count``, ``sum``, ``mean``, ``std``, ``min`` and ``max`` columns;
+        ``by=()`` gives one ``"total"`` row for the whole (sliced) cube.
+        """
+        by = [dim_name(d) for d in ([by] if isinstance(by, str) else by)]
+        keep = self._mask(where)
+        cols = [self.dims.index(d) for d in by]
+        cells, m = _combine(self.cells[keep][:, cols], tuple(self.shape[j] for j in cols),
+                            {k: v[keep] for k, v in self.m.items()})
+        if by:
+            index = pd.MultiIndex.from_arrays(
+                [np.array(self.labels[d], dtype=object)[cells[:, i]] if len(cells) else []
+                 for i, d in enumerate(by)], names=by)
+            if len(by) == 1:
+                index = index.get_level_values(0)
+        else:
+            index = pd.Index(["total"] * len(cells))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = pd.DataFrame({
+                "count": m["count"].astype(np.int64),
+                "sum": m["sum"] + m["sum_lo"],
+                "mean": (m["sum"] + m["sum_lo"]) / m["count"],
+                "std": np.sqrt(m["m2"] / (m["count"] - 1)),
+                "min": m["min"],
+                "max": m["max"],
+            }, index=index)
+        return out.sort_index()
+
+    def total(self, where=None):
+        """``rollup(by=())`` as one Series (count 0 when nothing matches)."""
+        r = self.rollup((), where)
+        if len(r):
+            return r.iloc[0]
+        return pd.Series({"count": 0, "sum": 0.0, "mean": np.nan, "std": np.nan, "min": np.nan, "max": np.nan})
+
+    # --- report -----------------------------------------------------
+    def report(self, quantiles):
+        """Report sections 4a–4h as cube queries.
+
+        ``quantiles`` holds the capacity ``"25%"``, ``"50%"`` and ``"75%"``
+        — order statistics are the one thing cells cannot merge, so they come
+        from the frame or the streaming sketch.
+        """
+        report = {}
+        t = self.total()
+        stats = {"count": t["count"], "mean": t["mean"], "std": t["std"], "min": t["min"],
+                 **{q: quantiles[q] for q in ("25%", "50%", "75%")}, "max": t["max"]}
+        report["basic_statistics"] = {"electrical_capacity": {k: float(np.round(v, 4)) for k, v in stats.items()}}
+
+        country = self.rollup("country")
+        source = self.rollup("energy_source_level_2")
+        report["plants_per_country"] = country["count"].sort_values(ascending=False, kind="stable").to_dict()
+        report["total_capacity_by_source_MW"] = source["sum"].round(2).sort_values(ascending=False).to_dict()
+        report["total_capacity_by_country_MW"] = country["sum"].round(2).sort_values(ascending=False).to_dict()
+        report["plants_by_technology_top10"] = (
+            self.rollup("technology")["count"].sort_values(ascending=False, kind="stable").head(10).to_dict())
+        report["avg_capacity_by_source_MW"] = source["mean"].round(4).to_dict()
+
+        yearly = self.rollup("year", where={"year": range(1990, 2021)})
+        report["yearly_commissioning"] = {
+            "years": yearly.index.astype(int).tolist(),
+            "plant_count": yearly["count"].astype(int).tolist(),
+            "total_MW": yearly["sum"].round(2).tolist(),
+        }
+
+        cross = (self.rollup(["energy_source_level_2", "country"])["sum"]
+                 .unstack(fill_value=0).sort_index().sort_index(axis=1).round(2).fillna(0))
+        report["source_country_matrix"] = {
+            "sources": cross.index.tolist(),
+            "countries": cross.columns.tolist(),
+            "data": cross.values.tolist(),
+        }
+        return report
+
+    # --- persistence ------------------------------------------------
+    def to_dict(self):
+        return {"dims": self.dims, "labels": self.labels, "cells": self.cells.tolist(),
+                **{k: v.tolist() for k, v in self.m.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["labels"], d["cells"], {k: d[k] for k in MEASURES}, d["dims"])
+
+    def save(self, path):
+        meta = {"version": CUBE_VERSION, "dims": self.dims, "labels": self.labels}
+        code_type = np.int16 if max(self.shape, default=0) < 2 ** 15 else np.int32
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), cells=self.cells.astype(code_type),
+                     **{k: v for k, v in self.m.items()})
+
+    @classmethod
+    def load(cls, path):
+        """The saved cube (``ValueError`` if it was written by another cube version)."""
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("version") != CUBE_VERSION:
+                raise ValueError(f"{path} was written by another version — rerun analyze")
+            return cls(meta["labels"], z["cells"], {k: z[k] for k in MEASURES}, meta["dims"])
+
+
+def print_rollup(table, log=print):
+    """Log a :meth:`CapacityCube.rollup` result, one line per group."""
+    names = [" / ".join(map(str, k)) if isinstance(k, tuple) else str(k) for k in table.index]
+    width = max(map(len, names), default=0)
+    for name, (_, r) in zip(names, table.iterrows()):
+        log(f"   {name:<{width}} {int(r['count']):>10,} plants {r['sum']:>14,.2f} MW  "
+            f"mean {r['mean']:.4f}  max {r['max']:,.2f}")
@@ -0,0 +1,111 @@
+"""
+Multi-Format Date Parsing
+=========================
+``pd.to_datetime(errors="coerce")`` infers one format from the first value
+and falls back to slow per-value parsing (or NaT) on mixed input.  Dates
+here come in the five formats of generate_dataset.py, so instead:
+
+  1. every distinct string is parsed once (``pd.factorize``), and strings
+     seen in earlier calls come from a process-wide cache — chunks of one
+     file repeat the same few thousand days
+  2. each new string is classified by a vectorised regex per format
+  3. each format group is parsed in one ``pd.to_datetime(format=…)`` pass
+
+``parse_dates`` also counts rows per format, plus blanks (NaN, empty or
+whitespace-only strings) and unparseable values (no format matched, or an
+impossible date such as 2020-13-45).
+"""
+
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# strftime format → pattern of the whole value (ISO may carry a time of day)
+FORMATS = {
+    "%Y-%m-%d": r"\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?",
+    "%d/%m/%Y": r"\d{1,2}/\d{1,2}/\d{4}",
+    "%m-%d-%Y": r"\d{1,2}-\d{1,2}-\d{4}",
+    "%d-%b-%Y": r"\d{1,2}-[A-Za-z]{3}-\d{4}",
+    "%Y/%m/%d": r"\d{4}/\d{1,2}/\d{1,2}",
+}
+PARSE_AS = {"%Y-%m-%d": "ISO8601"}     # with or without the time
+BLANK, UNPARSEABLE = "blank", "unparseable"
+LABELS = [*FORMATS, UNPARSEABLE, BLANK]
+
+CACHE_MAX = 1_000_000       # distinct strings remembered before the cache is reset
+_NAT = np.iinfo(np.int64).min
+_cache = {}                 # string → (label index, datetime64[ns] as int64)
+
+
+def _parse_new(strings):
+    """``(label index, int64 ns)`` arrays for strings not in the cache."""
+    s = pd.Series(strings, dtype=object).str.strip()
+    label = np.full(len(s), len(FORMATS))
+    ns = np.full(len(s), _NAT, dtype=np.int64)
+    todo = np.ones(len(s), dtype=bool)
+    for i, (fmt, pattern) in enumerate(FORMATS.items()):
+        hit = todo & s.str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool)
+        if not hit.any():
+            continue
+        todo &= ~hit
+        parsed = pd.to_datetime(s[hit], format=PARSE_AS.get(fmt, fmt), errors="coerce")
+        ns[hit] = parsed.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        label[hit] = i
+    # Matched a pattern but not a real date
+    label[ns == _NAT] = len(FORMATS)
+    # Empty or whitespace-only strings are missing values, like NaN
+    label[(s == "").to_numpy(dtype=bool)] = LABELS.index(BLANK)
+    return label, ns
+
+
+def parse_dates(values, counts=None):
+    """Parse a column of mixed-format date strings to ``datetime64[ns]`` (NaT where unparseable).
+
+    ``counts`` (a dict / Counter) is incremented per format, ``"blank"``
+    and ``"unparseable"``.  Columns that are already datetimes pass through.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    codes, uniques = pd.factorize(s)
+    uniques = np.array([u if isinstance(u, str) else str(u) for u in uniques], dtype=object)
+
+    label = np.empty(len(uniques), dtype=np.int64)
+    ns = np.empty(len(uniques), dtype=np.int64)
+    hits = [_cache.get(u) for u in uniques]
+    new = np.array([h is None for h in hits], dtype=bool)
+    if (~new).any():
+        label[~new], ns[~new] = zip(*(h for h in hits if h is not None))
+    if new.any():
+        label[new], ns[new] = _parse_new(uniques[new])
+        if len(_cache) + new.sum() > CACHE_MAX:
+            _cache.clear()
+        _cache.update(zip(uniques[new].tolist(), zip(label[new].tolist(), ns[new].tolist())))
+
+    valid = codes >= 0
+    out = np.full(len(s), _NAT, dtype=np.int64)
+    out[valid] = ns[codes[valid]]
+    if counts is not None:
+        n = np.bincount(label[codes[valid]], minlength=len(LABELS))
+        for name, k in zip(LABELS, n.tolist()):
+            if k:
+                counts[name] = counts.get(name, 0) + k
+        if (~valid).any():
+            counts[BLANK] = counts.get(BLANK, 0) + int((~valid).sum())
+    return pd.Series(out.view("datetime64[ns]"), index=s.index, name=s.name)
+
+
+def clear_cache():
+    """Forget every parsed string (the next calls parse from scratch)."""
+    _cache.clear()
+
+
+def format_summary(counts):
+    """One line of per-format counts, e.g. ``%Y-%m-%d 9,120 · %d/%m/%Y 310 · blank 47``."""
+    order = [*FORMATS, BLANK, UNPARSEABLE]
+    return " · ".join(f"{name} {counts[name]:,}" for name in order if counts.get(name))
+
+
+def merge_counts(*counts):
+    """Sum several per-format count dicts."""
+    return dict(sum((Counter(c) for c in counts), Counter()))
@@ -0,0 +1,192 @@
+"""
+Fit Cache
+=========
+Persistent per-series cache of :func:`poly_fit.forecast_series` results,
+so a rerun only refits the series whose data changed.
+
+An entry is looked up by series name within a *scope* — a hash of the
+model family, degree set, degree penalty, minimum points and forecast
+grid (so ``PREDICT_TO`` and the resolution) — and is a hit only when the
+hash of the series' observed ``(x, value)`` pairs matches too.  It holds
+the fit (centre, scale, per-degree coefficients and R²) and the clamped
+forecast on the grid.  A refit series overwrites its own entry, so stale
+entries never pile up; beyond ``MAX_ENTRIES`` the least recently used are
+evicted.  The cache lives in .opsd_cache/ (dropped by ``--rebuild-cache``).
+"""
+
+import os, json, time, hashlib, sqlite3
+import numpy as np
+
+from .paths import FIT_CACHE
+from .poly_fit import DEGREES, DEGREE_PENALTY, PolyFit, forecast_series, last_observed
+
+FAMILY = "poly"
+# Bump when fitting or the entry layout changes — invalidates every entry
+CACHE_VERSION = 1
+MAX_ENTRIES = 200_000
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fits (
+    scope TEXT NOT NULL,
+    series TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    entry BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (scope, series)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fits_used ON fits(last_used);
+"""
+
+
+def data_hashes(x, Y, M):
+    """Hash of each series' observed ``(x, value)`` pairs.
+
+    Unobserved cells are blanked to NaN, so one contiguous row per series
+    is hashed, keyed by the digest of the shared ``x`` axis.
+    """
+    x = np.asarray(x, dtype="float64")
+    if x.ndim > 1:
+        return [data_hashes(xi, yi[None], mi[None])[0] for xi, yi, mi in zip(x, Y, M)]
+    key = hashlib.blake2b(x.tobytes(), digest_size=32).digest()
+    rows = np.ascontiguousarray(np.where(M, Y, np.nan), dtype="float64")
+    return [hashlib.blake2b(r.tobytes(), digest_size=16, key=key).hexdigest() for r in rows]
+
+
+def _chunks(items, n=500):
+    """Slices of at most ``n`` items (SQLite caps the parameters of one statement)."""
+    return [items[i:i + n] for i in range(0, len(items), n)]
+
+
+def _marks(items):
+    return ",".join("?" * len(items))
+
+
+class FitCache:
+    """SQLite-backed fit cache; counts hits and misses of its lookups."""
+
+    def __init__(self, path=FIT_CACHE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS fits")
+            self.db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.db.executescript(SCHEMA)
+        self.hits = self.misses = 0
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+
+    @staticmethod
+    def scope(degrees, penalty, min_points, grid):
+        """Hash of everything besides the data that a fit depends on."""
+        cfg = json.dumps({"family": FAMILY, "degrees": list(degrees), "penalty": penalty,
+                          "min_points": min_points})
+        return hashlib.blake2b(cfg.encode() + np.asarray(grid, dtype="float64").tobytes(),
+                               digest_size=16).hexdigest()
+
+    def get(self, scope, series, hashes, width):
+        """``(hit, entries)`` — a bool per series and a ``(len(series), width)`` float64 array
+        whose rows are the cached entries of the hits (missing or stale entries are misses)."""
+        found = {}
+        for part in _chunks(series):
+            found.update((s, (h, e)) for s, h, e in self.db.execute(
+                f"SELECT series, data_hash, entry FROM fits WHERE scope = ? AND series IN ({_marks(part)})",
+                [scope, *part]))
+        hit = np.array([found.get(s, (None,))[0] == h for s, h in zip(series, hashes)], dtype=bool)
+        entries = np.empty((len(series), width))
+        if hit.any():
+            blobs = [found[s][1] for s, ok in zip(series, hit) if ok]
+            entries[hit] = np.frombuffer(b"".join(blobs), dtype="float64").reshape(len(blobs), width)
+            now = time.time()
+            for part in _chunks([s for s, ok in zip(series, hit) if ok]):
+                self.db.execute(f"UPDATE fits SET last_used = ? WHERE scope = ? AND series IN ({_marks(part)})",
+                                [now, scope, *part])
+        self.hits += int(hit.sum())
+        self.misses += int((~hit).sum())
+        return hit, entries
+
+    def put(self, scope, series, hashes, entries):
+        now = time.time()
+        self.db.executemany("INSERT OR REPLACE INTO fits VALUES (?,?,?,?,?)",
+                            [(scope, s, h, np.asarray(e, dtype="float64").tobytes(), now)
+                             for s, h, e in zip(series, hashes, entries)])
+        self.db.commit()
+
+    def evict(self, max_entries=MAX_ENTRIES):
+        """Drop the least recently used entries beyond ``max_entries``."""
+        excess = len(self) - max_entries
+        if excess > 0:
+            self.db.execute("DELETE FROM fits WHERE (scope, series) IN "
+                            "(SELECT scope, series FROM fits ORDER BY last_used LIMIT ?)", (excess,))
+
+    def summary(self):
+        total = self.hits + self.misses
+        return f"{self.hits} hits, {self.misses} misses ({self.hits / max(total, 1):.0%} reused)"
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHED FORECASTS
+# ═══════════════════════════════════════════════════════════════
+def _pack(fit, pred):
+    """One float64 row per series: centre, scale, n, R² (D), coefficients (D·p), forecast (G)."""
+    S = len(fit.center)
+    return np.hstack([fit.center[:, None], fit.scale[:, None], fit.n[:, None].astype("float64"), fit.r2.T,
+                      fit.coef.transpose(1, 0, 2).reshape(S, -1), pred])
+
+
+def _width(degrees, G):
+    D, p = len(degrees), max(degrees) + 1
+    return 3 + D + D * p + G
+
+
+def _unpack(rows, degrees):
+    D, p = len(degrees), max(degrees) + 1
+    S = len(rows)
+    coef = rows[:, 3 + D:3 + D + D * p].reshape(S, D, p).transpose(1, 0, 2)
+    fit = PolyFit(degrees, rows[:, 0].copy(), rows[:, 1].copy(), np.ascontiguousarray(coef),
+                  np.ascontiguousarray(rows[:, 3:3 + D].T), rows[:, 2].astype(int))
+    return fit, rows[:, 3 + D + D * p:].copy()
+
+
+def forecast_cached(cache, x, Y, predict_to, names=None, degrees=DEGREES, penalty=DEGREE_PENALTY, min_points=4,
+                    grid=None):
+    """:func:`poly_fit.forecast_series`, fitting only the series that miss ``cache``.
+
+    ``names`` identify the rows of ``Y`` across runs (default: the data
+    hash, which never goes stale but is never overwritten either).  Returns
+    the same dict as ``forecast_series``.
+    """
+    degrees = tuple(degrees)
+    x = np.asarray(x)
+    Y = np.asarray(Y, dtype="float64")
+    if grid is None:
+        grid = np.arange(int(x.min()), predict_to + 1)
+    M = np.isfinite(Y) & (Y > 0)
+    keep = M.sum(axis=1) >= min_points
+    Y, M = Y[keep], M[keep]
+    hashes = data_hashes(x if x.ndim == 1 else x[keep], Y, M)
+    series = hashes if names is None else [str(n) for n, k in zip(names, keep) if k]
+    scope = FitCache.scope(degrees, penalty, min_points, grid)
+
+    hit, entries = cache.get(scope, series, hashes, _width(degrees, len(grid)))
+    if not hit.all():
+        miss = np.flatnonzero(~hit)
+        fc = forecast_series(x if x.ndim == 1 else x[keep][miss], Y[miss], predict_to, degrees=degrees,
+                             penalty=penalty, min_points=min_points, grid=grid)
+        entries[miss] = _pack(fc["fit"], fc["pred"])
+        cache.put(scope, [series[j] for j in miss], [hashes[j] for j in miss], entries[miss])
+    fit, pred = _unpack(entries, degrees)
+
+    best, best_r2 = fit.select(penalty)
+    last_x, last_y = last_observed(x, Y, M)
+    return {
+        "keep": keep, "x": x, "Y": Y, "M": M, "fit": fit,
+        "degree": np.asarray(degrees)[best], "r2": best_r2,
+        "grid": grid, "pred": pred,
+        "first_x": np.where(M, x, np.inf).min(axis=1), "last_x": last_x, "last_y": last_y,
+    }
@@ -0,0 +1,234 @@
+"""
+Indexed Forecast Store
+======================
+Compact SQLite store for forecasts of every ``*_capacity`` column in the
+OPSD timeseries.  One ``series`` row per column and resolution (indexed by
+country, region and source) holds the model summary; the actual/predicted
+points live in a ``points`` table keyed by ``(series_id, period)``, where
+a period is ``"2020"``, ``"2020-06"`` or ``"2020-06-30"`` for yearly,
+monthly and daily forecasts.  Any country or source combination can be
+served with a query instead of a code edit or a scan of one giant JSON
+document.
+"""
+
+import sqlite3
+import numpy as np
+
+# Longest match wins, so "wind_onshore" is preferred over "wind"
+SOURCES = sorted([
+    "solar", "wind", "wind_onshore", "wind_offshore", "bioenergy", "biomass",
+    "biogas", "hydro", "run_of_river", "geothermal", "marine", "storage",
+], key=len, reverse=True)
+
+# Series shown on the dashboard (predict.py → predictions.json)
+SERIES = {
+    "DE Solar":          "DE_solar_capacity",
+    "DE Wind Onshore":   "DE_wind_onshore_capacity",
+    "DE Wind Offshore":  "DE_wind_offshore_capacity",
+    "DE Bioenergy":      "DE_bioenergy_capacity",
+    "DK Solar":          "DK_solar_capacity",
+    "DK Wind Onshore":   "DK_wind_onshore_capacity",
+    "UK Solar":          "GB-UKM_solar_capacity",
+    "UK Wind Onshore":   "GB-UKM_wind_onshore_capacity",
+    "UK Wind Offshore":  "GB-UKM_wind_offshore_capacity",
+    "CH Solar":          "CH_solar_capacity",
+    "SE Wind Onshore":   "SE_wind_onshore_capacity",
+    "FR Wind Onshore":   "FR_wind_onshore_capacity",
+    "FR Solar":          "FR_solar_capacity",
+}
+
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    region TEXT NOT NULL,
+    country TEXT NOT NULL,
+    source TEXT NOT NULL,
+    model_degree INTEGER,
+    r2_score REAL,
+    first_year INTEGER,
+    last_year INTEGER,
+    latest_actual_MW REAL,
+    predicted_2025_MW REAL,
+    predicted_2030_MW REAL,
+    growth_2020_to_2030_pct REAL,
+    fit_ms REAL,
+    UNIQUE (column_name, resolution)
+);
+CREATE INDEX IF NOT EXISTS series_country ON series(resolution, country, source);
+CREATE INDEX IF NOT EXISTS series_source ON series(resolution, source);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL REFERENCES series(id),
+    period TEXT NOT NULL,
+    actual REAL,
+    predicted REAL,
+    PRIMARY KEY (series_id, period)
+) WITHOUT ROWID;
+"""
+
+
+def capacity_columns(columns):
+    """Every ``*_capacity`` column of the timeseries, in file order."""
+    return [c for c in columns if c.endswith("_capacity")]
+
+
+def split_column(col):
+    """``"GB-UKM_wind_onshore_capacity"`` → ``("GB-UKM", "GB", "wind_onshore")``."""
+    stem = col[: -len("_capacity")] if col.endswith("_capacity") else col
+    for src in SOURCES:
+        if stem.endswith("_" + src):
+            region = stem[: -len(src) - 1]
+            break
+    else:
+        region, _, src = stem.rpartition("_")
+    return region, region.split("_")[0].split("-")[0], src
+
+
+def series_label(col):
+    region, _, src = split_column(col)
+    return f"{region} {src.replace('_', ' ').title()}"
+
+
+_DASHBOARD = {col: label for label, col in SERIES.items()}
+
+
+def display_label(col):
+    """The dashboard label where there is one ("UK Solar"), else :func:`series_label` ("GB-UKM Solar")."""
+    return _DASHBOARD.get(col) or series_label(col)
+
+
+class ForecastStore:
+    """Thin wrapper around the SQLite forecast store."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS points; DROP TABLE IF EXISTS series;")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def prune(self, resolution, columns):
+        """Drop the series (and points) of one resolution whose column is not in ``columns``."""
+        keep = set(columns)
+        gone = [(sid,) for sid, col in self.db.execute(
+            "SELECT id, column_name FROM series WHERE resolution = ?", (resolution,)) if col not in keep]
+        self.db.executemany("DELETE FROM points WHERE series_id = ?", gone)
+        self.db.executemany("DELETE FROM series WHERE id = ?", gone)
+        self.db.commit()
+
+    def _upsert_series(self, col, fc, i, periods, in_2025, fit_ms, resolution):
+        """Insert or update the summary row of series ``i`` of ``fc``; returns its id."""
+        label = display_label(col)
+        grid = fc["grid"]
+        region, country, src = split_column(col)
+        latest = round(float(fc["last_y"][i]), 2)
+        val_2030 = round(float(fc["pred"][i, -1]), 2)
+        growth = round((val_2030 - latest) / latest * 100, 1) if latest > 0 else 0
+        in_range = grid >= fc["first_x"][i]
+        last_period = periods[np.searchsorted(grid, fc["last_x"][i])]
+        row = (label, resolution, col, region, country, src, int(fc["degree"][i]),
+               round(float(fc["r2"][i]), 4), int(periods[in_range][0][:4]), int(last_period[:4]),
+               latest, round(float(fc["pred"][i, in_2025[-1]]), 2) if len(in_2025) else None,
+               val_2030, growth, fit_ms)
+        self.db.execute(
+            "INSERT INTO series (label, resolution, column_name, region, country, source, model_degree,"
+            " r2_score, first_year, last_year, latest_actual_MW, predicted_2025_MW, predicted_2030_MW,"
+            " growth_2020_to_2030_pct, fit_ms) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)"
+            " ON CONFLICT(column_name, resolution) DO UPDATE SET label=excluded.label,"
+            " model_degree=excluded.model_degree,"
+            " r2_score=excluded.r2_score, first_year=excluded.first_year, last_year=excluded.last_year,"
+            " latest_actual_MW=excluded.latest_actual_MW, predicted_2025_MW=excluded.predicted_2025_MW,"
+            " predicted_2030_MW=excluded.predicted_2030_MW,"
+            " growth_2020_to_2030_pct=excluded.growth_2020_to_2030_pct, fit_ms=excluded.fit_ms", row)
+        return self.db.execute("SELECT id FROM series WHERE column_name = ? AND resolution = ?",
+                               (col, resolution)).fetchone()[0]
+
+    def write_batch(self, cols, fc, fit_ms, periods, resolution="yearly"):
+        """Upsert one batch of :func:`poly_fit.forecast_series` results.
+
+        ``cols`` are the kept columns in the order of the ``fc`` arrays,
+        ``periods`` the period strings of ``fc["grid"]`` and ``fit_ms`` the
+        per-series (amortised) fit time.  Series are keyed by column and
+        resolution, labelled with :func:`display_label`.
+        """
+        grid = fc["grid"]
+        periods = np.asarray(periods)
+        # Last grid point of 2025 — the year itself, Dec 2025 or 31 Dec 2025
+        in_2025 = np.flatnonzero(np.array([int(p[:4]) for p in periods]) == 2025)
+        for i, col in enumerate(cols):
+            sid = self._upsert_series(col, fc, i, periods, in_2025, fit_ms, resolution)
+            in_range = grid >= fc["first_x"][i]
+            act = np.full(len(grid), np.nan)
+            obs = fc["M"][i]
+            act[np.searchsorted(grid, fc["x"][obs])] = fc["Y"][i, obs]
+            self.db.execute("DELETE FROM points WHERE series_id = ?", (sid,))
+            self.db.executemany(
+                "INSERT INTO points VALUES (?,?,?,?)",
+                [(sid, str(t), None if np.isnan(a) else round(float(a), 2), round(float(p), 2))
+                 for t, a, p in zip(periods[in_range], act[in_range], fc["pred"][i, in_range])])
+        self.db.commit()
+
+    def update_batch(self, cols, fc, fit_ms, periods, actual_periods, actual, resolution="yearly"):
+        """Refresh series whose fit changed, touching only the actuals that changed.
+
+        Like :meth:`write_batch`, but without ``fc["x"]`` / ``Y`` / ``M``:
+        every predicted point is upserted, and the actual values are written
+        for ``actual_periods`` only (``actual`` is series × those periods,
+        NaN where there is no observation).
+        """
+        grid = fc["grid"]
+        periods = np.asarray(periods)
+        in_2025 = np.flatnonzero(np.array([int(p[:4]) for p in periods]) == 2025)
+        actual_periods = [str(t) for t in actual_periods]
+        for i, col in enumerate(cols):
+            sid = self._upsert_series(col, fc, i, periods, in_2025, fit_ms, resolution)
+            in_range = grid >= fc["first_x"][i]
+            self.db.executemany(
+                "INSERT INTO points (series_id, period, predicted) VALUES (?,?,?)"
+                " ON CONFLICT(series_id, period) DO UPDATE SET predicted = excluded.predicted",
+                [(sid, str(t), round(float(p), 2)) for t, p in zip(periods[in_range], fc["pred"][i, in_range])])
+            self.db.executemany(
+                "UPDATE points SET actual = ? WHERE series_id = ? AND period = ?",
+                [(None if np.isnan(a) else round(float(a), 2), sid, t) for t, a in zip(actual_periods, actual[i])])
+        self.db.commit()
+
+    def query(self, country=None, source=None, region=None, resolution="yearly"):
+        """Forecasts matching the filters, shaped like ``predictions.json`` entries.
+
+        Yearly entries use ``*_years`` keys with integer years; monthly and
+        daily ones use ``*_periods`` keys with period strings.
+        """
+        where, params = ["resolution = ?"], [resolution]
+        for name, val in (("country", country), ("source", source), ("region", region)):
+            if val is not None:
+                where.append(f"{name} = ?")
+                params.append(val)
+        cur = self.db.execute("SELECT * FROM series WHERE " + " AND ".join(where) + " ORDER BY label", params)
+        names = [d[0] for d in cur.description]
+        key, conv = ("years", int) if resolution == "yearly" else ("periods", str)
+        out = {}
+        for row in cur.fetchall():
+            s = dict(zip(names, row))
+            pts = self.db.execute(
+                "SELECT period, actual, predicted FROM points WHERE series_id = ? ORDER BY period",
+                (s["id"],)).fetchall()
+            last = max(t for t, a, _ in pts if a is not None)
+            out[s["label"]] = {
+                f"actual_{key}": [conv(t) for t, a, _ in pts if a is not None],
+                "actual_values": [a for _, a, _ in pts if a is not None],
+                f"all_{key}": [conv(t) for t, _, _ in pts],
+                "all_predicted": [p for _, _, p in pts],
+                f"forecast_{key}": [conv(t) for t, _, _ in pts if t > last],
+                "forecast_values": [p for t, _, p in pts if t > last],
+                **{k: s[k] for k in ("model_degree", "r2_score", "latest_actual_MW", "predicted_2025_MW",
+                                     "predicted_2030_MW", "growth_2020_to_2030_pct")},
+            }
+        return out
@@ -0,0 +1,143 @@
+"""
+Loading OPSD Inputs
+===================
+Country plant files (in memory or streamed into running aggregates) and
+the capacity timeseries, rolled up to yearly / monthly / daily snapshots
+(served by the rollup store, rollups.py).  Every loader reads through the
+columnar cache (csv_cache.py).
+"""
+
+import os
+from functools import partial
+
+from .clean import clean_timeseries, concat_plants
+from .csv_cache import read_cached, cached_columns
+from .paths import DATA_DIR, TS_FILE
+from .plant_stream import CHUNK_ROWS, PlantAggregates, load_clean_country, country_partial, map_countries
+from .rollups import FREQ, open_store
+
+COUNTRY_FILES = {
+    "UK": "renewable_power_plants_UK.csv",
+    "Switzerland": "renewable_power_plants_CH.csv",
+    "Poland": "renewable_power_plants_PL.csv",
+    "Sweden": "renewable_power_plants_SE.csv",
+    "Czechia": "renewable_power_plants_CZ.csv",
+    "Denmark": "renewable_power_plants_DK.csv",
+    "France": "renewable_power_plants_FR.csv",
+    "Germany": "renewable_power_plants_DE.csv",
+}
+# Too large to hold in memory as a whole frame — only loaded when streaming
+LARGE_COUNTRIES = {"Germany"}
+
+# Common columns across all country files
+COMMON_COLS = [
+    "electrical_capacity", "energy_source_level_1",
+    "energy_source_level_2", "energy_source_level_3",
+    "technology", "commissioning_date"
+]
+
+
+# ═══════════════════════════════════════════════════════════════
+# PLANTS
+# ═══════════════════════════════════════════════════════════════
+def country_jobs(include_large=True):
+    """``(country, path)`` of every country file to load."""
+    return [(country, os.path.join(DATA_DIR, fname)) for country, fname in COUNTRY_FILES.items()
+            if include_large or country not in LARGE_COUNTRIES]
+
+
+def load_plants(workers=1, use_cache=True, log=print, metrics=None):
+    """Load and clean (steps 2a–2f) every in-memory country file.
+
+    Each country is handled on its own — in parallel with ``workers`` > 1.
+    Returns the combined compact frame and the per-country load statistics;
+    per-country timings go to ``metrics`` (a :class:`metrics.RunMetrics`).
+    """
+    for country in COUNTRY_FILES:
+        if country in LARGE_COUNTRIES:
+            log(f"   ⏭️  {country}: skipped (use --stream)")
+    work = partial(load_clean_country, cols=COMMON_COLS, use_cache=use_cache)
+    frames, load_stats, timings = [], [], {}
+    for country, result, err in map_countries(work, country_jobs(include_large=False), workers, timings):
+        if err is not None:
+            log(f"   ⚠️  {country}: {err}")
+            continue
+        frames.append(result[0])
+        load_stats.append(result[1])
+        if metrics is not None:
+            metrics.item("load", country, rows_in=result[1]["rows"], rows_out=len(result[0]), **timings[country])
+        log(f"   ✅ {country}: {result[1]['rows']} plants loaded")
+    return concat_plants(frames), load_stats
+
+
+def stream_plants(chunksize=CHUNK_ROWS, workers=1, partials_dir=None, use_cache=True, log=print,
+                  metrics=None):
+    """Stream every country file into one :class:`PlantAggregates`.
+
+    With ``partials_dir``, countries whose CSV is unchanged reuse their saved
+    partial.  Returns the merged aggregates and the ``(country, path)`` jobs
+    that loaded; per-country timings go to ``metrics``.
+    """
+    jobs = country_jobs()
+    work = partial(country_partial, cols=COMMON_COLS, partials_dir=partials_dir,
+                   chunksize=chunksize, use_cache=use_cache)
+    agg = PlantAggregates()
+    loaded, timings = [], {}
+    for (country, result, err), job in zip(map_countries(work, jobs, workers, timings), jobs):
+        if err is not None:
+            log(f"   ⚠️  {country}: {err}")
+            continue
+        part, reused = result
+        agg.merge(part)
+        loaded.append(job)
+        if metrics is not None:
+            metrics.item("load", country, rows_in=part.rows_in, rows_out=part.n, reused=reused,
+                         **timings[country])
+        if reused:
+            log(f"   ♻️  {country}: {part.rows_in} plants (unchanged, partial reused)")
+        else:
+            log(f"   ✅ {country}: {part.rows_in} plants streamed")
+    return agg, loaded
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIMESERIES
+# ═══════════════════════════════════════════════════════════════
+def timeseries_columns(use_cache=True):
+    return cached_columns(TS_FILE, parse_dates=["day"], use_cache=use_cache)
+
+
+def read_timeseries(columns=None, use_cache=True):
+    """The raw capacity timeseries (optionally only ``columns``)."""
+    cols = None if columns is None else ["day", *columns]
+    return read_cached(TS_FILE, columns=cols, parse_dates=["day"], use_cache=use_cache)
+
+
+def load_timeseries(columns=None, use_cache=True):
+    """The cleaned capacity timeseries: 2000+, sorted by day."""
+    return clean_timeseries(read_timeseries(columns, use_cache))
+
+
+def period_axis(periods, resolution):
+    """Time axis in (fractional) years for a PeriodIndex — the regression x."""
+    if resolution == "yearly":
+        return periods.year.values.astype(int)
+    if resolution == "monthly":
+        return periods.year.values + (periods.month.values - 1) / 12
+    return 1970 + (periods.start_time.values.astype("datetime64[D]").astype("int64")) / 365.25
+
+
+def load_rollup(columns, resolution="yearly", use_cache=True):
+    """Last value per year / month / day (2000+) of the given timeseries columns.
+
+    Returns the rolled-up frame indexed by period; non-yearly data keeps
+    every observation instead of one point per year.  Read from the rollup
+    store — built on first use, then memory-mapped.
+    """
+    return open_store(columns, use_cache=use_cache).frame(columns, resolution)
+
+
+def load_yearly(columns, use_cache=True):
+    """Yearly snapshots (last value per year, 2000+) of the given timeseries columns."""
+    yearly = load_rollup(columns, "yearly", use_cache)
+    return yearly.set_axis(yearly.index.year.rename("year")).reset_index()
@@ -0,0 +1,227 @@
+"""
+Run Metrics & Profiling
+=======================
+One :class:`RunMetrics` per command run records every stage (load, clean,
+preprocess, analyze, predict, charts, …):
+
+  • wall time and CPU time (own process + finished worker processes)
+  • peak RSS — the process high-water mark when the stage ends
+  • rows in / rows out and rows per second
+
+plus per-item entries (one per country file or forecast series).  Results
+go to run_metrics.json: the latest run of each command in full, and a short
+history of stage wall times to spot regressions across data refreshes.
+
+With ``profile=True`` every stage runs under cProfile; the hottest stage's
+stats are dumped to run_profile.prof (``python -m pstats``, snakeviz, …)
+and its top functions are listed in run_metrics.json.  Work done inside
+worker processes is timed but not profiled.
+"""
+
+import os, sys, json, time, platform
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from .paths import METRICS_FILE, PROFILE_FILE
+
+try:
+    import resource
+except ImportError:     # Windows — no getrusage; CPU from process_time, no RSS
+    resource = None
+
+HISTORY = 50            # past runs kept per file
+PROFILE_TOP = 15        # functions listed for the profiled stage
+LOCK_TIMEOUT = 10       # seconds before a leftover lock file is taken over
+
+
+def usage():
+    """``(own CPU s, worker CPU s, peak RSS MB)`` of this process so far."""
+    if resource is None:
+        return time.process_time(), 0.0, None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    return (own.ru_utime + own.ru_stime, kids.ru_utime + kids.ru_stime,
+            round(own.ru_maxrss / scale, 1))
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Hold ``path``.lock exclusively — pipeline stages running side by side save into one file."""
+    lock = f"{path}.lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:     # left behind by a killed process
+                try:
+                    os.remove(lock)
+                except OSError:
+                    pass
+                deadline = time.monotonic() + timeout
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock)
+
+
+def timed_call(fn, *args):
+    """``(fn(*args), timing)`` — picklable, so it also times work inside a worker process."""
+    t0, (c0, _, _) = time.perf_counter(), usage()
+    result = fn(*args)
+    (c1, _, rss) = usage()
+    return result, {"wall_s": round(time.perf_counter() - t0, 4), "cpu_s": round(c1 - c0, 4),
+                    "peak_rss_mb": rss}
+
+
+def _rate(rows, seconds):
+    return round(rows / seconds, 1) if rows and seconds > 0 else None
+
+
+class Stage:
+    """One timed pass through :meth:`RunMetrics.stage`; set ``rows_out`` inside the block."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_s = self.cpu_s = 0.0
+
+
+class RunMetrics:
+    """Stage and item metrics for one run of ``command``; see the module docstring."""
+
+    def __init__(self, command, profile=False, path=METRICS_FILE):
+        self.command = command
+        self.path = path
+        self.profile = profile
+        self.started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.t0, (self.cpu0, self.kids0, _) = time.perf_counter(), usage()
+        self.stages = {}        # name → accumulated record (stages may repeat, e.g. per batch)
+        self.items = {}         # stage → [per-country / per-series records]
+        self.profiles = {}      # stage → pstats.Stats
+        self.info = {}
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the enclosed block as stage ``name``; repeated stages accumulate."""
+        st = Stage(name, rows_in)
+        prof = None
+        if self.profile:
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+        t0, (c0, k0, _) = time.perf_counter(), usage()
+        try:
+            yield st
+        finally:
+            if prof is not None:
+                prof.disable()
+            (c1, k1, rss) = usage()
+            st.wall_s, st.cpu_s = time.perf_counter() - t0, c1 - c0
+            rec = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                                "worker_cpu_s": 0.0, "rows_in": None, "rows_out": None})
+            rec["calls"] += 1
+            rec["wall_s"] += st.wall_s
+            rec["cpu_s"] += st.cpu_s
+            rec["worker_cpu_s"] += k1 - k0
+            rec["peak_rss_mb"] = rss
+            for key in ("rows_in", "rows_out"):
+                if getattr(st, key) is not None:
+                    rec[key] = (rec[key] or 0) + int(getattr(st, key))
+            if prof is not None:
+                self._add_profile(name, prof)
+
+    def _add_profile(self, name, prof):
+        import pstats
+        if name in self.profiles:
+            self.profiles[name].add(prof)
+        else:
+            self.profiles[name] = pstats.Stats(prof)
+
+    def item(self, stage, name, rows_in=None, rows_out=None, **fields):
+        """Record one country file / series of ``stage`` (timing fields from :func:`timed_call`)."""
+        rec = {"name": name, "rows_in": rows_in, "rows_out": rows_out, **fields}
+        if "wall_s" in fields:
+            rec["rows_per_s"] = _rate(rows_out if rows_out is not None else rows_in, fields["wall_s"])
+        self.items.setdefault(stage, []).append(rec)
+
+    def to_dict(self):
+        cpu, kids, rss = usage()
+        stages = {}
+        for name, rec in self.stages.items():
+            rows = rec["rows_out"] if rec["rows_out"] is not None else rec["rows_in"]
+            stages[name] = {**{k: round(v, 4) if isinstance(v, float) else v for k, v in rec.items()},
+                            "rows_per_s": _rate(rows, rec["wall_s"])}
+        return {
+            "command": self.command,
+            "started": self.started,
+            "wall_s": round(time.perf_counter() - self.t0, 4),
+            "cpu_s": round(cpu - self.cpu0, 4),
+            "worker_cpu_s": round(kids - self.kids0, 4),
+            "peak_rss_mb": rss,
+            "python": platform.python_version(),
+            **self.info,
+            "stages": stages,
+            "items": self.items,
+        }
+
+    def hottest(self):
+        """Name of the stage with the most wall time (None before any stage ran)."""
+        return max(self.stages, key=lambda s: self.stages[s]["wall_s"], default=None)
+
+    def _dump_profile(self, path):
+        """Write the hottest profiled stage to ``path``; returns its summary."""
+        import pstats
+        name = self.hottest()
+        if name not in self.profiles:
+            return None
+        stats = self.profiles[name]
+        stats.dump_stats(path)
+        stats.sort_stats("cumulative")
+        top = []
+        for func in stats.fcn_list[:PROFILE_TOP]:
+            cc, nc, tt, ct, _ = stats.stats[func]
+            top.append({"function": pstats.func_std_string(func), "ncalls": nc,
+                        "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)})
+        return {"stage": name, "file": os.path.basename(path), "top": top}
+
+    def save(self, log=print, profile_path=PROFILE_FILE):
+        """Write this run into run_metrics.json (and the profile dump, if profiling)."""
+        run = self.to_dict()
+        if self.profile:
+            run["profile"] = self._dump_profile(profile_path)
+        with file_lock(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                saved = {}
+            saved.setdefault("latest", {})[self.command] = run
+            history = saved.get("history", []) + [{
+                "command": self.command, "started": run["started"], "wall_s": run["wall_s"],
+                "peak_rss_mb": run["peak_rss_mb"],
+                "stages": {name: s["wall_s"] for name, s in run["stages"].items()},
+            }]
+            saved["history"] = history[-HISTORY:]
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(saved, f, indent=2, default=str)
+            os.replace(tmp, self.path)
+
+        rss = f", peak RSS {run['peak_rss_mb']:,.0f} MB" if run["peak_rss_mb"] else ""
+        log(f"\n⏱️  {self.command}: {run['wall_s']:.2f}s wall, "
+            f"{run['cpu_s'] + run['worker_cpu_s']:.2f}s CPU{rss}")
+        width = max(map(len, run["stages"]), default=0)
+        for name, s in run["stages"].items():
+            rate = f", {s['rows_per_s']:,.0f} rows/s" if s["rows_per_s"] else ""
+            log(f"   {name:<{width}} {s['wall_s']:8.3f}s wall {s['cpu_s']:8.3f}s CPU{rate}")
+        if run.get("profile"):
+            log(f"   🔬 hottest stage '{run['profile']['stage']}' profiled → {run['profile']['file']}")
+        log(f"   Run metrics saved → {self.path}")
+        return run
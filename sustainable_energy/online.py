@@ -0,0 +1,296 @@
+"""
+Online Forecast Updates
+=======================
+``python -m sustainable_energy update`` folds the rows appended to
+renewable_capacity_timeseries.csv into the forecast store without a batch
+rerun:
+
+  1. only the CSV bytes after the last rolled-up row are parsed, and their
+     periods are written into the rollup arrays in place — the last day /
+     month / year is updated, later ones appended (rollups.append)
+  2. every series' fit is kept as running sums of its observations
+     (poly_fit.PolyMoments): the periods an update touched are taken out
+     with their old values and put back with the new ones, and the
+     degree-1 / degree-2 models are re-solved from the sums
+  3. only series whose observations changed are rewritten in
+     predictions_store.sqlite, and of their actual points only the
+     touched periods
+
+An update thus costs O(new rows) for the rollups and fits, plus the
+forecast grid of each series it changed.  The sums are saved per
+resolution in .opsd_cache/online/ and rebuilt from the rollups (one batch
+pass, writing every series like ``predict --all-series``) when missing or
+when the rollup store was rebuilt.  ``--every`` polls the CSV and updates
+whenever it grew.  predictions.json, with its bootstrap bands, still comes
+from ``predict``.
+"""
+
+import os, time
+import numpy as np
+import pandas as pd
+
+from . import rollups
+from .csv_cache import source_hash
+from .forecast_store import SERIES, ForecastStore, capacity_columns
+from .load import period_axis
+from .metrics import RunMetrics
+from .paths import ONLINE, ROLLUPS, STORE, TS_FILE
+from .poly_fit import DEGREES, DEGREE_PENALTY, PolyMoments, clamp_monotone, last_observed
+from .predict import PREDICT_TO
+
+MIN_POINTS = 4          # as forecast_series: fewer usable points → no forecast
+STATE_VERSION = 2
+# forecast_series result arrays with one row per series
+PER_SERIES = ("keep", "degree", "r2", "pred", "first_x", "last_x", "last_y", "Y", "M")
+
+
+def _valid(values):
+    return np.isfinite(values) & (values > 0)
+
+
+def axis(ordinals, resolution):
+    """Regression x (fractional years) of period ordinals."""
+    return period_axis(pd.PeriodIndex.from_ordinals(ordinals, freq=rollups.FREQ[resolution]), resolution)
+
+
+def forecast_grid(store, resolution):
+    """``(x, period strings)`` of the store grid: every period from the first one to the end of PREDICT_TO."""
+    periods = pd.period_range(store.index(resolution)[0],
+                              pd.Period(f"{PREDICT_TO}-12-31", rollups.FREQ[resolution]))
+    return period_axis(periods, resolution), np.asarray(periods.astype(str))
+
+
+class OnlineFits:
+    """Running moments and first / last observation of a set of series at one resolution.
+
+    ``length`` is the number of store periods folded in and ``tail`` the
+    values of the last one as folded: appends may still rewrite that
+    period, never earlier ones, so the sums catch up from the store alone
+    however many appends they missed.
+    """
+
+    def __init__(self, resolution, columns, moments, first_x, last_x, last_y, lineage, length, tail):
+        self.resolution = resolution
+        self.columns = list(columns)
+        self.moments = moments
+        self.first_x, self.last_x, self.last_y = first_x, last_x, last_y
+        self.lineage, self.length, self.tail = lineage, int(length), tail
+
+    @classmethod
+    def build(cls, store, resolution, columns):
+        """Sums of every column's full history in ``store`` (one batch pass); also returns ``(x, Y, M)``."""
+        cols, Y = store.series(columns, resolution)
+        x = axis(store.periods[resolution], resolution)
+        M = _valid(Y)
+        last_x, last_y = last_observed(x, Y, M)
+        tail = Y[:, -1].copy() if Y.shape[1] else np.full(len(cols), np.nan)
+        state = cls(resolution, cols, PolyMoments.of(x, Y, M, DEGREES), np.where(M, x, np.inf).min(axis=1),
+                    last_x, last_y, store.lineage, Y.shape[1], tail)
+        return state, (x, Y, M)
+
+    @staticmethod
+    def path(resolution, all_series):
+        return os.path.join(ONLINE, f"{resolution}{'-all' if all_series else ''}.npz")
+
+    @classmethod
+    def load(cls, path, resolution):
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != STATE_VERSION:
+                    return None
+                moments = PolyMoments(z["center"], z["scale"], tuple(z["degrees"]))
+                moments.su, moments.sy, moments.syy, moments.n = z["su"], z["sy"], z["syy"], z["n"]
+                return cls(resolution, z["columns"].tolist(), moments, z["first_x"],
+                           z["last_x"], z["last_y"], str(z["lineage"]), z["length"], z["tail"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        m = self.moments
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, version=STATE_VERSION, columns=np.array(self.columns),
+                 degrees=np.array(m.degrees), center=m.center, scale=m.scale, su=m.su, sy=m.sy, syy=m.syy, n=m.n,
+                 first_x=self.first_x, last_x=self.last_x, last_y=self.last_y, lineage=np.array(self.lineage),
+                 length=self.length, tail=self.tail)
+        os.replace(tmp, path)
+
+    def catch_up(self, store):
+        """Fold the store periods written since the last call into the sums.
+
+        Returns ``(rows, start)``: the rows (into ``columns``) whose
+        observations changed and the first store period that was re-read.
+        """
+        res = self.resolution
+        start = max(self.length - 1, 0)
+        x = axis(store.periods[res][start:], res)
+        _, new = store.series(self.columns, res, start)
+        before = np.full(new.shape, np.nan)
+        if self.length:
+            before[:, 0] = self.tail
+        was, now = _valid(before), _valid(new)
+        rows = np.flatnonzero(((was != now) | (now & (new != before))).any(axis=1))
+        self.length = len(store.periods[res])
+        if new.shape[1]:
+            self.tail = new[:, -1].copy()
+        if not len(rows):
+            return rows, start
+        self.moments.add(x, before[rows], was[rows], rows, sign=-1)
+        self.moments.add(x, new[rows], now[rows], rows)
+
+        has = now[rows].any(axis=1)
+        lx, ly = last_observed(x, new[rows], now[rows])
+        self.last_x[rows[has]], self.last_y[rows[has]] = lx[has], ly[has]
+        self.first_x[rows] = np.minimum(self.first_x[rows], np.where(now[rows], x, np.inf).min(axis=1))
+        # An observation overwritten by a blank: rescan those series' whole history (rare)
+        lost = rows[(was[rows] & ~now[rows]).any(axis=1)]
+        if len(lost):
+            _, Y = store.series([self.columns[i] for i in lost], res)
+            xs = axis(store.periods[res], res)
+            M = _valid(Y)
+            self.last_x[lost], self.last_y[lost] = last_observed(xs, Y, M)
+            self.first_x[lost] = np.where(M, xs, np.inf).min(axis=1)
+        return rows, start
+
+    def forecast(self, rows, grid):
+        """:func:`poly_fit.forecast_series`-style arrays of the series ``rows``, from the sums."""
+        fit = self.moments.fit(rows)
+        best, r2 = fit.select(DEGREE_PENALTY)
+        last_x, last_y = self.last_x[rows], self.last_y[rows]
+        return {
+            "keep": fit.n >= MIN_POINTS, "fit": fit, "degree": np.asarray(fit.degrees)[best], "r2": r2,
+            "grid": grid, "pred": clamp_monotone(fit.predict(grid, best), grid, last_x, last_y),
+            "first_x": self.first_x[rows], "last_x": last_x, "last_y": last_y,
+        }
+
+
+def _subset(fc, keep):
+    return {k: v[keep] if k in PER_SERIES else v for k, v in fc.items()}
+
+
+# ═══════════════════════════════════════════════════════════════
+# UPDATE
+# ═══════════════════════════════════════════════════════════════
+def refresh_rollups(log=print):
+    """``(store, new rows)``: the rollup store with every appended CSV row folded in.
+
+    The store is rebuilt when it is missing or the CSV was rewritten.
+    """
+    store = rollups.RollupStore.load(ROLLUPS)
+    if store is not None:
+        try:
+            appended = rollups.read_appended(store)
+        except ValueError as e:
+            log(f"   ⚠️  {e} — rebuilding the rollups")
+            store = None
+        else:
+            if appended is not None:
+                return rollups.append(store, *appended), appended[2]
+            if store.source != source_hash(TS_FILE):
+                store = None
+    if store is None:
+        log("📚 Building the rollup store ...")
+        store = rollups.build(path=ROLLUPS)
+    return store, 0
+
+
+def _columns(store, all_series):
+    """Columns to forecast — as ``predict --all-series`` or the dashboard series."""
+    if all_series:
+        return capacity_columns(store.columns)
+    return [col for col in SERIES.values() if col in set(store.columns)]
+
+
+def update_resolution(store, resolution, all_series=False, db=None, log=print):
+    """Bring one resolution's sums and forecast-store entries up to date; returns ``(refitted, written)``."""
+    path = OnlineFits.path(resolution, all_series)
+    state = OnlineFits.load(path, resolution)
+    grid, periods = forecast_grid(store, resolution)
+    t0 = time.perf_counter()
+
+    if state is None or state.lineage != store.lineage or state.length > len(store.periods[resolution]):
+        columns = _columns(store, all_series)
+        log(f"   🧮 {resolution}: no running fits for this rollup store — "
+            f"summing {len(columns)} series' full history")
+        state, (x, Y, M) = OnlineFits.build(store, resolution, columns)
+        fc = state.forecast(np.arange(len(state.columns)), grid)
+        keep = fc["keep"]
+        fc.update(x=x, Y=Y, M=M)
+        fit_ms = (time.perf_counter() - t0) * 1000 / max(int(keep.sum()), 1)
+        kept = [c for c, k in zip(state.columns, keep) if k]
+        db.write_batch(kept, _subset(fc, keep), fit_ms, periods, resolution)
+        if all_series:
+            db.prune(resolution, kept)
+        state.save(path)
+        return len(state.columns), int(keep.sum())
+
+    was_kept = state.moments.n >= MIN_POINTS
+    first = state.first_x.copy()
+    rows, start = state.catch_up(store)
+    fc = state.forecast(rows, grid)
+    keep = fc["keep"]
+    fit_ms = (time.perf_counter() - t0) * 1000 / max(len(rows), 1)
+    cols = [state.columns[i] for i in rows]
+
+    # Series with new actual points before the re-read periods (a first forecast, or an earlier
+    # first observation) are written whole; the rest only get their predictions and re-read actuals
+    whole = keep & (~was_kept[rows] | (fc["first_x"] != first[rows]))
+    part = keep & ~whole
+    if part.any():
+        sub = [c for c, p in zip(cols, part) if p]
+        _, touched = store.series(sub, resolution, start)
+        touched_periods = pd.PeriodIndex.from_ordinals(store.periods[resolution][start:],
+                                                       freq=rollups.FREQ[resolution]).astype(str)
+        db.update_batch(sub, _subset(fc, part), fit_ms, periods, touched_periods,
+                        np.where(_valid(touched), touched, np.nan), resolution)
+    if whole.any():
+        sub = [c for c, w in zip(cols, whole) if w]
+        _, Y = store.series(sub, resolution)
+        fc_whole = _subset(fc, whole)
+        fc_whole.update(x=axis(store.periods[resolution], resolution), Y=Y, M=_valid(Y))
+        db.write_batch(sub, fc_whole, fit_ms, periods, resolution)
+    state.save(path)
+    return len(rows), int(keep.sum())
+
+
+def update(resolutions=("yearly",), all_series=False, path=STORE, log=print):
+    """One update of ``resolutions`` in the forecast store; returns the number of series refitted."""
+    metrics = RunMetrics("update")
+    metrics.info["options"] = {"resolutions": list(resolutions), "all_series": all_series}
+    with metrics.stage("rollups") as st:
+        store, new_rows = refresh_rollups(log)
+        st.rows_in = new_rows
+    if new_rows:
+        last = pd.PeriodIndex.from_ordinals(store.periods["daily"][-1:], freq="D")[0]
+        log(f"📥 {new_rows:,} new timeseries rows → rollups (now up to {last}) in {st.wall_s * 1000:.1f} ms")
+    db = ForecastStore(path)
+    total = 0
+    try:
+        for res in resolutions:
+            with metrics.stage(f"fit_{res}") as st:
+                refitted, written = update_resolution(store, res, all_series, db, log)
+                st.rows_out = written
+            total += refitted
+            if refitted:
+                log(f"   🔮 {res}: {refitted} series refitted, {written} rewritten in "
+                    f"{os.path.basename(path)} ({st.wall_s * 1000:.1f} ms)")
+    finally:
+        db.close()
+    metrics.info["new_rows"] = new_rows
+    metrics.save(log=lambda *a: None)
+    return total
+
+
+def run(resolutions=("yearly",), all_series=False, every=None):
+    """The ``update`` command: once, or every ``every`` seconds until interrupted."""
+    print(f"🔄 Online forecast update ({', '.join(resolutions)}"
+          f"{', every series' if all_series else ''}) ...")
+    while True:
+        if not update(resolutions, all_series):
+            print(f"   Up to date with {os.path.basename(TS_FILE)}")
+        if not every:
+            return 0
+        try:
+            time.sleep(every)
+        except KeyboardInterrupt:
+            return 0
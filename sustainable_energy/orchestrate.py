@@ -0,0 +1,427 @@
+"""
+Pipeline Orchestrator
+=====================
+``python -m sustainable_energy pipeline`` runs the stages as a dependency
+graph, make-style, instead of the scripts by hand in the right order:
+
+  generate   synthetic OPSD files (only when OPSD_DATA_DIR is synthetic-opsd/
+             and they are missing)
+  load       capacity timeseries → rollup store
+  analyze    plant CSVs → load / clean / preprocess → cleaned outputs,
+             capacity cube, analysis_report.json (one stage: the three
+             steps share the in-memory plant frame)
+  forecast   dashboard series fits on the yearly rollups → forecasts.json
+  predict    forecasts + commissioning trend (needs the report) → predictions.json
+  charts     analysis charts;  pred_charts  prediction charts
+  export     dashboard data bundle
+
+  generate ─► load ─┬─► analyze ──┬─► charts
+                    │             ├─► predict ─┬─► pred_charts
+                    └─► forecast ─┘            └─► export
+
+After a stage runs, the content hashes of its input and output files (and
+of its options and the source of the modules it runs) are saved in
+.opsd_cache/pipeline_state.json.  A stage is stale when one of them changed
+or an output is missing — so a stage whose upstream was rerun but rewrote
+identical bytes stays fresh.  Stale stages start in worker processes as
+soon as their upstream stages are done, up to ``jobs`` at once (forecast
+runs alongside analyze, charts alongside predict); each one's output goes
+to .opsd_cache/logs/<stage>.log.  The run ends with a timing table and the
+critical path — the chain of stages that bounded the wall time.
+"""
+
+import os, json, time, hashlib, traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+
+from .csv_cache import file_hash
+from .paths import (BASE, BUNDLE, CHARTS, CLEAN, CLEAN_PARQUET, CUBE, DATA_DIR, FORECASTS, PIPELINE_LOGS,
+                    PIPELINE_STATE, PRED_FILE, REPORT, ROLLUPS, SYNTH_DIR, TS_FILE)
+
+JOBS = min(os.cpu_count() or 1, 4)
+STATE_VERSION = 1
+LOG_TAIL = 15           # log lines shown when a stage fails
+PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ═══════════════════════════════════════════════════════════════
+# STAGES
+# ═══════════════════════════════════════════════════════════════
+# Each runs in a worker process with the pipeline options and returns the paths it wrote.
+def _generate(opts):
+    from .synthetic import run
+    run(SYNTH_DIR)
+    return [SYNTH_DIR]
+
+
+def _load(opts):
+    from .rollups import open_store
+    store = open_store()
+    print(f"📚 Rollup store: {len(store)} series, {store.rows_clean:,} days (2000+) → {ROLLUPS}")
+    return [ROLLUPS]
+
+
+def _analyze(opts):
+    from .analyze import run
+    run(stream=opts["stream"], chunksize=opts["chunksize"], workers=opts["workers"], charts="none",
+        clean_format=opts["clean_format"], export=False)
+    return [REPORT, CUBE, CLEAN, CLEAN_PARQUET]
+
+
+def _forecast(opts):
+    from .fit_cache import FitCache
+    from .metrics import RunMetrics
+    from .predict import _close_cache, save_predictions, yearly_forecasts
+    metrics = RunMetrics("forecast")
+    metrics.info["options"] = {"samples": opts["samples"]}
+    cache = FitCache()
+    predictions = yearly_forecasts(metrics, opts["samples"], cache=cache)
+    _close_cache(cache, metrics)
+    save_predictions(predictions, FORECASTS)
+    print(f"\n💾 Forecasts saved → {FORECASTS}")
+    metrics.save()
+    return [FORECASTS]
+
+
+def _predict(opts):
+    from .predict import commissioning_forecast, save_predictions
+    with open(FORECASTS, encoding="utf-8") as f:
+        predictions = json.load(f)
+    with open(REPORT, encoding="utf-8") as f:
+        predictions["commissioning_forecast"] = commissioning_forecast(json.load(f))
+    save_predictions(predictions)
+    print(f"💾 Predictions saved → {PRED_FILE}")
+    return [PRED_FILE]
+
+
+def _render(specs, mode):
+    from .plot import render
+    drawn, skipped = render(specs, CHARTS, mode)
+    print(f"🎨 {drawn} charts saved → {os.path.basename(CHARTS)}/"
+          f"{f' ({skipped} unchanged, skipped)' if skipped else ''}")
+    return [os.path.join(CHARTS, fname) for fname, _, _ in specs]
+
+
+def _charts(opts):
+    from .plot import analysis_charts
+    with open(REPORT, encoding="utf-8") as f:
+        return _render(analysis_charts(json.load(f)), opts["charts"])
+
+
+def _pred_charts(opts):
+    from .plot import prediction_charts
+    with open(PRED_FILE, encoding="utf-8") as f:
+        return _render(prediction_charts(json.load(f)), opts["charts"])
+
+
+def _export(opts):
+    from .bundle import FALLBACK, MANIFEST, export, manifest_files
+    manifest = export()
+    return [os.path.join(BUNDLE, MANIFEST), os.path.join(BUNDLE, FALLBACK)] + [os.path.join(BUNDLE, f) for f in sorted(manifest_files(manifest))]
+
+
+def _plant_files(opts):
+    from .load import country_jobs
+    return [path for _, path in country_jobs(include_large=opts["stream"])]
+
+
+class Stage:
+    """One node of the graph.
+
+    ``inputs(opts)`` lists the files / directories it reads, ``params`` the
+    options its outputs depend on and ``modules`` the package modules whose
+    source it runs.  A ``create_only`` stage reruns only when an output is
+    missing (``generate`` must not overwrite data generated by hand).
+    """
+
+    def __init__(self, name, run, deps=(), inputs=lambda opts: [], params=(), modules=(), create_only=False):
+        self.name, self.run, self.deps, self.inputs = name, run, tuple(deps), inputs
+        self.params, self.modules, self.create_only = tuple(params), tuple(modules), create_only
+
+
+# In dependency order
+STAGES = {s.name: s for s in [
+    Stage("generate", _generate, modules=("synthetic",), create_only=True),
+    Stage("load", _load, ["generate"], lambda o: [TS_FILE],
+          modules=("rollups", "clean", "csv_cache", "dates")),
+    Stage("analyze", _analyze, ["load"], lambda o: _plant_files(o) + [ROLLUPS],
+          params=("stream", "clean_format"),
+          modules=("analyze", "load", "clean", "plant_stream", "cube", "dates", "csv_cache", "rollups")),
+    Stage("forecast", _forecast, ["load"], lambda o: [ROLLUPS], params=("samples",),
+          modules=("predict", "poly_fit", "fit_cache", "forecast_store", "load", "rollups")),
+    Stage("predict", _predict, ["analyze", "forecast"], lambda o: [FORECASTS, REPORT], modules=("predict",)),
+    Stage("charts", _charts, ["analyze"], lambda o: [REPORT], modules=("plot",)),
+    Stage("pred_charts", _pred_charts, ["predict"], lambda o: [PRED_FILE], modules=("plot",)),
+    Stage("export", _export, ["analyze", "predict"], lambda o: [REPORT, PRED_FILE, ROLLUPS],
+          modules=("bundle",)),
+]}
+CHART_STAGES = {"charts", "pred_charts"}
+TERMINAL = {"ran", "fresh", "failed", "blocked"}
+
+
+def synthetic_data():
+    """True when the pipeline reads generate's output (``OPSD_DATA_DIR=synthetic-opsd``)."""
+    return os.path.abspath(DATA_DIR) == os.path.abspath(SYNTH_DIR)
+
+
+def plan(targets=None, charts="changed"):
+    """Stage names to consider, in dependency order: ``targets`` (default: every end
+    product) and everything upstream of them."""
+    skip = set() if synthetic_data() else {"generate"}
+    if charts == "none":
+        skip |= CHART_STAGES
+    unknown = set(targets or ()) - set(STAGES)
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(sorted(unknown))} — one of {', '.join(STAGES)}")
+    wanted = set(targets or [n for n in STAGES if not any(n in s.deps for s in STAGES.values())])
+    needed, todo = set(), list(wanted - skip)
+    while todo:
+        name = todo.pop()
+        if name not in needed and name not in skip:
+            needed.add(name)
+            todo.extend(STAGES[name].deps)
+    return [n for n in STAGES if n in needed]
+
+
+# ═══════════════════════════════════════════════════════════════
+# HASHES & STATE
+# ═══════════════════════════════════════════════════════════════
+def _rel(path):
+    return os.path.relpath(path, BASE)
+
+
+def fingerprint(paths, stamps):
+    """``{path: content hash}`` of ``paths`` (directories expanded to their files, missing
+    paths → None).  ``stamps`` memoises hashes by size + mtime across runs."""
+    index = {"stamps": stamps}
+    out = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for f in sorted(files):
+                    if not f.endswith(".tmp"):
+                        out[_rel(os.path.join(root, f))] = file_hash(os.path.join(root, f), index)
+        else:
+            out[_rel(path)] = file_hash(path, index) if os.path.isfile(path) else None
+    return out
+
+
+def _digest(obj):
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True).encode(), digest_size=12).hexdigest()
+
+
+def code_hash(stage):
+    h = hashlib.blake2b(digest_size=12)
+    for mod in sorted(stage.modules):
+        with open(os.path.join(PACKAGE, f"{mod}.py"), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def params_hash(stage, opts):
+    return _digest({k: opts[k] for k in stage.params})
+
+
+def load_state(path=PIPELINE_STATE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "stages": {}, "stamps": {}}
+
+
+def save_state(state, path=PIPELINE_STATE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _first_change(old, new):
+    for key in sorted(set(old) | set(new)):
+        if old.get(key) != new.get(key):
+            return key, new.get(key) is None
+    return None, False
+
+
+def stale_reason(stage, record, opts, stamps):
+    """Why ``stage`` must run, or None when its recorded run is still valid."""
+    if record is None:
+        return "never run"
+    outputs = fingerprint([os.path.join(BASE, p) for p in record["outputs"]], stamps)
+    if stage.create_only:
+        missing = [p for p, h in outputs.items() if h is None]
+        return f"output missing: {missing[0]}" if missing else None
+    if record["params"] != params_hash(stage, opts):
+        return "options changed"
+    if record["code"] != code_hash(stage):
+        return "code changed"
+    key, _ = _first_change(record["inputs"], fingerprint(stage.inputs(opts), stamps))
+    if key:
+        return f"input changed: {key}"
+    key, gone = _first_change(record["outputs"], outputs)
+    if key:
+        return f"output {'missing' if gone else 'changed'}: {key}"
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════════════
+def _execute(name, opts, log_path):
+    """Worker-process body: run one stage with its output captured in ``log_path``.
+
+    Returns ``(outputs, start, end)`` — wall-clock times of the stage itself,
+    not of its wait for a free worker.
+    """
+    start = time.time()
+    with open(log_path, "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            outputs = STAGES[name].run(opts)
+        except Exception:
+            traceback.print_exc()
+            raise
+    return [p for p in outputs if os.path.exists(p)], start, time.time()
+
+
+def _tail(path, n=LOG_TAIL):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.readlines()[-n:]
+    except OSError:
+        return []
+
+
+def critical_path(names, durations):
+    """``(stages, seconds)`` of the longest chain of stage durations through the graph."""
+    finish, prev = {}, {}
+    for name in names:
+        deps = [d for d in STAGES[name].deps if d in finish]
+        before = max(deps, key=finish.get, default=None)
+        finish[name] = durations.get(name, 0.0) + (finish[before] if before else 0.0)
+        prev[name] = before
+    end = max(finish, key=finish.get, default=None)
+    chain = []
+    while end:
+        chain.append(end)
+        end = prev[end]
+    chain = [n for n in reversed(chain) if durations.get(n)]
+    return chain, sum(durations[n] for n in chain)
+
+
+def print_summary(names, status, spans, wall, metrics):
+    durations = {n: e - s for n, (s, e) in spans.items()}
+    chain, crit = critical_path(names, durations)
+    busy = sum(durations.values())
+    print(f"\n🧭 Stages: {busy:.2f}s of stage time in {wall:.2f}s"
+          f"{f' ({busy / wall:.1f}× concurrency)' if wall and busy else ''}")
+    width = max(map(len, names), default=0)
+    for name in names:
+        s, e = spans.get(name, (None, None))
+        timing = f"{e - s:8.2f}s  {s:7.2f} → {e:7.2f}" if s is not None else " " * 28
+        print(f"   {name:<{width}}  {status[name]:<8}{timing}{'  ◆' if name in chain else ''}")
+        metrics.item("stages", name, status=status[name], wall_s=round(e - s, 4) if s is not None else 0.0,
+                     start_s=round(s, 4) if s is not None else None)
+    if chain:
+        print(f"   Critical path: {' → '.join(chain)} ({crit:.2f}s of {wall:.2f}s)")
+    metrics.info["critical_path"] = {"stages": chain, "wall_s": round(crit, 4)}
+
+
+def run(targets=None, jobs=JOBS, force=(), dry_run=False, stream=False, chunksize=None, workers=1,
+        clean_format="both", samples=2000, charts="changed"):
+    """The ``pipeline`` command; ``force`` names stages to rerun regardless (``"all"`` for every one).
+
+    Returns 0, or 1 when a stage failed (its dependents are skipped).
+    """
+    from .metrics import RunMetrics
+    from .plant_stream import CHUNK_ROWS
+    opts = {"stream": stream, "chunksize": chunksize or CHUNK_ROWS, "workers": workers,
+            "clean_format": clean_format, "samples": samples, "charts": charts}
+    names = plan(targets, charts)
+    force = set(names) if "all" in force else set(force) & set(names)
+    if charts == "all":
+        force |= CHART_STAGES & set(names)
+    state = load_state()
+    stamps = state["stamps"]
+
+    if dry_run:
+        print(f"🧭 Pipeline plan ({len(names)} stages):")
+        upstream = set()
+        for name in names:
+            reason = "forced" if name in force else stale_reason(STAGES[name], state["stages"].get(name), opts, stamps)
+            if reason is None and upstream & set(STAGES[name].deps):
+                reason = "after upstream (may stay fresh if its inputs come out identical)"
+            if reason:
+                upstream.add(name)
+            print(f"   {'▶️ ' if reason else '✔️ '} {name:<12} {reason or 'up to date'}")
+        return 0
+
+    metrics = RunMetrics("pipeline")
+    metrics.info["options"] = {**opts, "jobs": jobs, "targets": names, "force": sorted(force)}
+    os.makedirs(PIPELINE_LOGS, exist_ok=True)
+    print(f"🧭 Pipeline: {' → '.join(names)} ({jobs} job{'s' if jobs != 1 else ''})")
+    status, spans, running = {}, {}, {}
+    t0 = time.time()
+    clock = lambda: time.time() - t0
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while running or any(status.get(n) not in TERMINAL for n in names):
+            # Resolve every stage whose upstream is done: fresh, blocked or submitted
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in names:
+                    stage = STAGES[name]
+                    if name in status or any(d in names and status.get(d) not in TERMINAL
+                                             for d in stage.deps):
+                        continue
+                    progressed = True
+                    if any(status.get(d) in ("failed", "blocked") for d in stage.deps):
+                        status[name] = "blocked"
+                        print(f"[{clock():7.2f}s] ⏭️  {name}: skipped — an upstream stage failed")
+                        continue
+                    reason = "forced" if name in force else stale_reason(stage, state["stages"].get(name), opts,
+                                                                          stamps)
+                    if reason is None:
+                        status[name] = "fresh"
+                        print(f"[{clock():7.2f}s] ✔️  {name}: up to date")
+                        continue
+                    status[name] = "running"
+                    log = os.path.join(PIPELINE_LOGS, f"{name}.log")
+                    running[pool.submit(_execute, name, opts, log)] = name
+                    print(f"[{clock():7.2f}s] ▶️  {name}: {reason}")
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                stage, log = STAGES[name], os.path.join(PIPELINE_LOGS, f"{name}.log")
+                try:
+                    outputs, start, end = fut.result()
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"[{clock():7.2f}s] ❌ {name} failed: {type(e).__name__}: {e} — {_rel(log)}:")
+                    for line in _tail(log):
+                        print(f"      {line.rstrip()}")
+                    continue
+                status[name] = "ran"
+                spans[name] = (start - t0, end - t0)
+                state["stages"][name] = {
+                    "inputs": fingerprint(stage.inputs(opts), stamps),
+                    "outputs": fingerprint(outputs, stamps),
+                    "params": params_hash(stage, opts), "code": code_hash(stage),
+                    "finished": time.time(),
+                }
+                save_state(state)
+                print(f"[{clock():7.2f}s] ✅ {name} ({end - start:.2f}s, log → {_rel(log)})")
+
+    print_summary(names, status, spans, clock(), metrics)
+    metrics.save()
+    failed = [n for n in names if status[n] == "failed"]
+    print(f"\n{'❌ Pipeline failed: ' + ', '.join(failed) if failed else '✅ Pipeline complete!'}")
+    return 1 if failed else 0
@@ -0,0 +1,39 @@
+"""
+Project Paths
+=============
+Input and output locations, relative to the repository root.  Nothing here
+touches the filesystem — output directories are created by the stages that
+write into them.  ``OPSD_DATA_DIR`` points the pipeline at another OPSD
+directory (e.g. synthetic data from ``generate``).
+"""
+
+import os
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.environ.get("OPSD_DATA_DIR") or os.path.join(BASE, "opsd-renewable_power_plants-2020-08-25")
+TS_FILE = os.path.join(DATA_DIR, "renewable_capacity_timeseries.csv")
+
+GENERATED = os.path.join(BASE, "renewable_energy_data.csv")
+GENERATED_CLEAN = os.path.join(BASE, "renewable_energy_data_clean.csv")
+CLEAN = os.path.join(BASE, "cleaned_data.csv")
+CLEAN_PARQUET = os.path.join(BASE, "cleaned_data")
+CUBE = os.path.join(BASE, "capacity_cube.npz")
+REPORT = os.path.join(BASE, "analysis_report.json")
+PARTIALS = os.path.join(BASE, "analysis_partials")
+PRED_FILE = os.path.join(BASE, "predictions.json")
+SPATIAL_INDEX = os.path.join(BASE, "plant_index.npz")
+RASTERS = os.path.join(BASE, "plant_rasters.json")
+BUNDLE = os.path.join(BASE, "dashboard_data")
+STORE = os.path.join(BASE, "predictions_store.sqlite")
+BACKTEST_FILE = os.path.join(BASE, "backtest_report.json")
+CHARTS = os.path.join(BASE, "charts")
+METRICS_FILE = os.path.join(BASE, "run_metrics.json")
+PROFILE_FILE = os.path.join(BASE, "run_profile.prof")
+CACHE_DIR = os.path.join(BASE, ".opsd_cache")
+ROLLUPS = os.path.join(CACHE_DIR, "rollups")
+FIT_CACHE = os.path.join(CACHE_DIR, "fit_cache.sqlite")
+FORECASTS = os.path.join(CACHE_DIR, "forecasts.json")
+PIPELINE_STATE = os.path.join(CACHE_DIR, "pipeline_state.json")
+PIPELINE_LOGS = os.path.join(CACHE_DIR, "logs")
+ONLINE = os.path.join(CACHE_DIR, "online")
+SYNTH_DIR = os.path.join(BASE, "synthetic-opsd")
@@ -0,0 +1,459 @@
+"""
+Streaming OPSD Plant Ingestion
+==============================
+Reads renewable_power_plants_*.csv files in bounded-size chunks (only the
+needed columns, explicit dtypes) and folds every chunk into the section-4
+aggregates of the analysis stage.  Peak memory depends on the chunk size and
+on the number of distinct countries/sources/years — never on file size —
+so every OPSD country, Germany included, fits on a small worker.
+"""
+
+import os, json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from .clean import ENCODED, compact_plants, encode_plants, write_partitioned
+from .csv_cache import iter_cached, read_cached, source_hash
+from .cube import NO_YEAR, CapacityCube
+from .dates import merge_counts, parse_dates
+from .metrics import timed_call
+
+CHUNK_ROWS = 200_000
+
+# Explicit dtypes for the columns we read — everything else is skipped
+PLANT_DTYPES = {
+    "electrical_capacity": "float64",
+    "energy_source_level_1": "object",
+    "energy_source_level_2": "object",
+    "energy_source_level_3": "object",
+    "technology": "object",
+    "commissioning_date": "object",
+}
+# commissioning_date is kept as text by the reader and parsed in clean_chunk,
+# which counts the date formats it sees (dates.py)
+
+# Bump whenever cleaning or the aggregate layout changes — invalidates saved partials
+PARTIALS_VERSION = 3
+
+
+# ═══════════════════════════════════════════════════════════════
+# READING
+# ═══════════════════════════════════════════════════════════════
+def iter_plant_chunks(fpath, cols, chunksize=CHUNK_ROWS, use_cache=True):
+    """Yield ``cols`` of a plant CSV in chunks; absent columns come back as NaN."""
+    reader = iter_cached(fpath, cols, chunksize, dtype=PLANT_DTYPES, use_cache=use_cache)
+    for chunk in reader:
+        for c in cols:
+            if c not in chunk.columns:
+                chunk[c] = np.nan
+        yield chunk[cols]
+
+
+def clean_chunk(df, country, date_counts=None):
+    """Apply cleaning steps 2a–2d and 2f of analyze_data.py to one chunk.
+
+    Step 2e (median fill of ``commissioning_date`` per country) needs the
+    whole country, so it is deferred to :class:`PlantAggregates`.
+    ``date_counts`` collects the commissioning date formats seen.
+    Returns ``(clean_df, rows_dropped)``.
+    """
+    df = df.copy()
+    df["country"] = country
+    df["commissioning_date"] = parse_dates(df["commissioning_date"], date_counts)
+    df["electrical_capacity"] = pd.to_numeric(df["electrical_capacity"], errors="coerce")
+    for c in ["energy_source_level_2", "energy_source_level_3", "technology"]:
+        df[c] = df[c].fillna("Unknown")
+
+    before = len(df)
+    df = df.dropna(subset=["electrical_capacity"])
+
+    df["energy_source_level_2"] = df["energy_source_level_2"].str.strip().str.title()
+    df["country"] = df["country"].str.strip().str.title()
+    df["year"] = df["commissioning_date"].dt.year
+    return df, before - len(df)
+
+
+def load_clean_country(country, fpath, cols, use_cache=True):
+    """Load one plant file whole and apply cleaning steps 2a–2f to it.
+
+    Every step is row-wise or grouped by country, so cleaning each file on
+    its own and concatenating equals cleaning the concatenation.  Returns
+    ``(clean_df, stats)`` — the frame in its compact form (clean.py) — with
+    the raw row count, per-column missing counts before cleaning and the
+    rows dropped by step 2d and the commissioning date formats.
+    """
+    raw = read_cached(fpath, columns=cols, use_cache=use_cache)
+    for c in cols:
+        if c not in raw.columns:
+            raw[c] = np.nan
+    raw = raw[cols]
+    stats = {"rows": len(raw), "missing": raw.isnull().sum(), "date_formats": {}}
+    df, stats["dropped"] = clean_chunk(raw, country, stats["date_formats"])
+    # 2e. Fill missing commissioning dates with the country median
+    df["commissioning_date"] = df["commissioning_date"].fillna(df["commissioning_date"].median())
+    df["year"] = df["commissioning_date"].dt.year
+    return compact_plants(df), stats
+
+
+def map_countries(fn, jobs, workers=1, timings=None):
+    """Run ``fn(country, fpath)`` for every job, in a process pool when ``workers > 1``.
+
+    Yields ``(country, result, error)`` in job order, so callers report
+    progress — and a failing country — exactly like a sequential loop.
+    With a ``timings`` dict, each job is timed where it runs (see
+    metrics.timed_call) and its timing stored under the country.
+    """
+    if timings is not None:
+        fn = partial(timed_call, fn)
+    for country, result, err in _map_jobs(fn, jobs, workers):
+        if timings is not None and err is None:
+            result, timings[country] = result
+        yield country, result, err
+
+
+def _map_jobs(fn, jobs, workers):
+    if workers <= 1:
+        for country, fpath in jobs:
+            try:
+                yield country, fn(country, fpath), None
+            except Exception as e:
+                yield country, None, e
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(country, pool.submit(fn, country, fpath)) for country, fpath in jobs]
+        for country, fut in futures:
+            try:
+                yield country, fut.result(), None
+            except Exception as e:
+                yield country, None, e
+
+
+# ═══════════════════════════════════════════════════════════════
+# QUANTILE SKETCH
+# ═══════════════════════════════════════════════════════════════
+class QuantileSketch:
+    """Mergeable log-bucket quantile sketch with relative accuracy ``alpha``.
+
+    Every value lands in bucket ``ceil(log_gamma(|x|))``; quantiles are read
+    back from cumulative bucket counts and are within ``alpha`` (relative) of
+    the exact answer.  Memory is bounded by the dynamic range of the data,
+    not by the number of values, and two sketches merge by adding counts.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, alpha=0.005):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = np.log(self.gamma)
+        self.pos = {}
+        self.neg = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _bucket_counts(self, values):
+        keys, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        return zip(keys.tolist(), counts.tolist())
+
+    def add(self, values):
+        v = np.asarray(values, dtype="float64")
+        v = v[~np.isnan(v)]
+        if not len(v):
+            return
+        self.count += len(v)
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+        pos, neg = v[v > self.MIN_VALUE], -v[v < -self.MIN_VALUE]
+        self.zeros += len(v) - len(pos) - len(neg)
+        for store, vals in ((self.pos, pos), (self.neg, neg)):
+            if len(vals):
+                for k, n in self._bucket_counts(vals):
+                    store[k] = store.get(k, 0) + n
+
+    def merge(self, other):
+        for store, o in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, n in o.items():
+                store[k] = store.get(k, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self):
+        return {"alpha": self.alpha, "pos": {str(k): n for k, n in self.pos.items()},
+                "neg": {str(k): n for k, n in self.neg.items()}, "zeros": self.zeros,
+                "count": self.count, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        sk = cls(d["alpha"])
+        sk.pos = {int(k): n for k, n in d["pos"].items()}
+        sk.neg = {int(k): n for k, n in d["neg"].items()}
+        sk.zeros, sk.count, sk.min, sk.max = d["zeros"], d["count"], d["min"], d["max"]
+        return sk
+
+    def _value_at(self, rank):
+        """Approximate value of the ``rank``-th smallest element (0-based)."""
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if rank < seen:
+                return -2 * self.gamma ** k / (self.gamma + 1)
+        seen += self.zeros
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if rank < seen:
+                return 2 * self.gamma ** k / (self.gamma + 1)
+        return self.max
+
+    def quantile(self, q):
+        """Linearly interpolated quantile, matching ``Series.quantile``."""
+        if not self.count:
+            return np.nan
+        pos = q * (self.count - 1)
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        v_lo, v_hi = self._value_at(lo), self._value_at(hi)
+        val = v_lo + (v_hi - v_lo) * (pos - lo)
+        return float(min(max(val, self.min), self.max))
+
+
+# ═══════════════════════════════════════════════════════════════
+# AGGREGATES
+# ═══════════════════════════════════════════════════════════════
+def _add(acc, part):
+    """Add a group-by result into a running Series accumulator."""
+    if part is None:
+        return acc
+    return part.astype("float64") if acc is None else acc.add(part, fill_value=0)
+
+
+def _plain(v):
+    return v.item() if hasattr(v, "item") else v
+
+
+def _pack(obj):
+    """JSON-able form of a Series/DataFrame accumulator (MultiIndex aware)."""
+    if obj is None:
+        return None
+    idx = obj.index
+    keys = ([[_plain(v) for v in t] for t in idx] if isinstance(idx, pd.MultiIndex)
+            else [_plain(v) for v in idx])
+    out = {"names": list(idx.names), "index": keys}
+    if isinstance(obj, pd.DataFrame):
+        out.update(columns=list(obj.columns), data=obj.values.tolist())
+    else:
+        out["values"] = obj.values.tolist()
+    return out
+
+
+def _unpack(d):
+    if d is None:
+        return None
+    names = d["names"]
+    if len(names) > 1:
+        idx = pd.MultiIndex.from_arrays(
+            [list(level) for level in zip(*d["index"])] or [[]] * len(names), names=names)
+    else:
+        idx = pd.Index(d["index"], name=names[0])
+    if "columns" in d:
+        return pd.DataFrame(d["data"], index=idx, columns=d["columns"], dtype="float64")
+    return pd.Series(d["values"], index=idx, dtype="float64")
+
+
+class PlantAggregates:
+    """Running section-4 aggregates over cleaned plant chunks.
+
+    Counts and capacity go into a :class:`cube.CapacityCube`, capacity
+    quantiles into a sketch.  Rows without a commissioning date sit in the
+    cube's ``NO_YEAR`` cells and only move to the country's median year in
+    :meth:`report`, which is exactly what step 2e's median fill does to them.
+    """
+
+    def __init__(self):
+        self.rows_in = 0
+        self.rows_dropped = 0
+        self.initial_missing = None
+        self.level1_missing = 0
+        self.sketch = QuantileSketch()
+        self.cube = CapacityCube.empty()
+        self.dates = None               # commissioning date histogram per country
+        self.date_formats = {}          # rows per commissioning date format (dates.py)
+
+    ACCUMULATORS = ["initial_missing", "dates"]
+
+    @property
+    def n(self):
+        """Cleaned rows folded in so far."""
+        return int(self.cube.m["count"].sum())
+
+    def add_raw(self, raw):
+        """Record missing-value counts of a chunk before it is cleaned."""
+        self.rows_in += len(raw)
+        self.initial_missing = _add(self.initial_missing, raw.isnull().sum())
+
+    def add(self, df, dropped=0):
+        """Fold one cleaned chunk (see :func:`clean_chunk`) into the aggregates."""
+        self.rows_dropped += dropped
+        if not len(df):
+            return
+        self.level1_missing += int(df["energy_source_level_1"].isnull().sum())
+        self.sketch.add(df["electrical_capacity"].values)
+        self.cube = self.cube.merge(CapacityCube.from_frame(df))
+
+        dated = df["commissioning_date"].notna()
+        ns = df.loc[dated, "commissioning_date"].values.astype("int64")
+        self.dates = _add(self.dates, pd.Series(ns).groupby(df.loc[dated, "country"].values).value_counts())
+
+    def merge(self, other):
+        """Fold another :class:`PlantAggregates` (e.g. one country's partial) into this one."""
+        self.rows_in += other.rows_in
+        self.rows_dropped += other.rows_dropped
+        self.level1_missing += other.level1_missing
+        self.sketch.merge(other.sketch)
+        self.cube = self.cube.merge(other.cube)
+        self.date_formats = merge_counts(self.date_formats, other.date_formats)
+        for name in self.ACCUMULATORS:
+            setattr(self, name, _add(getattr(self, name), getattr(other, name)))
+        return self
+
+    def to_dict(self):
+        return {
+            "rows_in": self.rows_in, "rows_dropped": self.rows_dropped,
+            "level1_missing": self.level1_missing,
+            "sketch": self.sketch.to_dict(),
+            "cube": self.cube.to_dict(),
+            "date_formats": self.date_formats,
+            **{name: _pack(getattr(self, name)) for name in self.ACCUMULATORS},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        agg = cls()
+        agg.rows_in, agg.rows_dropped = d["rows_in"], d["rows_dropped"]
+        agg.level1_missing = d["level1_missing"]
+        agg.sketch = QuantileSketch.from_dict(d["sketch"])
+        agg.cube = CapacityCube.from_dict(d["cube"])
+        agg.date_formats = d["date_formats"]
+        for name in cls.ACCUMULATORS:
+            setattr(agg, name, _unpack(d[name]))
+        return agg
+
+    # ----------------------------------------------------------------
+    def median_dates(self):
+        """Median commissioning date per country (the value used by step 2e)."""
+        medians = {}
+        for country in self.cube.labels["country"]:
+            if self.dates is None or country not in self.dates.index.get_level_values(0):
+                medians[country] = pd.NaT
+                continue
+            hist = self.dates.loc[country].sort_index()
+            cum = hist.cumsum().values
+            total = int(cum[-1])
+            lo = hist.index[np.searchsorted(cum, (total - 1) // 2, side="right")]
+            hi = hist.index[np.searchsorted(cum, total // 2, side="right")]
+            medians[country] = pd.Timestamp(int(lo + (hi - lo) // 2))
+        return medians
+
+    def capacity_range(self):
+        return self.sketch.min, self.sketch.max
+
+    def categories(self, col):
+        """Sorted labels seen for a column — the classes a LabelEncoder would learn."""
+        return sorted(self.cube.labels[col])
+
+    def remaining_nan(self):
+        """NaN left after cleaning: unfilled level 1 plus date/year of countries without a median."""
+        no_median = [c for c, d in self.median_dates().items() if pd.isna(d)]
+        undated = self.cube.rollup("country", where={"year": NO_YEAR, "country": no_median})
+        return self.level1_missing + 2 * int(undated["count"].sum())
+
+    def filled_cube(self):
+        """The cube with undated rows moved to their country's median year (step 2e)."""
+        return self.cube.fill_years({c: d.year for c, d in self.median_dates().items() if pd.notna(d)})
+
+    def report(self, cube=None):
+        """Report sections 4a–4h as queries of :meth:`filled_cube` (or ``cube``), quartiles from the sketch."""
+        cube = cube if cube is not None else self.filled_cube()
+        return cube.report({f"{q:.0%}": self.sketch.quantile(q) for q in (0.25, 0.5, 0.75)})
+
+
+# ═══════════════════════════════════════════════════════════════
+# PER-COUNTRY PARTIALS
+# ═══════════════════════════════════════════════════════════════
+def stream_country(country, fpath, cols, chunksize=CHUNK_ROWS, use_cache=True):
+    """Stream one plant file into its own :class:`PlantAggregates`."""
+    agg = PlantAggregates()
+    for raw in iter_plant_chunks(fpath, cols, chunksize, use_cache):
+        agg.add_raw(raw)
+        agg.add(*clean_chunk(raw, country, agg.date_formats))
+    return agg
+
+
+def country_partial(country, fpath, cols, partials_dir=None, chunksize=CHUNK_ROWS, use_cache=True):
+    """Saved partial aggregates for one country, rebuilt only when its CSV changed.
+
+    Each partial is stored as ``<file stem>.json`` in ``partials_dir`` with
+    the source file's content hash; without ``partials_dir`` the country is
+    simply streamed.  Returns ``(aggregates, reused)``.
+    """
+    if partials_dir is None:
+        return stream_country(country, fpath, cols, chunksize, use_cache), False
+    key = {"version": PARTIALS_VERSION, "country": country, "cols": list(cols),
+           "sha": source_hash(fpath)}
+    path = os.path.join(partials_dir, os.path.splitext(os.path.basename(fpath))[0] + ".json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["key"] == key:
+            return PlantAggregates.from_dict(saved["aggregates"]), True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    agg = stream_country(country, fpath, cols, chunksize, use_cache)
+    os.makedirs(partials_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "aggregates": agg.to_dict()}, f)
+    os.replace(tmp, path)
+    return agg, False
+
+
+# ═══════════════════════════════════════════════════════════════
+# SECOND PASS — CLEANED OUTPUTS
+# ═══════════════════════════════════════════════════════════════
+def write_clean(sources, agg, cols, csv_path=None, parquet_dir=None, chunksize=CHUNK_ROWS, use_cache=True):
+    """Re-stream every file and write fully cleaned + preprocessed rows.
+
+    ``sources`` is an iterable of ``(country, fpath)``.  Uses the medians,
+    capacity range and label sets gathered by the first pass, so the output
+    matches steps 2e and 3 of the in-memory path without holding all plants.
+    Rows are appended to ``csv_path`` and/or to the partitioned Parquet
+    dataset in ``parquet_dir``.  Returns the number of rows written.
+    """
+    medians = agg.median_dates()
+    cap_range = agg.capacity_range()
+    categories = {c: agg.categories(c) for c in ENCODED.values()}
+
+    rows, first = 0, True
+    for country, fpath in sources:
+        median = medians.get(country.strip().title(), pd.NaT)
+        for raw in iter_plant_chunks(fpath, cols, chunksize, use_cache):
+            df, _ = clean_chunk(raw, country)
+            df["commissioning_date"] = df["commissioning_date"].fillna(median)
+            df["year"] = df["commissioning_date"].dt.year
+            df = encode_plants(compact_plants(df, categories), cap_range)
+            if csv_path:
+                df.to_csv(csv_path, mode="w" if first else "a", header=first, index=False)
+            if parquet_dir and len(df):
+                write_partitioned(df, parquet_dir, tag=f"chunk{rows}")
+            rows += len(df)
+            first = False
+    return rows
@@ -0,0 +1,337 @@
+"""
+Charts
+======
+PNG charts for the analysis report and the 2030 predictions.
+
+Every chart is a function of the exact data it plots.  ``render`` keys each
+PNG by a hash of that data, of the chart's code and of this module (theme,
+colours, shared helpers) plus ``PLOT_VERSION``, skips charts whose PNG
+in charts/ is already up to date (``mode="changed"``), and draws the rest
+in a process pool.  matplotlib and seaborn are imported by the processes
+that draw, never at package import.
+"""
+
+import os, json, hashlib, inspect
+from concurrent.futures import ProcessPoolExecutor
+
+SRC_COLORS = {
+    "Solar": "#FFB300", "Wind": "#1E88E5", "Hydro": "#43A047",
+    "Bioenergy": "#8E24AA", "Geothermal": "#E53935",
+    "Marine": "#00ACC1", "Unknown": "#78909C"
+}
+MODES = ("none", "changed", "all")
+MANIFEST = ".manifest.json"
+PLOT_VERSION = 1            # bump to redraw every chart (e.g. after a matplotlib/seaborn upgrade)
+
+_plt = None
+
+
+def _pyplot():
+    """``(plt, ticker, sns)`` with the Agg backend and the project theme (imported once per process)."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as ticker
+        import seaborn as sns
+
+        sns.set_theme(style="darkgrid", palette="viridis")
+        plt.rcParams.update({"figure.dpi": 130, "savefig.bbox": "tight"})
+        _plt = (plt, ticker, sns)
+    return _plt
+
+
+def _mw(ticker):
+    return ticker.FuncFormatter(lambda x, _: f"{x:,.0f}")
+
+
+# ═══════════════════════════════════════════════════════════════
+# ANALYSIS CHARTS
+# ═══════════════════════════════════════════════════════════════
+def chart_capacity_by_source(cap_by_source, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sources = list(cap_by_source.keys())[:8]
+    vals = [cap_by_source[s] for s in sources]
+    colors = [SRC_COLORS.get(s, "#666") for s in sources]
+    ax.bar(sources, vals, color=colors, edgecolor="white", linewidth=0.8)
+    ax.set_title("Total Installed Capacity by Energy Source", fontsize=14, fontweight="bold")
+    ax.set_ylabel("Capacity (MW)")
+    ax.yaxis.set_major_formatter(_mw(ticker))
+    plt.xticks(rotation=30, ha="right")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_capacity_by_country(cap_by_country, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    countries = list(cap_by_country.keys())
+    vals = list(cap_by_country.values())
+    ax.barh(countries, vals, color=sns.color_palette("mako", len(countries)), edgecolor="white")
+    ax.set_title("Total Installed Capacity by Country", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Capacity (MW)")
+    ax.xaxis.set_major_formatter(_mw(ticker))
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_yearly_commissioning(yc, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax1 = plt.subplots(figsize=(12, 5))
+    ax1.bar(yc["years"], yc["total_MW"], color="#38bdf8", alpha=0.6, label="Total MW")
+    ax1.set_xlabel("Year")
+    ax1.set_ylabel("Capacity Added (MW)", color="#38bdf8")
+    ax2 = ax1.twinx()
+    ax2.plot(yc["years"], yc["plant_count"], color="#f59e0b", linewidth=2, marker="o", markersize=4, label="Plant Count")
+    ax2.set_ylabel("Number of Plants", color="#f59e0b")
+    ax1.set_title("Yearly Renewable Energy Commissioning Trend", fontsize=14, fontweight="bold")
+    fig.legend(loc="upper left", bbox_to_anchor=(0.12, 0.88))
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_de_capacity_growth(de_trends, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 5))
+    for label, d in de_trends.items():
+        ax.plot(d["years"], d["values"], marker="o", markersize=4, linewidth=2, label=label.replace("DE_", "").replace("_", " ").title())
+    ax.set_title("Germany — Renewable Capacity Growth Over Time", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Installed Capacity (MW)")
+    ax.legend()
+    plt.xticks(rotation=45)
+    ax.yaxis.set_major_formatter(_mw(ticker))
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_source_country(cross, path):
+    import pandas as pd
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.heatmap(pd.DataFrame(cross["data"], index=cross["sources"], columns=cross["countries"]),
+                annot=True, fmt=".0f", cmap="YlOrRd", linewidths=0.5, ax=ax,
+                cbar_kws={"label": "Capacity (MW)"})
+    ax.set_title("Installed Capacity: Source × Country (MW)", fontsize=14, fontweight="bold")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_de_correlation(corr, path):
+    import pandas as pd
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 7))
+    labels = corr["labels"]
+    sns.heatmap(pd.DataFrame(corr["data"], index=labels, columns=labels),
+                annot=True, fmt=".2f", cmap="coolwarm", center=0,
+                linewidths=0.5, ax=ax, cbar_kws={"shrink": 0.8})
+    ax.set_title("Germany — Capacity Source Correlation", fontsize=14, fontweight="bold")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_plants_by_country(plants_per_country, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(7, 7))
+    ax.pie(plants_per_country.values(), labels=plants_per_country.keys(),
+           autopct="%1.1f%%", startangle=140,
+           colors=sns.color_palette("Set2", len(plants_per_country)),
+           wedgeprops={"edgecolor": "white", "linewidth": 1.5})
+    ax.set_title("Distribution of Plants by Country", fontsize=14, fontweight="bold")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_technology_distribution(tech_counts, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    techs = list(tech_counts.keys())[:8]
+    tvals = [tech_counts[t] for t in techs]
+    ax.barh(techs, tvals, color=sns.color_palette("rocket", len(techs)), edgecolor="white")
+    ax.set_title("Top 10 Technologies by Number of Plants", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Number of Plants")
+    ax.invert_yaxis()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def analysis_charts(report):
+    """``(filename, chart, data)`` of every analysis chart of ``analysis_report.json``."""
+    specs = [
+        ("bar_capacity_by_source.png", chart_capacity_by_source, report["total_capacity_by_source_MW"]),
+        ("bar_capacity_by_country.png", chart_capacity_by_country, report["total_capacity_by_country_MW"]),
+        ("line_yearly_commissioning.png", chart_yearly_commissioning, report["yearly_commissioning"]),
+        ("line_de_capacity_growth.png", chart_de_capacity_growth,
+         {k: v for k, v in report["capacity_timeseries_yearly"].items() if k.startswith("DE_")}),
+        ("heatmap_source_country.png", chart_source_country, report["source_country_matrix"]),
+    ]
+    if "de_correlation_matrix" in report:
+        specs.append(("heatmap_de_correlation.png", chart_de_correlation, report["de_correlation_matrix"]))
+    specs += [
+        ("pie_plants_by_country.png", chart_plants_by_country, report["plants_per_country"]),
+        ("bar_technology_distribution.png", chart_technology_distribution, report["plants_by_technology_top10"]),
+    ]
+    return specs
+
+
+# ═══════════════════════════════════════════════════════════════
+# PREDICTION CHARTS
+# ═══════════════════════════════════════════════════════════════
+def chart_de_prediction(de_series, path):
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(14, 6))
+    colors_de = {"DE Solar": "#FFB300", "DE Wind Onshore": "#1E88E5", "DE Wind Offshore": "#00ACC1", "DE Bioenergy": "#8E24AA"}
+
+    for label, d in de_series.items():
+        ax.plot(d["actual_years"], d["actual_values"], "o-", color=colors_de.get(label, "#666"),
+                markersize=4, linewidth=2, label=f"{label} (actual)")
+        ax.plot(d["forecast_years"], d["forecast_values"], "o--", color=colors_de.get(label, "#666"),
+                markersize=4, linewidth=2, alpha=0.7, label=f"{label} (forecast)")
+
+    ax.axvline(x=2020, color="#f43f5e", linestyle=":", linewidth=1.5, alpha=0.7, label="Forecast starts")
+    ax.set_title("Germany — Renewable Capacity Forecast to 2030", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Installed Capacity (MW)")
+    ax.yaxis.set_major_formatter(_mw(ticker))
+    ax.legend(fontsize=8, ncol=2)
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_other_predictions(other_series, path):
+    plt, ticker, sns = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    other_list = list(other_series.items())
+    palette = ["#06b6d4", "#f59e0b", "#10b981", "#f43f5e"]
+
+    for idx, (ax, (label, d)) in enumerate(zip(axes.flat, other_list)):
+        ax.plot(d["actual_years"], d["actual_values"], "o-", color=palette[idx], markersize=4, linewidth=2, label="Actual")
+        ax.plot(d["forecast_years"], d["forecast_values"], "o--", color=palette[idx], markersize=4, linewidth=2, alpha=0.7, label="Forecast")
+        ax.axvline(x=max(d["actual_years"]), color="#f43f5e", linestyle=":", linewidth=1, alpha=0.5)
+        ax.set_title(f"{label} — Forecast to 2030", fontsize=11, fontweight="bold")
+        ax.set_ylabel("MW")
+        ax.yaxis.set_major_formatter(_mw(ticker))
+        ax.legend(fontsize=8)
+
+    # Hide unused subplots
+    for i in range(len(other_list), 4):
+        axes.flat[i].set_visible(False)
+
+    fig.suptitle("Renewable Capacity Forecasts — Other Countries", fontsize=14, fontweight="bold", y=1.01)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def chart_2020_vs_2030(summary, path):
+    import numpy as np
+    plt, ticker, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    x = np.arange(len(summary["labels"]))
+    w = 0.35
+    ax.bar(x - w/2, summary["2020"], w, label="2020 (Actual)", color="#38bdf8", edgecolor="white")
+    ax.bar(x + w/2, summary["2030"], w, label="2030 (Predicted)", color="#a78bfa", edgecolor="white")
+    ax.set_xticks(x)
+    ax.set_xticklabels(summary["labels"], rotation=35, ha="right", fontsize=9)
+    ax.set_title("2020 vs 2030 — Installed Capacity Comparison", fontsize=14, fontweight="bold")
+    ax.set_ylabel("Capacity (MW)")
+    ax.yaxis.set_major_formatter(_mw(ticker))
+    ax.legend()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def prediction_charts(predictions):
+    """``(filename, chart, data)`` of every forecast chart of ``predictions.json``."""
+    plotted = ("actual_years", "actual_values", "forecast_years", "forecast_values")
+    de_series = {k: {f: v[f] for f in plotted} for k, v in predictions.items()
+                 if k.startswith("DE ") and "forecast_years" in v}
+    other_series = {k: {f: v[f] for f in plotted} for k, v in predictions.items()
+                    if not k.startswith("DE ") and k != "commissioning_forecast" and "forecast_years" in v}
+    pred_labels = [k for k in predictions if k != "commissioning_forecast" and "predicted_2030_MW" in predictions[k]]
+    summary = {"labels": pred_labels,
+               "2020": [predictions[k]["latest_actual_MW"] for k in pred_labels],
+               "2030": [predictions[k]["predicted_2030_MW"] for k in pred_labels]}
+    return [
+        ("prediction_de_combined.png", chart_de_prediction, de_series),
+        ("prediction_other_countries.png", chart_other_predictions, dict(list(other_series.items())[:4])),
+        ("prediction_2020_vs_2030.png", chart_2020_vs_2030, summary),
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════
+# RENDERING
+# ═══════════════════════════════════════════════════════════════
+_module_source = None
+
+
+def chart_key(chart, data):
+    """Hash of the plotted data, the chart's code and this module — changes whenever the PNG would."""
+    global _module_source
+    if _module_source is None:
+        _module_source = inspect.getsource(inspect.getmodule(chart_key)).encode()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{PLOT_VERSION}".encode())
+    h.update(_module_source)
+    h.update(inspect.getsource(chart).encode())
+    h.update(json.dumps(data, default=str).encode())
+    return h.hexdigest()
+
+
+def _load_manifest(charts_dir):
+    try:
+        with open(os.path.join(charts_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(charts_dir, manifest):
+    path = os.path.join(charts_dir, MANIFEST)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _draw(job):
+    chart, data, path = job
+    chart(data, path)
+    return path
+
+
+def render(specs, charts_dir, mode="changed", workers=None):
+    """Draw the ``(filename, chart, data)`` specs into ``charts_dir``.
+
+    ``mode="changed"`` skips every chart whose PNG exists and whose key
+    matches the manifest; ``"all"`` redraws everything; ``"none"`` draws
+    nothing.  Charts are drawn in up to ``workers`` processes (default: one
+    per chart, capped at the CPU count).  Returns ``(drawn, skipped)``.
+    """
+    if mode == "none":
+        return 0, len(specs)
+    os.makedirs(charts_dir, exist_ok=True)
+    manifest = _load_manifest(charts_dir)
+    jobs, keys = [], {}
+    for fname, chart, data in specs:
+        path = os.path.join(charts_dir, fname)
+        keys[fname] = chart_key(chart, data)
+        if mode == "changed" and manifest.get(fname) == keys[fname] and os.path.exists(path):
+            continue
+        jobs.append((chart, data, path))
+
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_draw, jobs))
+    else:
+        for job in jobs:
+            _draw(job)
+
+    # Re-read so concurrent stages writing into the same directory are kept
+    manifest = _load_manifest(charts_dir)
+    manifest.update(keys)
+    _save_manifest(charts_dir, manifest)
+    return len(jobs), len(specs) - len(jobs)
@@ -0,0 +1,322 @@
+"""
+Batched Polynomial Fitting
+==========================
+Closed-form least-squares polynomial fits for many series at once.
+
+Series are stacked into ``(S, T)`` arrays with a boolean mask marking the
+observations each series actually has (different start years, gaps), and
+every degree of every series is solved in a single batched
+``np.linalg.solve`` over the normal equations.  Years are centred and
+scaled per series first, which keeps the systems well conditioned without
+changing the fitted curve.  R², the penalised degree selection, forecasts
+and the non-negative / monotone clamp are all array operations, so the
+cost grows with the data size, not with Python-level loops per series.
+"""
+
+import numpy as np
+
+DEGREES = (1, 2)
+DEGREE_PENALTY = 0.005      # adj R² = R² − (degree − 1) · penalty
+
+
+def _powers(u, p):
+    """Vandermonde stack ``u**0 … u**(p-1)`` along a new last axis."""
+    return u[..., None] ** np.arange(p)
+
+
+class PolyFit:
+    """Coefficients and in-sample scores of a batched fit (see :func:`fit_polynomials`)."""
+
+    def __init__(self, degrees, center, scale, coef, r2, n):
+        self.degrees = tuple(degrees)
+        self.center = center        # (S,)   per-series x offset
+        self.scale = scale          # (S,)   per-series x scale
+        self.coef = coef            # (D, S, p) — zero beyond each degree
+        self.r2 = r2                # (D, S)
+        self.n = n                  # (S,)   observations per series
+
+    def select(self, penalty=DEGREE_PENALTY):
+        """Best degree per series by penalised R² (ties go to the lower degree).
+
+        Returns ``(index, adj_r2)`` where ``index`` points into ``degrees``.
+        """
+        adj = self.r2 - penalty * (np.asarray(self.degrees)[:, None] - 1)
+        best = np.argmax(adj, axis=0)
+        return best, adj[best, np.arange(adj.shape[1])]
+
+    def predict(self, x, which):
+        """Evaluate degree ``degrees[which[s]]`` of each series at ``x``.
+
+        ``x`` is ``(G,)`` (shared grid) or ``(S, G)``; returns ``(S, G)``.
+        """
+        S = len(self.center)
+        x = np.broadcast_to(np.asarray(x, dtype="float64"), (S, np.shape(x)[-1]))
+        u = (x - self.center[:, None]) / self.scale[:, None]
+        coef = self.coef[np.asarray(which), np.arange(S)]
+        return np.einsum("sgp,sp->sg", _powers(u, coef.shape[1]), coef)
+
+
+def _solve(G, b, n, degrees):
+    """Coefficients ``(D, S, p)`` of every degree from the normal equations ``G c = b``.
+
+    One batched solve for all degrees: degree d uses the leading (d+1)×(d+1)
+    block, the unused tail is replaced by an identity with a zero RHS.
+    Also returns ``ok`` (D, S): the series has at least d + 1 observations.
+    """
+    S, p = b.shape
+    D = len(degrees)
+    A = np.broadcast_to(G, (D, S, p, p)).copy()
+    rhs = np.broadcast_to(b, (D, S, p)).copy()
+    ok = np.empty((D, S), dtype=bool)
+    for i, d in enumerate(degrees):
+        A[i, :, d + 1:, :] = 0.0
+        A[i, :, :, d + 1:] = 0.0
+        A[i, :, np.arange(d + 1, p), np.arange(d + 1, p)] = 1.0
+        rhs[i, :, d + 1:] = 0.0
+        ok[i] = n >= d + 1
+    A[~ok] = np.eye(p)
+    rhs[~ok] = 0.0
+    return np.linalg.solve(A, rhs[..., None])[..., 0], ok
+
+
+def _scaling(x, M):
+    """Per-series centre and scale mapping the observed x onto roughly [-1, 1]."""
+    n = M.sum(axis=1)
+    center = np.where(M, x, 0.0).sum(axis=1) / np.maximum(n, 1)
+    lo = np.where(M, x, np.inf).min(axis=1)
+    hi = np.where(M, x, -np.inf).max(axis=1)
+    return center, np.where(np.isfinite(hi - lo) & (hi > lo), (hi - lo) / 2, 1.0)
+
+
+def fit_polynomials(x, Y, M, degrees=DEGREES):
+    """Least-squares fit of every degree in ``degrees`` to every row of ``Y``.
+
+    ``x`` is ``(T,)`` or ``(S, T)``; ``Y`` and the boolean mask ``M`` are
+    ``(S, T)``.  Masked-out cells are ignored (they may hold NaN).  Series
+    with fewer than ``degree + 1`` observations get R² = −inf for that degree.
+    """
+    Y = np.asarray(Y, dtype="float64")
+    M = np.asarray(M, dtype=bool)
+    S = Y.shape[0]
+    x = np.broadcast_to(np.asarray(x, dtype="float64"), Y.shape)
+    Mf = M.astype("float64")
+    n = M.sum(axis=1)
+
+    safe_n = np.maximum(n, 1)
+    center, scale = _scaling(x, M)
+    u = np.where(M, (x - center[:, None]) / scale[:, None], 0.0)
+    Yz = np.where(M, Y, 0.0)
+
+    p = max(degrees) + 1
+    P = _powers(u, p)                                       # (S, T, p)
+    G = np.einsum("st,stp,stq->spq", Mf, P, P)              # (S, p, p)
+    b = np.einsum("st,stp->sp", Mf * Yz, P)                 # (S, p)
+    coef, ok = _solve(G, b, n, degrees)
+
+    fitted = np.einsum("stp,dsp->dst", P, coef)
+    ss_res = (Mf * (Yz - fitted) ** 2).sum(axis=2)
+    mean = Yz.sum(axis=1) / safe_n
+    ss_tot = (Mf * (Yz - mean[:, None]) ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = 1 - ss_res / ss_tot
+    # Constant series: r2_score convention (1 for a perfect fit, else 0)
+    r2 = np.where(ss_tot > 0, r2, np.where(ss_res <= 1e-12 * np.maximum(1, ss_tot), 1.0, 0.0))
+    r2 = np.where(ok, r2, -np.inf)
+    return PolyFit(degrees, center, scale, coef, r2, n)
+
+
+class PolyMoments:
+    """Running sufficient statistics of :func:`fit_polynomials`, one row per series.
+
+    A fit up to degree d only needs the power sums Σuᵏ (k ≤ 2d), Σy·uᵏ
+    (k ≤ d) and Σy² of a series' observations, u = (x − center) / scale.
+    :meth:`add` adds (or, with ``sign=-1``, removes) observations in time
+    proportional to their number; :meth:`fit` solves the same normal
+    equations from the sums — the same curves and R² (up to rounding)
+    without revisiting the data.  ``center`` / ``scale`` stay fixed once a
+    series has observations, so the sums remain additive.
+    """
+
+    def __init__(self, center, scale, degrees=DEGREES):
+        self.degrees = tuple(degrees)
+        p = max(degrees) + 1
+        self.center = np.array(center, dtype="float64")
+        self.scale = np.array(scale, dtype="float64")
+        S = len(self.center)
+        self.su = np.zeros((S, 2 * p - 1))      # Σ uᵏ
+        self.sy = np.zeros((S, p))              # Σ y·uᵏ
+        self.syy = np.zeros(S)                  # Σ y²
+        self.n = np.zeros(S, dtype=np.int64)
+
+    @classmethod
+    def of(cls, x, Y, M, degrees=DEGREES):
+        """Moments of every row of ``Y`` (mask ``M``), centred and scaled like :func:`fit_polynomials`."""
+        M = np.asarray(M, dtype=bool)
+        x = np.broadcast_to(np.asarray(x, dtype="float64"), M.shape)
+        moments = cls(*_scaling(x, M), degrees)
+        moments.add(x, Y, M)
+        return moments
+
+    def add(self, x, Y, M, rows=None, sign=1):
+        """Add (``sign=-1``: remove) the observations ``Y[M]`` at ``x`` of the series ``rows`` (default all)."""
+        rows = np.arange(len(self.n)) if rows is None else np.asarray(rows)
+        M = np.asarray(M, dtype=bool)
+        x = np.broadcast_to(np.asarray(x, dtype="float64"), M.shape)
+        # Series seeing their first observations are centred on them
+        fresh = (self.n[rows] == 0) & M.any(axis=1) & (sign > 0)
+        if fresh.any():
+            self.center[rows[fresh]], self.scale[rows[fresh]] = _scaling(x[fresh], M[fresh])
+        u = np.where(M, (x - self.center[rows, None]) / self.scale[rows, None], 0.0)
+        w = np.where(M, float(sign), 0.0)
+        Yz = np.where(M, Y, 0.0)
+        U = _powers(u, self.su.shape[1])
+        self.su[rows] += np.einsum("st,stk->sk", w, U)
+        self.sy[rows] += np.einsum("st,stk->sk", w * Yz, U[..., :self.sy.shape[1]])
+        self.syy[rows] += (w * Yz * Yz).sum(axis=1)
+        self.n[rows] += sign * M.sum(axis=1)
+
+    def fit(self, rows=None):
+        """:class:`PolyFit` of the series ``rows`` (default all) from their moments."""
+        rows = np.arange(len(self.n)) if rows is None else np.asarray(rows)
+        su, b, syy, n = self.su[rows], self.sy[rows], self.syy[rows], self.n[rows]
+        p = b.shape[1]
+        G = su[:, np.add.outer(np.arange(p), np.arange(p))]     # Hankel matrix of the power sums
+        coef, ok = _solve(G, b, n, self.degrees)
+        # ss_res = Σy² − 2 c·b + cᵀGc; differences below the rounding noise of Σy² are zero
+        ss_res = syy - 2 * np.einsum("dsp,sp->ds", coef, b) + np.einsum("dsp,spq,dsq->ds", coef, G, coef)
+        ss_tot = syy - b[:, 0] ** 2 / np.maximum(n, 1)
+        tol = 1e-10 * np.maximum(syy, 1.0)
+        ss_res = np.where(ss_res > tol, ss_res, 0.0)
+        ss_tot = np.where(ss_tot > tol, ss_tot, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = 1 - ss_res / ss_tot
+        r2 = np.where(ss_tot > 0, r2, np.where(ss_res <= 1e-12 * np.maximum(1, ss_tot), 1.0, 0.0))
+        r2 = np.where(ok, r2, -np.inf)
+        return PolyFit(self.degrees, self.center[rows], self.scale[rows], coef, r2, n)
+
+
+def last_observed(x, Y, M):
+    """``(x, y)`` of the last observation of each series (``-inf``/NaN if none)."""
+    x = np.broadcast_to(np.asarray(x, dtype="float64"), np.shape(Y))
+    S, T = np.shape(Y)
+    idx = T - 1 - np.argmax(M[:, ::-1], axis=1)
+    has = M.any(axis=1)
+    rows = np.arange(S)
+    return (np.where(has, x[rows, idx], -np.inf),
+            np.where(has, np.asarray(Y, dtype="float64")[rows, idx], np.nan))
+
+
+def clamp_monotone(pred, x, last_x, last_y):
+    """Non-negative forecasts that never drop below the running maximum.
+
+    Installed capacity only grows: every point after ``last_x`` is raised to
+    at least ``last_y`` and to every earlier forecast point.
+    """
+    pred = np.maximum(pred, 0)
+    x = np.broadcast_to(np.asarray(x, dtype="float64"), pred.shape)
+    fore = x > np.asarray(last_x)[:, None]
+    running = np.maximum.accumulate(np.where(fore, pred, -np.inf), axis=1)
+    return np.where(fore, np.maximum(running, np.asarray(last_y)[:, None]), pred)
+
+
+def forecast_series(x, Y, predict_to, degrees=DEGREES, penalty=DEGREE_PENALTY, min_points=4, grid=None):
+    """Fit, select and forecast a batch of series on a grid up to ``predict_to``.
+
+    ``x`` is any increasing time axis in years — integer years, or
+    fractional years for monthly / daily data.  The forecast ``grid``
+    defaults to every integer year from the first one to ``predict_to``.
+
+    Points that are NaN or ≤ 0 are ignored; series with fewer than
+    ``min_points`` usable points are left out (``keep`` is False).  Returns
+    a dict of arrays over the kept series: ``x``, ``Y``/``M`` (data and mask),
+    ``degree`` and ``r2`` (penalised) of the selected model, ``grid`` and
+    the clamped predictions ``pred`` on it, ``first_x``, ``last_x`` and
+    ``last_y``.
+    """
+    x = np.asarray(x)
+    Y = np.asarray(Y, dtype="float64")
+    M = np.isfinite(Y) & (Y > 0)
+    keep = M.sum(axis=1) >= min_points
+    Y, M = Y[keep], M[keep]
+
+    fit = fit_polynomials(x, Y, M, degrees=degrees)
+    best, best_r2 = fit.select(penalty)
+    if grid is None:
+        grid = np.arange(int(x.min()), predict_to + 1)
+    last_x, last_y = last_observed(x, Y, M)
+    return {
+        "keep": keep, "x": x, "Y": Y, "M": M, "fit": fit,
+        "degree": np.asarray(degrees)[best], "r2": best_r2,
+        "grid": grid, "pred": clamp_monotone(fit.predict(grid, best), grid, last_x, last_y),
+        "first_x": np.where(M, x, np.inf).min(axis=1), "last_x": last_x, "last_y": last_y,
+    }
+
+
+def regrid(fc, grid):
+    """A :func:`forecast_series` result with its clamped predictions on another ``grid``.
+
+    The fit and degree choice are kept — e.g. to extend a fitted model to
+    a later horizon without refitting.
+    """
+    which = np.searchsorted(fc["fit"].degrees, fc["degree"])
+    pred = clamp_monotone(fc["fit"].predict(grid, which), grid, fc["last_x"], fc["last_y"])
+    return {**fc, "grid": grid, "pred": pred}
+
+
+def bootstrap_paths(fc, n_samples=2000, seed=0):
+    """Residual-bootstrap sample paths of every series in a :func:`forecast_series` result.
+
+    Each sample resamples the in-sample residuals of the selected model onto
+    the fitted curve, refits that degree, and clamps the refitted curve like
+    the point forecast.  All series × samples are refitted in one batch.
+
+    Observation noise (one more resampled residual per grid point) enters
+    after ``last_x`` as a cumulative increment: each step adds the curve's
+    rise plus the change in noise, floored at zero, on top of ``last_y``.
+    Every path is therefore non-negative and monotone from ``last_y``, and
+    without the floor it would be exactly curve + noise — no running
+    maximum of the noisy levels.  Points up to ``last_x`` are curve + noise,
+    floored at zero.  Returns ``(S, n_samples, G)``.
+    """
+    rng = np.random.default_rng(seed)
+    x, Y, M, fit = fc["x"], fc["Y"], fc["M"], fc["fit"]
+    S, T = Y.shape
+    which = np.searchsorted(fit.degrees, fc["degree"])
+    fitted = fit.predict(np.broadcast_to(x, Y.shape), which)
+    resid = np.where(M, Y - fitted, 0.0)
+
+    # Positions of the observed points first, so a draw in [0, n) picks one
+    n = M.sum(axis=1)
+    observed = np.argsort(~M, axis=1, kind="stable")
+
+    def draw(shape):
+        k = (rng.random((S, *shape)) * n.reshape(S, *([1] * len(shape)))).astype(int)
+        pos = np.take_along_axis(observed, k.reshape(S, -1), axis=1)
+        return np.take_along_axis(resid, pos, axis=1).reshape(S, *shape)
+
+    Yb = np.where(M[:, None, :], fitted[:, None, :] + draw((n_samples, T)), np.nan)
+    Mb = np.broadcast_to(M[:, None, :], Yb.shape)
+    refit = fit_polynomials(x, Yb.reshape(S * n_samples, T), Mb.reshape(S * n_samples, T),
+                            degrees=fit.degrees)
+    grid = fc["grid"]
+    rep = lambda a: np.repeat(a, n_samples)
+    curves = clamp_monotone(refit.predict(grid, np.repeat(which, n_samples)), grid, rep(fc["last_x"]),
+                            rep(fc["last_y"])).reshape(S, n_samples, len(grid))
+    noise = draw((n_samples, len(grid)))
+
+    # After last_x: last_y + running sum of increments, each floored at zero.
+    # The first increment is the curve's rise over last_y plus one residual;
+    # later ones are the curve's own (non-negative) rises, so that residual
+    # is carried through the horizon instead of re-drawn per point.
+    last_y = fc["last_y"][:, None, None]
+    fore = (grid > fc["last_x"][:, None])[:, None, :]
+    first = fore & ~np.pad(fore[:, :, :-1], ((0, 0), (0, 0), (1, 0)))
+    rise = np.diff(np.where(fore, curves, last_y), axis=2, prepend=last_y.repeat(n_samples, axis=1))
+    step = np.maximum(rise + np.where(first, noise, 0), 0)
+    return np.where(fore, last_y + np.cumsum(step, axis=2), np.maximum(curves + noise, 0))
+
+
+def prediction_intervals(fc, quantiles=(10, 50, 90), n_samples=2000, seed=0):
+    """Percentile bands of :func:`bootstrap_paths` → ``{q: (S, G) array}``."""
+    bands = np.percentile(bootstrap_paths(fc, n_samples, seed), quantiles, axis=1)
+    return dict(zip(quantiles, bands))
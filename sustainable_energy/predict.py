@@ -0,0 +1,321 @@
+"""
+Renewable Energy Capacity Predictions → 2030
+=============================================
+Uses OPSD timeseries data (2000–2020) to predict installed capacity
+growth through 2030 for key country+source combinations.
+
+Models used:
+  • Polynomial Regression (degree 2)
+  • Linear Regression
+  • Best fit selected per series via R² score
+  (all series and degrees solved in one batch — see poly_fit.py)
+
+Outputs:
+  • predictions.json, and the dashboard data bundle (bundle.py)
+  • prediction charts in charts/ (--charts none|changed|all)
+  • P10/P50/P90 bands per series from a residual bootstrap (--samples)
+  • --all-series: every *_capacity column → predictions_store.sqlite
+  • --resolution monthly|daily: fits on monthly / daily observations and
+    forecasts at that resolution → predictions_store.sqlite
+  • run_metrics.json: per-stage and per-series timings (--profile: cProfile)
+
+Fits are cached per series (fit_cache.py): a rerun only refits series
+whose yearly / monthly / daily data changed, and reports hits and misses.
+"""
+
+import os, json, time
+import numpy as np
+import pandas as pd
+
+from . import bundle, load
+from .fit_cache import FitCache, forecast_cached
+from .forecast_store import SERIES, ForecastStore, capacity_columns
+from .metrics import RunMetrics
+from .paths import PRED_FILE, STORE, REPORT, CHARTS
+from .poly_fit import DEGREES, DEGREE_PENALTY, fit_polynomials, forecast_series, prediction_intervals
+
+PREDICT_TO = 2030
+
+
+def _forecast(x, Y, names, cache, **kw):
+    """:func:`forecast_series`, through the fit cache when there is one."""
+    if cache is None:
+        return forecast_series(x, Y, PREDICT_TO, degrees=DEGREES, penalty=DEGREE_PENALTY, **kw)
+    return forecast_cached(cache, x, Y, PREDICT_TO, names, degrees=DEGREES, penalty=DEGREE_PENALTY, **kw)
+
+
+def forecast_entry(fc, i, bands=None, x_labels=None, grid_labels=None, predict_to=PREDICT_TO):
+    """The ``predictions.json`` entry of series ``i`` of a :func:`forecast_series` result.
+
+    Yearly axes give ``*_years`` keys with integer years.  For monthly /
+    daily forecasts pass the period strings of ``fc["x"]`` and
+    ``fc["grid"]`` — the keys become ``*_periods``.  ``bands`` are
+    :func:`prediction_intervals` of the same result.
+    """
+    yearly = grid_labels is None
+    key, conv = ("years", int) if yearly else ("periods", str)
+    x_labels = fc["x"] if x_labels is None else x_labels
+    grid = fc["grid"]
+    grid_labels = grid if yearly else np.asarray(grid_labels)
+    M = fc["M"][i]
+
+    in_range = grid >= fc["first_x"][i]
+    periods = [conv(p) for p in grid_labels[in_range]]
+    y_future = fc["pred"][i, in_range]
+    forecast_mask = grid[in_range] > fc["last_x"][i]
+    band = {q: b[i, in_range] for q, b in (bands or {}).items()}
+    # Last grid point of 2025 — the year itself, Dec 2025 or 31 Dec 2025
+    in_2025 = [j for j, p in enumerate(periods) if str(p)[:4] == "2025"]
+    at_2025 = in_2025[-1] if in_2025 else None
+
+    # Latest actual and end-of-horizon forecast
+    latest_actual = round(float(fc["last_y"][i]), 2)
+    val_end = round(float(y_future[-1]), 2)
+    growth_pct = round((val_end - latest_actual) / latest_actual * 100, 1) if latest_actual > 0 else 0
+    return {
+        f"actual_{key}": [conv(p) for p in np.asarray(x_labels)[M]],
+        "actual_values": [round(float(v), 2) for v in fc["Y"][i, M]],
+        f"all_{key}": periods,
+        "all_predicted": [round(float(v), 2) for v in y_future],
+        f"forecast_{key}": [p for p, f in zip(periods, forecast_mask) if f],
+        "forecast_values": [round(float(v), 2) for v in y_future[forecast_mask]],
+        "model_degree": int(fc["degree"][i]),
+        "r2_score": round(float(fc["r2"][i]), 4),
+        "latest_actual_MW": latest_actual,
+        "predicted_2025_MW": round(float(y_future[at_2025]), 2) if at_2025 is not None else None,
+        f"predicted_{predict_to}_MW": val_end,
+        f"growth_2020_to_{predict_to}_pct": growth_pct,
+        **{f"forecast_p{q}": [round(float(v), 2) for v in b[forecast_mask]] for q, b in band.items()},
+        **{f"predicted_2025_p{q}_MW": round(float(b[at_2025]), 2) if at_2025 is not None else None
+           for q, b in band.items()},
+        **{f"predicted_{predict_to}_p{q}_MW": round(float(b[-1]), 2) for q, b in band.items()},
+    }
+
+
+def forecast_dashboard(yearly, series=SERIES, samples=2000, log=print, metrics=None, cache=None):
+    """``predictions.json`` entries for ``series`` (label → column) from yearly snapshots.
+
+    Per-series entries go to ``metrics`` (fit time is the batch's, shared
+    evenly).  Series unchanged since they went into the ``cache`` (a
+    :class:`fit_cache.FitCache`) are not refitted.
+    """
+    predictions = {}
+
+    # Stack every series into (series × year) arrays; points that are NaN or
+    # ≤ 0 are masked out, series with < 4 usable points are skipped
+    years = yearly["year"].values.astype(int)
+    Y = yearly[list(series.values())].values.T.astype("float64")
+
+    # Degrees 1 and 2 only (degree 3 overfits on plateau data); degree 2 is
+    # penalised slightly to prefer simpler models.  Predictions run from the
+    # first year with data to PREDICT_TO, never negative and monotonically
+    # non-decreasing after the last actual point (installed capacity can only
+    # grow — plants aren't removed).  All series are solved in one batch.
+    t0 = time.perf_counter()
+    fc = _forecast(years, Y, list(series.values()), cache)
+    fit_s = (time.perf_counter() - t0) / max(int(fc["keep"].sum()), 1)
+
+    # P10/P50/P90 bands from a residual bootstrap: every series × sample is
+    # refitted in one batch; paths stay non-negative and monotone after the
+    # last actual point.  No bands with samples=0.
+    t0 = time.perf_counter()
+    bands = prediction_intervals(fc, quantiles=(10, 50, 90), n_samples=samples) if samples else None
+    boot_s = time.perf_counter() - t0
+    if bands:
+        log(f"   🎲 {samples} bootstrap samples per series in {boot_s:.2f}s")
+    boot_s /= max(int(fc["keep"].sum()), 1)
+
+    labels = []
+    for (label, col), keep, y in zip(series.items(), fc["keep"], Y):
+        if keep:
+            labels.append(label)
+        else:
+            n = int((np.isfinite(y) & (y > 0)).sum())
+            log(f"   ⚠️  {label}: Not enough data points ({n}), skipping")
+    for i, label in enumerate(labels):
+        entry = predictions[label] = forecast_entry(fc, i, bands)
+        if metrics is not None:
+            metrics.item("predict", label, rows_in=len(entry["actual_years"]),
+                         rows_out=len(entry["forecast_years"]), fit_s=round(fit_s, 6), bootstrap_s=round(boot_s, 6))
+        log(f"   ✅ {label}: degree={entry['model_degree']}, R²={fc['r2'][i]:.4f}, "
+            f"2020={entry['latest_actual_MW']:,.0f} MW → {PREDICT_TO}={entry[f'predicted_{PREDICT_TO}_MW']:,.0f} MW "
+            f"({entry[f'growth_2020_to_{PREDICT_TO}_pct']:+.1f}%)"
+            + (f", P10–P90 {bands[10][i, -1]:,.0f}–{bands[90][i, -1]:,.0f} MW" if bands else ""))
+    return predictions
+
+
+def commissioning_forecast(report):
+    """Degree-2 trend of the yearly commissioned MW (analysis report section 4g) to 2030."""
+    yc = report["yearly_commissioning"]
+
+    # Use data from 2005–2018 (stable growth period, avoid 2019-2020 incomplete data)
+    yr_data = pd.DataFrame({"year": yc["years"], "mw": yc["total_MW"]})
+    yr_data = yr_data[(yr_data["year"] >= 2005) & (yr_data["year"] <= 2018)]
+
+    y_yr = yr_data["mw"].values[None, :]
+    fit_yr = fit_polynomials(yr_data["year"].values, y_yr, np.ones_like(y_yr, dtype=bool), degrees=(2,))
+
+    future_yr = np.arange(2005, 2031)
+    y_yr_pred = np.maximum(fit_yr.predict(future_yr, [0])[0], 0)
+
+    return {
+        "actual_years": yc["years"],
+        "actual_MW": yc["total_MW"],
+        "forecast_years": future_yr.tolist(),
+        "forecast_MW": [round(float(v), 2) for v in y_yr_pred]
+    }
+
+
+def forecast_to_store(all_series=False, resolution="yearly", batch=256, use_cache=True, path=STORE,
+                      metrics=None, cache=None):
+    """Forecast every *_capacity column (or the dashboard series) into the indexed store.
+
+    Columns are read and fitted ``batch`` at a time, so only one batch is
+    ever in memory; series found unchanged in the fit ``cache`` are not
+    refitted.  Read / fit / store times accumulate as ``metrics`` stages.
+    """
+    metrics = metrics or RunMetrics("predict")
+    available = load.timeseries_columns(use_cache)
+    if all_series:
+        all_cols = capacity_columns(available)
+    else:
+        all_cols = [c for c in SERIES.values() if c in set(available)]
+    print(f"📥 {len(all_cols)} capacity columns at {resolution} resolution — "
+          f"forecasting in batches of {batch} ...")
+    store = ForecastStore(path)
+    n_done, skipped, written = 0, [], []
+    batches = [all_cols[i:i + batch] for i in range(0, len(all_cols), batch)]
+    for b, cols in enumerate(batches, 1):
+        with metrics.stage("read") as read:
+            rollup = load.load_rollup(cols, resolution, use_cache)
+            # Forecast grid: every period from the first observation to the end of PREDICT_TO
+            periods = pd.period_range(rollup.index[0], pd.Period(f"{PREDICT_TO}-12-31", load.FREQ[resolution]))
+            read.rows_out = rollup.size
+        with metrics.stage("fit", rows_in=rollup.size) as fit:
+            fc = _forecast(load.period_axis(rollup.index, resolution), rollup[cols].values.T, cols, cache,
+                           grid=load.period_axis(periods, resolution))
+        kept = [c for c, k in zip(cols, fc["keep"]) if k]
+        skipped += [c for c, k in zip(cols, fc["keep"]) if not k]
+        with metrics.stage("store", rows_in=len(kept) * len(periods)) as put:
+            store.write_batch(kept, fc, fit_ms=fit.wall_s * 1000 / max(len(kept), 1),
+                              periods=periods.astype(str), resolution=resolution)
+        n_done += len(kept)
+        written += kept
+        print(f"   ✅ batch {b}/{len(batches)}: {len(kept)} series × {len(rollup)} points — "
+              f"read {read.wall_s:.3f}s, fit {fit.wall_s:.3f}s, store {put.wall_s:.3f}s")
+    if all_series:
+        # Columns no longer in the file, or now too short to forecast
+        store.prune(resolution, written)
+    store.close()
+
+    timings = {name: metrics.stages[name]["wall_s"] for name in ("read", "fit", "store") if name in metrics.stages}
+    total = sum(timings.values())
+    per = 1000 / max(n_done, 1)
+    print(f"\n⏱️  {n_done} series in {total:.2f}s ({total * per:.2f} ms/series): "
+          f"read {timings.get('read', 0) * per:.3f} ms, fit {timings.get('fit', 0) * per:.3f} ms, "
+          f"store {timings.get('store', 0) * per:.3f} ms per series")
+    if skipped:
+        print(f"   ⚠️  {len(skipped)} series skipped (fewer than 4 data points): {', '.join(skipped[:10])}"
+              f"{' …' if len(skipped) > 10 else ''}")
+    if cache is not None:
+        print(f"♻️  Fit cache: {cache.summary()}")
+    print(f"💾 Forecast store saved → {path} (resolution={resolution})")
+
+
+def yearly_forecasts(metrics, samples=2000, use_cache=True, cache=None):
+    """Stages 1–2 of :func:`run`: the dashboard series' yearly snapshots and their forecasts."""
+    # ═══════════════════════════════════════════════════════════════
+    # 1. LOAD TIMESERIES
+    # ═══════════════════════════════════════════════════════════════
+    print("📥 Loading capacity timeseries ...")
+    with metrics.stage("load") as st:
+        # Only the series we forecast are read (columns missing from the file are skipped)
+        yearly = load.load_yearly(SERIES.values(), use_cache)
+        series = {k: v for k, v in SERIES.items() if v in yearly.columns}
+        st.rows_out = len(yearly) * len(series)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 2. MODEL & PREDICT
+    # ═══════════════════════════════════════════════════════════════
+    print("\n🔮 Building prediction models ...")
+    with metrics.stage("predict", rows_in=len(yearly) * len(series)):
+        predictions = forecast_dashboard(yearly, series, samples, metrics=metrics, cache=cache)
+    if cache is not None:
+        print(f"   ♻️  Fit cache: {cache.summary()}")
+    return predictions
+
+
+def save_predictions(predictions, path=PRED_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(predictions, f, indent=2, default=str)
+
+
+def _close_cache(cache, metrics):
+    """Record the fit cache's hit / miss counts and close it."""
+    if cache is not None:
+        metrics.info["fit_cache"] = {"hits": cache.hits, "misses": cache.misses}
+        cache.close()
+
+
+def run(all_series=False, resolution="yearly", batch=256, samples=2000, use_cache=True, charts="changed",
+        profile=False):
+    """The ``predict`` command; ``charts`` is a :data:`plot.MODES` value.
+
+    Stage metrics go to run_metrics.json (``profile`` adds a cProfile dump).
+    Without ``use_cache`` the fit cache is bypassed too and every series is
+    refitted.
+    """
+    metrics = RunMetrics("predict", profile)
+    metrics.info["options"] = {"all_series": all_series, "resolution": resolution, "batch": batch,
+                               "samples": samples}
+    cache = FitCache() if use_cache else None
+
+    # ═══════════════════════════════════════════════════════════════
+    # STORE MODE — every *_capacity column (--all-series) and/or
+    # monthly / daily resolution → indexed store
+    # ═══════════════════════════════════════════════════════════════
+    if all_series or resolution != "yearly":
+        forecast_to_store(all_series, resolution, batch, use_cache, metrics=metrics, cache=cache)
+        _close_cache(cache, metrics)
+        metrics.save()
+        return None
+
+    predictions = yearly_forecasts(metrics, samples, use_cache, cache)
+    _close_cache(cache, metrics)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 3. COMMISSIONING TREND PREDICTION
+    # ═══════════════════════════════════════════════════════════════
+    print("\n📈 Predicting yearly commissioning trend ...")
+    with metrics.stage("commissioning"):
+        with open(REPORT, encoding="utf-8") as f:
+            report = json.load(f)
+        predictions["commissioning_forecast"] = commissioning_forecast(report)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 4. SAVE PREDICTIONS
+    # ═══════════════════════════════════════════════════════════════
+    with metrics.stage("save"):
+        save_predictions(predictions)
+    print(f"\n💾 Predictions saved → {PRED_FILE}")
+
+    # ═══════════════════════════════════════════════════════════════
+    # 5. DASHBOARD BUNDLE
+    # ═══════════════════════════════════════════════════════════════
+    print("\n📦 Exporting the dashboard data bundle ...")
+    with metrics.stage("export"):
+        bundle.export(report, predictions, use_cache=use_cache)
+
+    # ═══════════════════════════════════════════════════════════════
+    # 6. GENERATE PREDICTION CHARTS
+    # ═══════════════════════════════════════════════════════════════
+    if charts != "none":
+        from .plot import prediction_charts, render
+        print("\n🎨 Generating prediction charts ...")
+        with metrics.stage("charts"):
+            drawn, skipped = render(prediction_charts(predictions), CHARTS, charts)
+        print(f"   {drawn} prediction charts saved → {os.path.basename(CHARTS)}/"
+              f"{f' ({skipped} unchanged, skipped)' if skipped else ''}")
+    metrics.save()
+    print("\n✅ Predictions complete!")
+    return predictions
@@ -0,0 +1,327 @@
+"""
+Timeseries Rollup Store
+=======================
+The capacity timeseries at every resolution, rolled up once.  Callers
+used to roll the daily frame up ad hoc — ``groupby(to_period(…)).last()``
+per forecast batch, ``resample("Y").last()`` per column in the report —
+each re-sorting and re-indexing the whole frame.  ``build`` instead:
+
+  1. reads and cleans the ``day`` column once (2000+, stable-sorted, so
+     the last row of a day is the last one in the file)
+  2. keys every row by its day / month / year and finds the first row of
+     every period
+  3. reads the capacity columns ``BATCH_COLS`` at a time and, for all
+     columns at once, forward-fills the row number of the last non-null
+     cell (``np.maximum.accumulate``) — the last value of every period at
+     every resolution is then one gather at the periods' last rows
+
+Each resolution is saved as a ``series × periods`` float64 .npy, plus the
+pandas period ordinals, under .opsd_cache/rollups/.  ``open_store`` maps
+the arrays read-only (``mmap_mode="r"``), so a script or server reading a
+few series only pages in those rows.  The store is rebuilt when the
+timeseries CSV changes and dropped by ``--rebuild-cache``.
+
+Rows appended to the CSV need no rebuild: ``read_appended`` parses only the
+bytes after the last rolled-up row and ``append`` writes their periods into
+the arrays in place (online.py).  Arrays are reallocated with ``GROWTH``
+spare periods when they fill up; ``meta.json`` holds the used length.
+"""
+
+import io, os, json, hashlib
+import numpy as np
+import pandas as pd
+
+from .clean import clean_timeseries, replace_dir
+from .csv_cache import appended_hash, cached_columns, enabled, read_cached, source_hash
+from .paths import ROLLUPS, TS_FILE
+
+# Resolution → pandas period frequency (the numpy datetime unit of the same name)
+FREQ = {"yearly": "Y", "monthly": "M", "daily": "D"}
+BATCH_COLS = 256
+STORE_VERSION = 2
+GROWTH = 1.25           # capacity (× periods) of an array reallocated by an append
+EDGE_BYTES = 4096       # CSV bytes before the rolled-up end re-checked before an append
+
+
+def filled_rows(values):
+    """Row of the last non-null value at or above each cell (−1 before the first), per column."""
+    rows = np.where(np.isnan(values), np.int32(-1), np.arange(len(values), dtype=np.int32)[:, None])
+    return np.maximum.accumulate(rows, axis=0, out=rows)
+
+
+def last_valid(values, filled, starts):
+    """Last non-null value of each column in every row group ``values[starts[i]:starts[i + 1]]``.
+
+    ``filled`` is :func:`filled_rows` of ``values`` — computed once, shared
+    by every resolution.
+    """
+    if len(starts) == len(values):
+        return values.copy()        # one row per period (daily)
+    ends = np.r_[starts[1:], len(values)] - 1
+    last = filled[ends]
+    out = np.take_along_axis(values, np.maximum(last, 0), axis=0)
+    out[last < starts[:, None]] = np.nan
+    return out
+
+
+def period_starts(days):
+    """``{resolution: (period ordinals, first row of each period)}`` of sorted ``datetime64`` days."""
+    out = {}
+    for res, unit in FREQ.items():
+        key = days.astype(f"datetime64[{unit}]").astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+        out[res] = (key[starts], starts)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# STORE
+# ═══════════════════════════════════════════════════════════════
+class RollupStore:
+    """Last value per day / month / year (2000+) of every capacity column.
+
+    ``values[resolution]`` is a ``series × periods`` array (memory-mapped
+    when opened from disk), ``periods[resolution]`` its period ordinals.
+    """
+
+    def __init__(self, columns, periods, values, rows, rows_clean, source=None, offset=None, edge=None,
+                 lineage=None):
+        self.columns = list(columns)
+        self.periods = periods
+        self.values = values
+        self.rows, self.rows_clean, self.source = rows, rows_clean, source
+        # CSV bytes rolled up, and the hash of the EDGE_BYTES before that point
+        self.offset, self.edge = offset, edge
+        # Source hash at the last full build — kept by appends, which only touch the last period onwards
+        self.lineage = lineage or source
+        self._pos = {c: i for i, c in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.columns)
+
+    def index(self, resolution="yearly"):
+        """The PeriodIndex (named ``day``) of one resolution."""
+        return pd.PeriodIndex.from_ordinals(self.periods[resolution], freq=FREQ[resolution]).rename("day")
+
+    def series(self, columns=None, resolution="yearly", start=0):
+        """``(columns, series × periods array)`` — requested columns missing from the store are skipped.
+
+        ``start`` drops the periods before it (only the rest is read).
+        """
+        if columns is None:
+            return list(self.columns), np.asarray(self.values[resolution][:, start:])
+        cols = [c for c in columns if c in self._pos]
+        return cols, self.values[resolution][[self._pos[c] for c in cols], start:]
+
+    def frame(self, columns=None, resolution="yearly"):
+        """Periods × ``columns`` frame — what ``groupby(day.to_period(freq)).last()`` gave."""
+        cols, vals = self.series(columns, resolution)
+        return pd.DataFrame(vals.T, index=self.index(resolution), columns=cols)
+
+    def latest(self, columns=None):
+        """Values of the last day, by column."""
+        cols, vals = self.series(columns, "daily")
+        return pd.Series(vals[:, -1] if vals.shape[1] else np.nan, index=cols, dtype=float)
+
+    def _save_meta(self, path):
+        meta = {"version": STORE_VERSION, "source": self.source, "rows": self.rows,
+                "rows_clean": self.rows_clean, "columns": self.columns, "offset": self.offset, "edge": self.edge,
+                "lineage": self.lineage, "length": {res: len(p) for res, p in self.periods.items()}}
+        tmp = os.path.join(path, f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path=ROLLUPS, mmap=True):
+        """The saved store (arrays memory-mapped), or None if missing or from another store version."""
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != STORE_VERSION:
+                return None
+            mode = "r" if mmap else None
+            # Arrays may hold spare periods past the used length
+            n = meta["length"]
+            values = {res: np.load(os.path.join(path, f"{res}.npy"), mmap_mode=mode)[:, :n[res]] for res in FREQ}
+            periods = {res: np.load(os.path.join(path, f"{res}_periods.npy"))[:n[res]] for res in FREQ}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(meta["columns"], periods, values, meta["rows"], meta["rows_clean"], meta["source"],
+                   meta["offset"], meta["edge"], meta["lineage"])
+
+
+# ═══════════════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════════════
+def build(columns=None, path=None, use_cache=True, batch=BATCH_COLS):
+    """Roll every capacity column (or only ``columns``) of the timeseries up to each resolution.
+
+    With ``path`` the arrays are written there (swapped in whole once
+    complete) and the store is returned memory-mapped; otherwise it is
+    built in memory.
+    """
+    # The CSV bytes rolled up (whole lines), so later appends can be read on their own
+    offset = _line_end(TS_FILE) if path else None
+    available = [c for c in cached_columns(TS_FILE, parse_dates=["day"], use_cache=use_cache) if c != "day"]
+    cols = available if columns is None else [c for c in columns if c in set(available)]
+    # Uncached reads parse the whole CSV every time — one batch then
+    batch = batch if use_cache and enabled() else max(len(cols), 1)
+
+    day = read_cached(TS_FILE, columns=["day"], parse_dates=["day"], use_cache=use_cache)
+    kept = clean_timeseries(day)
+    order = kept.index.to_numpy()
+    periods = period_starts(kept["day"].to_numpy(dtype="datetime64[ns]"))
+
+    tmp = f"{path}.{os.getpid()}.tmp" if path else None
+    if tmp:
+        os.makedirs(tmp, exist_ok=True)
+    values = {}
+    for res, (ordinals, _) in periods.items():
+        shape = (len(cols), len(ordinals))
+        values[res] = (np.lib.format.open_memmap(os.path.join(tmp, f"{res}.npy"), mode="w+", shape=shape)
+                       if tmp else np.empty(shape))
+    for i in range(0, len(cols), batch):
+        part = cols[i:i + batch]
+        df = read_cached(TS_FILE, columns=part, parse_dates=["day"], use_cache=use_cache)
+        block = df[part].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        if not len(block):
+            continue
+        filled = filled_rows(block)
+        for res, (_, starts) in periods.items():
+            values[res][i:i + len(part)] = last_valid(block, filled, starts).T
+
+    store = RollupStore(cols, {res: p[0] for res, p in periods.items()}, values, len(day), len(kept),
+                        source_hash(TS_FILE) if path else None, offset, _edge_hash(TS_FILE, offset) if path else None)
+    if not tmp:
+        return store
+    for res, (ordinals, _) in periods.items():
+        values[res].flush()
+        np.save(os.path.join(tmp, f"{res}_periods.npy"), ordinals)
+    store._save_meta(tmp)
+    del values, store
+    replace_dir(tmp, path)
+    return RollupStore.load(path)
+
+
+# ═══════════════════════════════════════════════════════════════
+# APPEND
+# ═══════════════════════════════════════════════════════════════
+def _edge_hash(path, offset):
+    with open(path, "rb") as f:
+        f.seek(max(offset - EDGE_BYTES, 0))
+        return hashlib.blake2b(f.read(min(offset, EDGE_BYTES)), digest_size=12).hexdigest()
+
+
+def _line_end(path):
+    """Offset just past the last newline of ``path`` (a partial last line is re-read by the next append)."""
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - EDGE_BYTES, 0)
+            f.seek(start)
+            nl = f.read(end - start).rfind(b"\n")
+            if nl >= 0:
+                return start + nl + 1
+            end = start
+    return 0
+
+
+def read_appended(store, path=TS_FILE):
+    """Rows appended to the timeseries CSV since ``store`` last saw it — only the new bytes are parsed.
+
+    Returns ``(days, values, rows, offset)``: the cleaned rows' days and
+    ``rows × store columns`` values, the raw row count and the CSV offset
+    after them (a trailing partial line is left for the next call) — or
+    None when the file did not grow.  Raises ValueError when the file was
+    rewritten rather than appended to, or the new rows go back in time.
+    """
+    size = os.path.getsize(path)
+    if store.offset is None or size < store.offset or _edge_hash(path, store.offset) != store.edge:
+        raise ValueError("the timeseries CSV was rewritten, not appended to")
+    if size == store.offset:
+        return None
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(store.offset)
+        tail = f.read(size - store.offset)
+    tail = tail[:tail.rfind(b"\n") + 1]
+    if not tail.strip():        # no complete row yet
+        return np.empty(0, dtype="datetime64[ns]"), np.empty((0, len(store.columns))), 0, store.offset + len(tail)
+    names = list(pd.read_csv(io.BytesIO(header), nrows=0).columns)
+    missing = set(store.columns) - set(names)
+    if missing:
+        raise ValueError(f"the timeseries CSV lost {len(missing)} rolled-up column(s)")
+    raw = pd.read_csv(io.BytesIO(tail), header=None, names=names, usecols=["day", *store.columns])
+    ts = clean_timeseries(raw)
+    days = ts["day"].to_numpy(dtype="datetime64[ns]")
+    last = store.periods["daily"][-1] if len(store.periods["daily"]) else None
+    if len(days) and last is not None and days[0].astype("datetime64[D]").astype(np.int64) < last:
+        raise ValueError("appended rows go back before the last rolled-up day")
+    values = ts[store.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    return days, values, len(raw), store.offset + len(tail)
+
+
+def _put(path, res, start, ordinals, values):
+    """Write ``values`` (series × periods) and their ordinals at period ``start`` of one resolution's arrays."""
+    arr_path, per_path = os.path.join(path, f"{res}.npy"), os.path.join(path, f"{res}_periods.npy")
+    arr = np.load(arr_path, mmap_mode="r+")
+    per = np.load(per_path, mmap_mode="r+")
+    end = start + values.shape[1]
+    if end > arr.shape[1]:
+        # Full: copy into a larger array with spare periods (readers keep their old mapping)
+        cap = max(end, int(arr.shape[1] * GROWTH))
+        for name, old, shape in ((arr_path, arr, (arr.shape[0], cap)), (per_path, per, (cap,))):
+            tmp = f"{name}.{os.getpid()}.tmp"
+            new = np.lib.format.open_memmap(tmp, mode="w+", dtype=old.dtype, shape=shape)
+            new[..., :start] = old[..., :start]
+            new.flush()
+            del new
+            os.replace(tmp, name)
+        arr = np.load(arr_path, mmap_mode="r+")
+        per = np.load(per_path, mmap_mode="r+")
+    arr[:, start:end] = values
+    per[start:end] = ordinals
+    arr.flush()
+    per.flush()
+
+
+def append(store, days, values, rows, offset, path=ROLLUPS, source=TS_FILE):
+    """Fold appended timeseries rows (:func:`read_appended`) into the saved store, in place.
+
+    Per resolution, the rows' last value per period either updates the
+    store's last period (rows continuing it — a blank keeps the old value)
+    or is appended after it; earlier periods never change.  Returns the
+    reopened store.
+    """
+    if len(days):
+        filled = filled_rows(values)
+        for res, (ordinals, starts) in period_starts(days).items():
+            new = last_valid(values, filled, starts).T
+            n = len(store.periods[res])
+            start = n - 1 if n and ordinals[0] == store.periods[res][-1] else n
+            if start < n:
+                new[:, 0] = np.where(np.isnan(new[:, 0]), store.values[res][:, start], new[:, 0])
+            _put(path, res, start, ordinals, new)
+            store.periods[res] = np.r_[store.periods[res][:start], ordinals]
+    store.rows += rows
+    store.rows_clean += len(days)
+    store.source = appended_hash(source, store.source, store.offset)
+    store.offset, store.edge = offset, _edge_hash(source, offset)
+    store._save_meta(path)
+    return RollupStore.load(path)
+
+
+def open_store(columns=None, path=ROLLUPS, use_cache=True, log=print):
+    """The saved store if it matches the timeseries CSV; otherwise build and save it.
+
+    Without ``use_cache`` nothing is read from or written to disk: only
+    ``columns`` are rolled up, in memory.
+    """
+    if not use_cache:
+        return build(columns, use_cache=False)
+    store = RollupStore.load(path)
+    if store is not None and store.source == source_hash(TS_FILE):
+        return store
+    log("📚 Timeseries changed or no rollup store yet — building the rollups ...")
+    return build(path=path)
@@ -0,0 +1,396 @@
+"""
+Monte-Carlo Capacity Scenarios
+==============================
+What-if questions on the 2030 forecasts — "DE solar additions 20% above
+trend", "P(DE wind ≥ 70 GW by 2030)" — without editing predict.py.
+
+Every series is fitted once (the predict model, through the fit cache) and
+its residual-bootstrap paths (poly_fit.bootstrap_paths, the same draws as
+the P10/P50/P90 bands) are reduced to the capacity *added* after the last
+actual value at each scenario year.  A trajectory then picks one bootstrap
+path per series and scales its additions by the scenario multipliers:
+
+    capacity(year) = latest actual + multiplier × bootstrap additions(year)
+
+Multipliers apply to a country and/or source (``"wind"`` matches onshore
+and offshore) and are a number or a distribution; one draw per rule and
+trajectory is shared by every series the rule matches, so a country-wide
+shock moves all its sources together.  Trajectories are simulated as
+``series × chunk`` NumPy arrays, a chunk sized to CHUNK_BYTES, and each
+chunk is folded into fixed log-bucket histograms (LogHistograms) before the
+next one is drawn, so memory does not grow with their number; quantiles
+are within ALPHA (relative) of the exact ones.
+
+Spec (JSON file and/or ``--multiplier`` / ``--target`` options):
+
+  {"trajectories": 200000, "seed": 0, "quantiles": [10, 50, 90],
+   "multipliers": [
+     {"country": "DE", "source": "solar", "multiplier": 1.2},
+     {"country": "DE", "source": "wind", "multiplier": {"dist": "normal", "mean": 1.0, "sd": 0.15}}],
+   "targets": [
+     {"name": "DE wind 70 GW", "country": "DE", "source": "wind", "year": 2030, "at_least_GW": 70}]}
+
+Distributions: normal (mean, sd), lognormal (median, sigma), uniform (low,
+high), triangular (low, mode, high); draws below zero count as zero.
+
+Usage:
+  python -m sustainable_energy scenario spec.json [--json scenario_results.json]
+  python -m sustainable_energy scenario --multiplier DE/solar=1.2 --target "DE/wind>=70GW"
+  python -m sustainable_energy scenario --multiplier "DE/=normal(1,0.2)" --all-series --trajectories 500000
+"""
+
+import re, json, time
+import numpy as np
+
+from . import load
+from .fit_cache import FitCache
+from .forecast_store import SERIES, capacity_columns, series_label, split_column
+from .poly_fit import bootstrap_paths
+from .predict import PREDICT_TO, _forecast
+
+TRAJECTORIES = 200_000
+SAMPLES = 2000              # bootstrap paths per series, as predict's bands
+QUANTILES = (10, 50, 90)
+CHUNK_BYTES = 32 * 1024 ** 2
+ALPHA = 0.001               # relative accuracy of the quantiles
+MW_RANGE = (1e-3, 1e9)      # histogram range; values outside land in the end buckets
+FIT_BATCH = 64              # series bootstrapped at once
+DISTS = {
+    "normal": ("mean", "sd"),
+    "lognormal": ("median", "sigma"),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+}
+SELECTORS = ("series", "country", "source")
+
+
+# ═══════════════════════════════════════════════════════════════
+# BASELINE — fitted trend and bootstrap additions per series
+# ═══════════════════════════════════════════════════════════════
+def baseline(years, all_series=False, samples=SAMPLES, use_cache=True, log=print):
+    """Trend forecasts and bootstrap additions of every series at ``years``.
+
+    Returns a dict: ``labels`` / ``columns`` of the kept series, ``last_x``
+    and ``last_y`` (latest actual), ``trend`` (series × years, the point
+    forecast) and ``adds`` (series × samples × years, float32): capacity
+    added after the latest actual along each bootstrap path.  With
+    ``samples=0`` the trend is the only path.
+    """
+    if max(years) > PREDICT_TO:
+        raise ValueError(f"scenario years end at {PREDICT_TO}, got {max(years)}")
+    available = load.timeseries_columns(use_cache)
+    if all_series:
+        columns = capacity_columns(available)
+        labels = [series_label(c) for c in columns]
+    else:
+        pairs = [(label, col) for label, col in SERIES.items() if col in set(available)]
+        labels, columns = [l for l, _ in pairs], [c for _, c in pairs]
+    yearly = load.load_yearly(columns, use_cache)
+    x = yearly["year"].values.astype(int)
+    cache = FitCache() if use_cache else None
+    out = {k: [] for k in ("labels", "columns", "last_x", "last_y", "trend", "adds")}
+    try:
+        for b in range(0, len(columns), FIT_BATCH):
+            cols = columns[b:b + FIT_BATCH]
+            fc = _forecast(x, yearly[cols].values.T.astype("float64"), cols, cache)
+            at = np.searchsorted(fc["grid"], years)
+            paths = bootstrap_paths(fc, samples)[:, :, at] if samples else fc["pred"][:, None, at]
+            out["labels"] += [l for l, k in zip(labels[b:b + FIT_BATCH], fc["keep"]) if k]
+            out["columns"] += [c for c, k in zip(cols, fc["keep"]) if k]
+            out["last_x"].append(fc["last_x"])
+            out["last_y"].append(fc["last_y"])
+            out["trend"].append(fc["pred"][:, at])
+            out["adds"].append((paths - fc["last_y"][:, None, None]).astype(np.float32))
+    finally:
+        if cache is not None:
+            cache.close()
+    if not out["columns"]:
+        raise ValueError("no series with enough data to forecast")
+    base = {k: (v if k in ("labels", "columns") else np.concatenate(v)) for k, v in out.items()}
+    late = base["last_x"].max()
+    if min(years) <= late:
+        raise ValueError(f"scenario years must come after the latest actual year ({int(late)})")
+    base["years"] = list(years)
+    return base
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPEC
+# ═══════════════════════════════════════════════════════════════
+def _names(value):
+    return [str(v).lower() for v in (value if isinstance(value, (list, tuple)) else [value])]
+
+
+def select(base, rule):
+    """Boolean mask of the series a rule's ``series`` / ``country`` / ``source`` match (all must)."""
+    mask = np.ones(len(base["columns"]), dtype=bool)
+    parts = [split_column(c) for c in base["columns"]]
+    if "series" in rule:
+        want = _names(rule["series"])
+        mask &= [l.lower() in want or c.lower() in want for l, c in zip(base["labels"], base["columns"])]
+    if "country" in rule:
+        # Country code, region ("GB-UKM") or the label's first word ("UK")
+        want = _names(rule["country"])
+        mask &= [bool({region.lower(), country.lower(), label.split()[0].lower()} & set(want))
+                 for (region, country, _), label in zip(parts, base["labels"])]
+    if "source" in rule:
+        want = _names(rule["source"])
+        mask &= [any(src == w or src.startswith(w + "_") for w in want) for _, _, src in parts]
+    if not mask.any():
+        raise ValueError(f"no forecast series matches {_describe(rule)}")
+    return mask
+
+
+def _describe(rule):
+    return "/".join(str(rule[k]) for k in SELECTORS if k in rule) or "every series"
+
+
+def sampler(multiplier):
+    """``draw(rng, n)`` for a multiplier: a number or ``{"dist": name, <params>}``."""
+    if isinstance(multiplier, (int, float)):
+        return lambda rng, n: np.full(n, float(multiplier))
+    dist = multiplier.get("dist") if isinstance(multiplier, dict) else None
+    if dist not in DISTS:
+        raise ValueError(f"multiplier must be a number or a distribution ({', '.join(DISTS)}), got {multiplier!r}")
+    try:
+        p = [float(multiplier[k]) for k in DISTS[dist]]
+    except KeyError as e:
+        raise ValueError(f"{dist} multiplier needs {', '.join(DISTS[dist])}") from e
+    if dist == "normal":
+        return lambda rng, n: rng.normal(p[0], p[1], n)
+    if dist == "lognormal":
+        return lambda rng, n: p[0] * np.exp(rng.normal(0.0, p[1], n))
+    if dist == "uniform":
+        return lambda rng, n: rng.uniform(p[0], p[1], n)
+    return lambda rng, n: rng.triangular(p[0], p[1], p[2], n)
+
+
+def parse_selector(text):
+    """``"DE/solar"`` → ``{"country": "DE", "source": "solar"}``; either side may be empty or ``*``."""
+    country, slash, source = text.strip().partition("/")
+    if not slash:
+        raise ValueError(f"expected COUNTRY/SOURCE, got {text!r}")
+    rule = {}
+    if country.strip() not in ("", "*"):
+        rule["country"] = country.strip()
+    if source.strip() not in ("", "*"):
+        rule["source"] = source.strip()
+    return rule
+
+
+def parse_multiplier(item):
+    """``"DE/solar=1.2"`` or ``"DE/wind=normal(1,0.15)"`` → a spec multiplier rule."""
+    sel, eq, value = item.partition("=")
+    if not eq:
+        raise ValueError(f"--multiplier needs COUNTRY/SOURCE=VALUE, got {item!r}")
+    m = re.fullmatch(r"\s*(\w+)\((.*)\)\s*", value)
+    if m:
+        name, args = m.group(1), [float(a) for a in m.group(2).split(",")]
+        if name not in DISTS or len(args) != len(DISTS[name]):
+            raise ValueError(f"unknown distribution {value!r} — use " +
+                             ", ".join(f"{d}({','.join(ps)})" for d, ps in DISTS.items()))
+        return {**parse_selector(sel), "multiplier": {"dist": name, **dict(zip(DISTS[name], args))}}
+    return {**parse_selector(sel), "multiplier": float(value)}
+
+
+def parse_target(item):
+    """``"DE/wind>=70GW"`` or ``"DE/solar>=90000@2028"`` (MW, year 2030 by default) → a spec target."""
+    m = re.fullmatch(r"(.+?)>=\s*([\d.]+)\s*(GW|MW)?\s*(?:@\s*(\d{4}))?\s*", item, re.IGNORECASE)
+    if not m:
+        raise ValueError(f"--target needs COUNTRY/SOURCE>=VALUE[GW|MW][@YEAR], got {item!r}")
+    mw = float(m.group(2)) * (1000 if (m.group(3) or "").upper() == "GW" else 1)
+    return {"name": item, **parse_selector(m.group(1)), "at_least_MW": mw, "year": int(m.group(4) or PREDICT_TO)}
+
+
+def _threshold(target):
+    if "at_least_GW" in target:
+        return float(target["at_least_GW"]) * 1000
+    return float(target["at_least_MW"]) if "at_least_MW" in target else None
+
+
+# ═══════════════════════════════════════════════════════════════
+# SIMULATION
+# ═══════════════════════════════════════════════════════════════
+class LogHistograms:
+    """Fixed log-bucket histograms of many non-negative quantities, with relative accuracy ``alpha``.
+
+    The buckets of plant_stream.QuantileSketch, held as one dense ``rows ×
+    buckets`` count array over ``value_range``: its size is fixed up front,
+    and a ``rows × n`` chunk of values is folded in with a single bincount.
+    """
+
+    def __init__(self, rows, alpha=ALPHA, value_range=MW_RANGE):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = np.log(self.gamma)
+        self.lo = value_range[0]
+        self.k0 = int(np.floor(np.log(value_range[0]) / self._log_gamma))
+        n_buckets = int(np.ceil(np.log(value_range[1]) / self._log_gamma)) - self.k0 + 1
+        self.counts = np.zeros((rows, n_buckets), dtype=np.int64)
+        self.sum = np.zeros(rows)
+        self.min = np.full(rows, np.inf)
+        self.max = np.full(rows, -np.inf)
+        self.count = 0
+
+    def add(self, values):
+        rows, nb = self.counts.shape
+        k = np.ceil(np.log(np.maximum(values, self.lo)) / self._log_gamma).astype(np.int64) - self.k0
+        flat = np.clip(k, 0, nb - 1) + np.arange(rows)[:, None] * nb
+        self.counts += np.bincount(flat.ravel(), minlength=rows * nb).reshape(rows, nb)
+        self.sum += values.sum(axis=1)
+        self.min = np.minimum(self.min, values.min(axis=1))
+        self.max = np.maximum(self.max, values.max(axis=1))
+        self.count += values.shape[1]
+
+    def mean(self):
+        return self.sum / max(self.count, 1)
+
+    def percentiles(self, qs):
+        """``len(qs) × rows`` percentiles, linearly interpolated between ranks like ``np.percentile``."""
+        rows, nb = self.counts.shape
+        mid = 2 * self.gamma ** (np.arange(nb) + self.k0) / (self.gamma + 1)
+        out = np.empty((len(qs), rows))
+        for r in range(rows):
+            cum = np.cumsum(self.counts[r])
+            for j, q in enumerate(qs):
+                pos = q / 100 * (self.count - 1)
+                lo, hi = mid[np.searchsorted(cum, [np.floor(pos), np.ceil(pos)], side="right")]
+                out[j, r] = min(max(lo + (hi - lo) * (pos - np.floor(pos)), self.min[r]), self.max[r])
+        return out
+
+
+def simulate(base, spec, trajectories=TRAJECTORIES, seed=0, chunk=None, log=print):
+    """Target-attainment probabilities and quantiles of ``trajectories`` scenario paths.
+
+    ``spec`` holds ``multipliers`` and ``targets`` rules (see the module
+    docstring) and optionally ``quantiles``.  Returns a JSON-ready dict
+    with per-series and per-target results at every scenario year.
+    """
+    years = base["years"]
+    S, B, K = base["adds"].shape
+    quantiles = list(spec.get("quantiles", QUANTILES))
+    rules = [(select(base, r), sampler(r["multiplier"])) for r in spec.get("multipliers", [])]
+    targets = []
+    for t in spec.get("targets", []):
+        if t.get("year", PREDICT_TO) not in years:
+            raise ValueError(f"target year {t.get('year')} is not a scenario year ({years})")
+        targets.append((select(base, t), years.index(t.get("year", PREDICT_TO)), _threshold(t)))
+    chunk = chunk or max(1, CHUNK_BYTES // (S * K * 8 * 3))
+
+    rng = np.random.default_rng(seed)
+    values = LogHistograms(S * K)           # row i * K + k: series i in year k
+    totals = LogHistograms(len(targets))
+    hits = np.zeros(len(targets), dtype=np.int64)
+    last_y = base["last_y"][:, None, None]
+    t0 = time.perf_counter()
+    for lo in range(0, trajectories, chunk):
+        n = min(chunk, trajectories - lo)
+        mult = np.ones((S, n))
+        for mask, draw in rules:
+            mult[mask] *= np.maximum(draw(rng, n), 0.0)
+        pick = rng.integers(0, B, (S, n))
+        adds = np.take_along_axis(base["adds"], pick[:, :, None], axis=1)       # series × n × years
+        cap = last_y + mult[:, :, None] * adds
+        values.add(cap.transpose(0, 2, 1).reshape(S * K, n))
+        if targets:
+            total = np.stack([cap[mask, :, k].sum(axis=0) for mask, k, _ in targets])
+            totals.add(total)
+            for j, (_, _, mw) in enumerate(targets):
+                if mw is not None:
+                    hits[j] += int((total[j] >= mw).sum())
+    sim_s = time.perf_counter() - t0
+
+    q_series = values.percentiles(quantiles).reshape(len(quantiles), S, K)
+    mean = values.mean().reshape(S, K)
+    series = {}
+    for i, label in enumerate(base["labels"]):
+        entry = {"latest_actual_MW": round(float(base["last_y"][i]), 2)}
+        for k, year in enumerate(years):
+            entry[f"trend_{year}_MW"] = round(float(base["trend"][i, k]), 2)
+            entry[f"mean_{year}_MW"] = round(float(mean[i, k]), 2)
+            entry.update({f"p{q}_{year}_MW": round(float(v), 2) for q, v in zip(quantiles, q_series[:, i, k])})
+        series[label] = entry
+
+    q_totals, mean_totals = totals.percentiles(quantiles), totals.mean()
+    results = []
+    for j, (t, (mask, k, mw)) in enumerate(zip(spec.get("targets", []), targets)):
+        results.append({
+            "name": t.get("name", _describe(t)),
+            "series": [l for l, m in zip(base["labels"], mask) if m],
+            "year": years[k],
+            "at_least_MW": mw,
+            "probability": round(float(hits[j]) / trajectories, 4) if mw is not None else None,
+            "trend_MW": round(float(base["trend"][mask, k].sum()), 2),
+            "mean_MW": round(float(mean_totals[j]), 2),
+            **{f"p{q}_MW": round(float(v), 2) for q, v in zip(quantiles, q_totals[:, j])},
+        })
+    return {"trajectories": trajectories, "samples": B, "seed": seed, "years": years, "quantiles": quantiles,
+            "chunk": chunk, "simulate_s": round(sim_s, 3), "series": series, "targets": results}
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMMAND
+# ═══════════════════════════════════════════════════════════════
+def load_spec(path=None, multipliers=(), targets=()):
+    """The spec in JSON file ``path`` (if any), extended with ``--multiplier`` / ``--target`` items."""
+    spec = {}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+    spec["multipliers"] = list(spec.get("multipliers", [])) + [parse_multiplier(m) for m in multipliers]
+    spec["targets"] = list(spec.get("targets", [])) + [parse_target(t) for t in targets]
+    for rule in spec["multipliers"]:
+        if "multiplier" not in rule:
+            raise ValueError(f"multiplier rule {_describe(rule)} has no 'multiplier'")
+    return spec
+
+
+def print_result(result, shown=None):
+    """Per-target probabilities and per-series quantile table (``shown`` labels, default all)."""
+    years, qs = result["years"], result["quantiles"]
+    for t in result["targets"]:
+        year = t["year"]
+        band = " / ".join(f"P{q} {t[f'p{q}_MW'] / 1000:,.1f}" for q in qs)
+        line = f"   🎯 {t['name']} ({year}): trend {t['trend_MW'] / 1000:,.1f} GW, {band} GW"
+        if t["probability"] is not None:
+            line += f" — P(≥ {t['at_least_MW'] / 1000:,.1f} GW) = {t['probability']:.1%}"
+        print(line)
+    year = years[-1]
+    print(f"\n   {'Series':<28}{'latest':>10}{'trend':>10}" + "".join(f"{'P' + str(q):>10}" for q in qs)
+          + f"   (MW, {year})")
+    for label, s in result["series"].items():
+        if shown is not None and label not in shown:
+            continue
+        print(f"   {label:<28}{s['latest_actual_MW']:>10,.0f}{s[f'trend_{year}_MW']:>10,.0f}"
+              + "".join(f"{s[f'p{q}_{year}_MW']:>10,.0f}" for q in qs))
+
+
+def run(spec_path=None, multipliers=(), targets=(), trajectories=None, samples=SAMPLES, seed=None,
+        all_series=False, json_path=None, use_cache=True):
+    """The ``scenario`` command."""
+    spec = load_spec(spec_path, multipliers, targets)
+    trajectories = trajectories or int(spec.get("trajectories", TRAJECTORIES))
+    seed = int(spec.get("seed", 0)) if seed is None else seed
+    years = sorted({PREDICT_TO, *(int(t.get("year", PREDICT_TO)) for t in spec["targets"])})
+
+    print(f"🔮 Fitting {'every series' if all_series else 'the dashboard series'} "
+          f"({f'{samples} bootstrap paths each' if samples else 'trend only'}) ...")
+    t0 = time.perf_counter()
+    base = baseline(years, all_series, samples, use_cache)
+    print(f"   {len(base['columns'])} series in {time.perf_counter() - t0:.2f}s")
+
+    print(f"\n🎲 Simulating {trajectories:,} trajectories ({len(spec['multipliers'])} multiplier rule(s), "
+          f"{len(spec['targets'])} target(s)) ...")
+    result = simulate(base, spec, trajectories, seed)
+    print(f"   {trajectories * len(base['columns']):,} series paths in {result['simulate_s']:.2f}s "
+          f"(chunks of {result['chunk']:,})\n")
+    # With every series, list only those a rule or target touches
+    shown = None
+    if all_series and (spec["multipliers"] or spec["targets"]):
+        rules = spec["multipliers"] + spec["targets"]
+        shown = {l for r in rules for l, m in zip(base["labels"], select(base, r)) if m}
+    print_result(result, shown)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Scenario results saved → {json_path}")
+    return result
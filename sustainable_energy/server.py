@@ -0,0 +1,405 @@
+"""
+Local Forecast Server
+=====================
+A small HTTP service (standard library only) that answers forecasts on
+demand instead of the fixed set baked into predictions.json:
+
+  GET /forecast?series=DE Solar&horizon=2035&resolution=yearly
+      → a ``predictions.json``-style entry (``predict.forecast_entry``);
+        ``series`` is a dashboard label, a series label or a column name,
+        ``horizon`` the last forecast year (default ``PREDICT_TO``), after
+        the series' last observed year (422 otherwise)
+  GET /series    every series that can be forecast
+  GET /stats     request counts, latency percentiles, throughput, cache
+                 hit rates and fit counts
+  GET /          the dashboard (index.html, app.js, styles.css and the
+                 JSON / chart files they load)
+
+Files of the dashboard data bundle (bundle.py) are sent pre-compressed —
+the ``.br`` or ``.gz`` twin the client accepts — and, being named by
+content hash, cached as immutable; everything else is revalidated.
+
+Requests are served by one asyncio loop; fits and renders run in a thread
+pool (numpy releases the GIL in the heavy parts) reading the
+memory-mapped rollup store (rollups.py).  Fitted models — one per series
+and resolution, re-evaluated for any horizon (``poly_fit.regrid``) — and
+rendered responses are kept in bounded LRU caches, and concurrent
+requests for the same model or response share one computation.  Yearly
+forecasts carry P10/P50/P90 bands (``--samples`` bootstrap resamples);
+monthly and daily ones are point forecasts, like the indexed store.
+"""
+
+import os, json, time, asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .bundle import MANIFEST
+from .forecast_store import capacity_columns, display_label, series_label
+from .load import FREQ, period_axis
+from .paths import BASE, BUNDLE, CHARTS
+from .poly_fit import DEGREES, DEGREE_PENALTY, forecast_series, prediction_intervals, regrid
+from .predict import PREDICT_TO, forecast_entry
+from .rollups import open_store
+
+HOST, PORT = "127.0.0.1", 8000
+WORKERS = 4
+CACHE_SIZE = 256            # entries per LRU cache (models, responses)
+SAMPLES = 2000              # bootstrap resamples for the yearly bands
+MAX_HORIZON = 2100
+LATENCY_WINDOW = 4096       # latest requests kept for the percentiles
+IDLE_TIMEOUT = 30           # seconds a keep-alive connection may sit idle
+STATIC = {"index.html", "app.js", "styles.css", "predictions.json", "analysis_report.json", "plant_rasters.json"}
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".js": "text/javascript; charset=utf-8",
+                 ".css": "text/css; charset=utf-8", ".json": "application/json", ".png": "image/png",
+                 ".svg": "image/svg+xml"}
+# Pre-compressed twins, by preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHES & COUNTERS
+# ═══════════════════════════════════════════════════════════════
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry; counts hits and misses."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": round(self.hits / total, 4) if total else None}
+
+
+class ServerStats:
+    """Request counters, a window of recent latencies and the fit count / time."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self.requests = 0
+        self.by_endpoint, self.by_status = {}, {}
+        self.latencies = deque(maxlen=window)       # (finished at, seconds)
+        self.fits, self.fit_s = 0, 0.0
+        self.shared = 0         # requests that joined an identical one already being computed
+
+    def record(self, endpoint, status, seconds):
+        self.requests += 1
+        self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+        self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+        self.latencies.append((time.time(), seconds))
+
+    def snapshot(self):
+        now = time.time()
+        uptime = now - self.started
+        lat = np.array([s for _, s in self.latencies]) * 1000
+        recent = sum(1 for t, _ in self.latencies if t >= now - 60)
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": self.requests,
+            "by_endpoint": self.by_endpoint,
+            "by_status": self.by_status,
+            "throughput_rps": {"overall": round(self.requests / max(uptime, 1e-9), 2),
+                               "last_60s": round(recent / min(max(uptime, 1e-9), 60), 2)},
+            "latency_ms": {"window": len(lat), **({
+                "mean": round(float(lat.mean()), 3), "p50": round(float(np.percentile(lat, 50)), 3),
+                "p95": round(float(np.percentile(lat, 95)), 3), "p99": round(float(np.percentile(lat, 99)), 3),
+                "max": round(float(lat.max()), 3)} if len(lat) else {})},
+            "fits": {"count": self.fits, "total_s": round(self.fit_s, 4),
+                     "mean_ms": round(self.fit_s * 1000 / self.fits, 3) if self.fits else None},
+            "shared_in_flight": self.shared,
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENGINE
+# ═══════════════════════════════════════════════════════════════
+class ForecastEngine:
+    """On-demand forecasts from the rollup store, with LRU-cached models and responses."""
+
+    def __init__(self, workers=WORKERS, cache_size=CACHE_SIZE, samples=SAMPLES, use_cache=True, log=print):
+        self.store = open_store(use_cache=use_cache, log=log)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.workers, self.samples = workers, samples
+        self.models = LRUCache(cache_size)          # (column, resolution) → fitted model
+        self.responses = LRUCache(cache_size)       # (column, resolution, horizon) → JSON bytes
+        self.stats = ServerStats()
+        self._inflight = {}
+        # Dashboard labels where there is one ("UK Solar"), else the series label ("GB-UKM Solar")
+        cols = capacity_columns(self.store.columns)
+        self.names = {c: display_label(c) for c in cols}
+        self._lookup = {}
+        for c in cols:
+            for name in (c, series_label(c), self.names[c]):
+                self._lookup[name.lower()] = c
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def resolve(self, series):
+        """Column of a dashboard label, series label or column name (case-insensitive)."""
+        col = self._lookup.get(series.strip().lower())
+        if col is None:
+            raise HTTPError(404, f"Unknown series {series!r} — see /series")
+        return col
+
+    def series_list(self):
+        return [{"label": label, "column": col} for col, label in sorted(self.names.items(), key=lambda x: x[1])]
+
+    # --- work done in the pool --------------------------------------
+    def _fit(self, column, resolution):
+        t0 = time.perf_counter()
+        frame = self.store.frame([column], resolution)
+        x = period_axis(frame.index, resolution)
+        fc = forecast_series(x, frame[column].values[None], PREDICT_TO, degrees=DEGREES, penalty=DEGREE_PENALTY,
+                             grid=x)
+        if not fc["keep"][0]:
+            raise HTTPError(422, f"{column}: not enough data points to fit")
+        return {"fc": fc, "index": frame.index, "fit_s": time.perf_counter() - t0}
+
+    def _render(self, model, column, resolution, horizon):
+        index = model["index"]
+        if resolution == "yearly":
+            fc = regrid(model["fc"], np.arange(int(model["fc"]["x"].min()), horizon + 1))
+            bands = prediction_intervals(fc, quantiles=(10, 50, 90), n_samples=self.samples) if self.samples else None
+            entry = forecast_entry(fc, 0, bands, predict_to=horizon)
+        else:
+            periods = pd.period_range(index[0], pd.Period(f"{horizon}-12-31", FREQ[resolution]))
+            fc = regrid(model["fc"], period_axis(periods, resolution))
+            entry = forecast_entry(fc, 0, x_labels=index.astype(str), grid_labels=periods.astype(str),
+                                   predict_to=horizon)
+        body = {"series": self.names[column], "column": column, "resolution": resolution, "horizon": horizon, **entry}
+        return json.dumps(body).encode()
+
+    # --- async front ------------------------------------------------
+    async def _cached(self, lru, key, make):
+        """``lru[key]``, else ``await make()`` — one computation shared by every concurrent caller."""
+        task = self._inflight.get((id(lru), key))
+        if task is not None:
+            self.stats.shared += 1
+            return await asyncio.shield(task)
+        value = lru.get(key)
+        if value is not None:
+            return value
+        async def compute():
+            value = await make()
+            lru.put(key, value)         # before the task is done, so no caller sees neither
+            return value
+        task = self._inflight[(id(lru), key)] = asyncio.ensure_future(compute())
+        task.add_done_callback(lambda _: self._inflight.pop((id(lru), key), None))
+        return await asyncio.shield(task)
+
+    async def model(self, column, resolution):
+        """Fitted model of one series at one resolution."""
+        async def fit():
+            model = await asyncio.get_running_loop().run_in_executor(self.pool, self._fit, column, resolution)
+            self.stats.fits += 1
+            self.stats.fit_s += model["fit_s"]
+            return model
+        return await self._cached(self.models, (column, resolution), fit)
+
+    async def forecast(self, series, horizon=PREDICT_TO, resolution="yearly"):
+        """JSON bytes of one forecast (see the module docstring)."""
+        column = self.resolve(series)
+
+        async def render():
+            model = await self.model(column, resolution)
+            last = int(np.floor(model["fc"]["last_x"][0]))
+            if horizon <= last:
+                raise HTTPError(422, f"{column}: horizon must come after the last observed year ({last})")
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, self._render, model, column, resolution, horizon)
+        return await self._cached(self.responses, (column, resolution, horizon), render)
+
+
+# ═══════════════════════════════════════════════════════════════
+# HTTP
+# ═══════════════════════════════════════════════════════════════
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def parse_forecast_query(query):
+    """``(series, horizon, resolution)`` of a /forecast query string (dict of lists)."""
+    series = _param(query, "series")
+    if not series:
+        raise HTTPError(400, "series is required, e.g. /forecast?series=DE Solar")
+    try:
+        horizon = int(_param(query, "horizon", PREDICT_TO))
+    except ValueError:
+        raise HTTPError(400, "horizon must be a year, e.g. horizon=2035") from None
+    if not 2001 <= horizon <= MAX_HORIZON:
+        raise HTTPError(400, f"horizon must be between 2001 and {MAX_HORIZON}")
+    resolution = _param(query, "resolution", "yearly")
+    if resolution not in FREQ:
+        raise HTTPError(400, f"resolution must be one of {', '.join(FREQ)}")
+    return series, horizon, resolution
+
+
+def static_file(path):
+    """Absolute path of a servable dashboard file, or None."""
+    name = unquote(path).lstrip("/") or "index.html"
+    if name in STATIC:
+        return os.path.join(BASE, name)
+    head, _, rest = name.partition("/")
+    for folder in (CHARTS, BUNDLE):
+        if head == os.path.basename(folder) and rest and "/" not in rest and not rest.startswith("."):
+            if os.path.splitext(rest)[1] in CONTENT_TYPES:
+                return os.path.join(folder, rest)
+    return None
+
+
+def accepted_encodings(header):
+    """Content codings an ``Accept-Encoding`` header allows (those with ``q=0`` left out)."""
+    out = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        q = params.strip().replace(" ", "")
+        if q.startswith("q=") and q[2:].strip("0.") == "":
+            continue
+        out.add(coding.strip().lower())
+    return out
+
+
+def bundle_file(path, accept_encoding=""):
+    """``(file to send, extra headers)`` for a dashboard bundle file: its best accepted
+    pre-compressed twin, cached forever unless it is the manifest."""
+    headers = {"Vary": "Accept-Encoding"}
+    if os.path.basename(path) != MANIFEST:
+        headers["Cache-Control"] = IMMUTABLE
+    accepted = accepted_encodings(accept_encoding)
+    for coding, ext in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + ext):
+            headers["Content-Encoding"] = coding
+            return path + ext, headers
+    return path, headers
+
+
+class ForecastServer:
+    """asyncio HTTP/1.1 front end of a :class:`ForecastEngine` (GET / HEAD, keep-alive)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def route(self, method, target, headers=None):
+        """``(endpoint, status, content type, body, extra headers)`` for one request."""
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405, f"{method} not allowed")
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/forecast":
+            body = await self.engine.forecast(*parse_forecast_query(query))
+            return "forecast", 200, "application/json", body, {}
+        if url.path == "/series":
+            return "series", 200, "application/json", json.dumps(self.engine.series_list()).encode(), {}
+        if url.path == "/stats":
+            snap = self.engine.stats.snapshot()
+            snap["cache"] = {"models": self.engine.models.stats(), "responses": self.engine.responses.stats()}
+            snap["in_flight"], snap["workers"] = len(self.engine._inflight), self.engine.workers
+            return "stats", 200, "application/json", json.dumps(snap, indent=2).encode(), {}
+        path = static_file(url.path)
+        if path is None or not os.path.isfile(path):
+            raise HTTPError(404, f"{url.path} not found")
+        ctype = CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+        extra = {}
+        if os.path.dirname(path) == BUNDLE:
+            path, extra = bundle_file(path, (headers or {}).get("accept-encoding", ""))
+        with open(path, "rb") as f:
+            return "static", 200, ctype, f.read(), extra
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not line.strip():
+                    break
+                t0 = time.perf_counter()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = line.decode("latin-1").split()
+                method, version = (parts[0], parts[2]) if len(parts) == 3 else ("", "HTTP/1.0")
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                # Request bodies are never read, so the connection cannot be reused after one
+                keep_alive = keep_alive and headers.get("content-length", "0") == "0"
+                try:
+                    if len(parts) != 3:
+                        raise HTTPError(400, "malformed request line")
+                    endpoint, status, ctype, body, extra = await self.route(method, parts[1], headers)
+                except HTTPError as e:
+                    endpoint, status, ctype, extra = "error", e.status, "application/json", {}
+                    body = json.dumps({"error": str(e)}).encode()
+                except Exception as e:        # a bug in one request must not take the server down
+                    endpoint, status, ctype, extra = "error", 500, "application/json", {}
+                    body = json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+                fields = {"Content-Type": ctype, "Content-Length": len(body), "Cache-Control": "no-cache", **extra,
+                          "Connection": "keep-alive" if keep_alive else "close"}
+                head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        + "".join(f"{k}: {v}\r\n" for k, v in fields.items()) + "\r\n").encode()
+                writer.write(head if method == "HEAD" else head + body)
+                await writer.drain()
+                self.engine.stats.record(endpoint, status, time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(host, port, engine):
+    server = await asyncio.start_server(ForecastServer(engine).handle, host, port)
+    print(f"🌐 Forecast server on http://{host}:{port}/ — /forecast?series=&horizon=&resolution=, "
+          f"/series, /stats ({engine.workers} workers, LRU {engine.models.maxsize}). Ctrl+C to stop.")
+    async with server:
+        await server.serve_forever()
+
+
+def run(host=HOST, port=PORT, workers=WORKERS, cache_size=CACHE_SIZE, samples=SAMPLES, use_cache=True):
+    """The ``serve`` command."""
+    engine = ForecastEngine(workers, cache_size, samples, use_cache)
+    print(f"📚 {len(engine.names)} series from the rollup store")
+    try:
+        asyncio.run(_serve(host, port, engine))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+    finally:
+        engine.close()
@@ -0,0 +1,349 @@
+"""
+Geospatial Plant Index
+======================
+Every plant with coordinates (the ``lat`` / ``lon`` columns of the OPSD
+files, Germany included) in one grid index, for siting questions that
+used to go through a GIS export:
+
+  • plants are sorted by their ``CELL_DEG`` grid cell, row-major, so the
+    cells of one grid row are one contiguous slice of the plant arrays
+  • a radius query binary-searches one slice per grid row under the
+    circle, then keeps the candidates within great-circle distance
+  • per-cell, per-source capacity is summed at build time; coarser grids
+    (multiples of ``CELL_DEG``) are rolled up from those cells, not from
+    the plants
+
+Cells are square lat/lon cells, not H3 hexagons (no extra dependency):
+cell ``(row, col)`` of a ``deg`` grid has its south-west corner at
+``(row·deg − 90, col·deg − 180)``.  Longitudes do not wrap at ±180°, which
+no OPSD country needs.
+
+``build`` writes the index to plant_index.npz — rebuilt whenever a plant
+file changes — and gridded capacity rasters for the dashboard to
+plant_rasters.json.
+"""
+
+import os, json
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from .csv_cache import source_hash
+from .load import COMMON_COLS, country_jobs
+from .paths import SPATIAL_INDEX, RASTERS
+from .plant_stream import CHUNK_ROWS, clean_chunk, iter_plant_chunks, map_countries
+
+SPATIAL_COLS = [*COMMON_COLS, "lat", "lon"]
+CELL_DEG = 0.05                 # finest grid, ≈ 5.5 km north–south
+RASTER_DEG = (1.0, 0.25, 0.1)   # dashboard rasters
+EARTH_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_KM / 180
+
+# Bump whenever the index layout changes — invalidates saved indexes
+INDEX_VERSION = 1
+
+_ROWS, _COLS = round(180 / CELL_DEG), round(360 / CELL_DEG)
+
+
+# ═══════════════════════════════════════════════════════════════
+# GRID
+# ═══════════════════════════════════════════════════════════════
+def _factor(deg):
+    """``deg`` in finest cells (``deg`` must be a multiple of ``CELL_DEG``)."""
+    k = round(deg / CELL_DEG)
+    if k < 1 or abs(k * CELL_DEG - deg) > 1e-9:
+        raise ValueError(f"grid resolution must be a multiple of {CELL_DEG}°, got {deg}")
+    return k
+
+
+def cell_of(lat, lon, deg=CELL_DEG):
+    """``(row, col)`` of the ``deg`` grid cell holding each point (scalars or arrays)."""
+    k = _factor(deg)
+    row = np.clip(np.floor((np.asarray(lat, dtype=float) + 90) / CELL_DEG), 0, _ROWS - 1).astype(np.int64)
+    col = np.clip(np.floor((np.asarray(lon, dtype=float) + 180) / CELL_DEG), 0, _COLS - 1).astype(np.int64)
+    return row // k, col // k
+
+
+def cell_corner(row, col, deg=CELL_DEG):
+    """South-west ``(lat, lon)`` corner of cell ``(row, col)`` of the ``deg`` grid."""
+    return np.round(np.asarray(row) * deg - 90, 6), np.round(np.asarray(col) * deg - 180, 6)
+
+
+def haversine_km(lat0, lon0, lat, lon):
+    """Great-circle distance in km from ``(lat0, lon0)`` to each ``(lat, lon)``."""
+    p0, p = np.radians(lat0), np.radians(np.asarray(lat, dtype=float))
+    a = (np.sin((p - p0) / 2) ** 2
+         + np.cos(p0) * np.cos(p) * np.sin(np.radians(np.asarray(lon, dtype=float) - lon0) / 2) ** 2)
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ═══════════════════════════════════════════════════════════════
+# INDEX
+# ═══════════════════════════════════════════════════════════════
+class PlantIndex:
+    """Plant coordinates, capacity and source sorted by grid cell; see the module docstring."""
+
+    def __init__(self, lat, lon, capacity, source, country, sources, countries, fingerprint=None):
+        row, col = cell_of(lat, lon)
+        key = row * _COLS + col
+        order = np.argsort(key, kind="stable")
+        self.key = key[order]
+        self.lat = np.asarray(lat, dtype=np.float32)[order]
+        self.lon = np.asarray(lon, dtype=np.float32)[order]
+        self.capacity = np.asarray(capacity, dtype=np.float32)[order]
+        self.source = np.asarray(source, dtype=np.int16)[order]
+        self.country = np.asarray(country, dtype=np.int16)[order]
+        self.sources = list(sources)
+        self.countries = list(countries)
+        self.fingerprint = fingerprint or {}
+        self._cell_table()
+
+    def __len__(self):
+        return len(self.key)
+
+    def _cell_table(self):
+        """Capacity and plant count per occupied finest cell and source."""
+        self.cells, start, inverse = np.unique(self.key, return_index=True, return_inverse=True)
+        n_src = len(self.sources)
+        self.cell_mw = np.bincount(inverse * n_src + self.source, weights=self.capacity,
+                                   minlength=len(self.cells) * n_src).reshape(-1, n_src)
+        self.cell_plants = np.diff(np.append(start, len(self.key)))
+
+    # --- persistence ------------------------------------------------
+    def save(self, path=SPATIAL_INDEX):
+        meta = {"version": INDEX_VERSION, "cell_deg": CELL_DEG, "sources": self.sources,
+                "countries": self.countries, "fingerprint": self.fingerprint}
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta)), lat=self.lat, lon=self.lon, capacity=self.capacity,
+                 source=self.source, country=self.country)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SPATIAL_INDEX):
+        """The saved index, or None if it is missing or from another index version."""
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if meta.get("version") != INDEX_VERSION or meta.get("cell_deg") != CELL_DEG:
+                    return None
+                return cls(z["lat"], z["lon"], z["capacity"], z["source"], z["country"],
+                           meta["sources"], meta["countries"], meta["fingerprint"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # --- radius queries ---------------------------------------------
+    def within(self, lat, lon, km):
+        """``(plant positions, distances in km)`` of every plant within ``km`` of ``(lat, lon)``."""
+        dlat = km / KM_PER_DEG
+        lat0, lat1 = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        cos_lat = np.cos(np.radians(max(abs(lat0), abs(lat1))))
+        dlon = 180.0 if cos_lat < 1e-6 else min(km / (KM_PER_DEG * cos_lat), 180.0)
+        (r0, c0), (r1, c1) = cell_of(lat0, max(lon - dlon, -180.0)), cell_of(lat1, min(lon + dlon, 180.0))
+        rows = np.arange(r0, r1 + 1) * _COLS
+        lo = np.searchsorted(self.key, rows + c0)
+        hi = np.searchsorted(self.key, rows + c1, side="right")
+        # Concatenate the per-row slices [lo, hi) without a Python loop
+        n = hi - lo
+        cand = np.repeat(lo - np.cumsum(n) + n, n) + np.arange(n.sum())
+        dist = haversine_km(lat, lon, self.lat[cand], self.lon[cand])
+        hit = dist <= km
+        return cand[hit], dist[hit]
+
+    def capacity_near(self, lat, lon, km, source=None):
+        """Plants and capacity (MW, by source) within ``km`` of ``(lat, lon)``."""
+        idx, dist = self.within(lat, lon, km)
+        if source is not None:
+            keep = self._is_source(self.source[idx], source)
+            idx, dist = idx[keep], dist[keep]
+        by_src = np.bincount(self.source[idx], weights=self.capacity[idx], minlength=len(self.sources))
+        counts = np.bincount(self.source[idx], minlength=len(self.sources))
+        order = np.argsort(-by_src, kind="stable")
+        return {
+            "lat": lat, "lon": lon, "radius_km": km,
+            "plants": int(len(idx)),
+            "capacity_MW": round(float(by_src.sum()), 2),
+            "by_source": {self.sources[i]: {"plants": int(counts[i]), "capacity_MW": round(float(by_src[i]), 2)}
+                          for i in order if counts[i]},
+            "nearest_km": round(float(dist.min()), 3) if len(dist) else None,
+        }
+
+    def _is_source(self, codes, source):
+        if source not in self.sources:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == self.sources.index(source)
+
+    # --- grid aggregates --------------------------------------------
+    def cell_capacity(self, deg=CELL_DEG, source=None):
+        """Capacity per occupied ``deg`` grid cell: one row per cell, largest first.
+
+        Columns: ``row``, ``col``, the cell's south-west ``lat`` / ``lon``,
+        ``plants``, ``capacity_MW`` and one MW column per source (or only
+        ``source``'s plants, with ``source``).
+        """
+        k = _factor(deg)
+        row, col = self.cells // _COLS // k, self.cells % _COLS // k
+        coarse, inverse = np.unique(row * (_COLS // k + 1) + col, return_inverse=True)
+        mw = np.zeros((len(coarse), len(self.sources)))
+        np.add.at(mw, inverse, self.cell_mw)
+        if source is not None:
+            plants_by = self._plants_by_source(inverse, len(coarse), source)
+            names = [source] if source in self.sources else []
+            mw = mw[:, [self.sources.index(s) for s in names]]
+        else:
+            plants_by = np.bincount(inverse, weights=self.cell_plants, minlength=len(coarse))
+            names = self.sources
+        r, c = np.divmod(coarse, _COLS // k + 1)
+        lat, lon = cell_corner(r, c, deg)
+        df = pd.DataFrame({"row": r, "col": c, "lat": lat, "lon": lon, "plants": plants_by.astype(np.int64),
+                           "capacity_MW": mw.sum(axis=1)})
+        for i, name in enumerate(names):
+            df[name] = mw[:, i]
+        df = df[df["plants"] > 0]
+        return df.sort_values("capacity_MW", ascending=False, kind="stable").reset_index(drop=True)
+
+    def _plants_by_source(self, inverse, n_cells, source):
+        """Plants of ``source`` per coarse cell (counted from the plants — the cell table holds MW only)."""
+        cell_pos = np.searchsorted(self.cells, self.key[self._is_source(self.source, source)])
+        return np.bincount(inverse[cell_pos], minlength=n_cells)
+
+    def raster(self, deg):
+        """Dense ``(sources × rows × cols)`` MW grid over the plants' bounding box.
+
+        Returns ``(raster, (row0, col0))`` — the grid cell of ``raster[:, 0, 0]``.
+        """
+        cells = self.cell_capacity(deg)
+        if cells.empty:
+            return np.zeros((len(self.sources), 0, 0)), (0, 0)
+        r0, c0 = int(cells["row"].min()), int(cells["col"].min())
+        shape = (len(self.sources), int(cells["row"].max()) - r0 + 1, int(cells["col"].max()) - c0 + 1)
+        grid = np.zeros(shape)
+        grid[:, cells["row"] - r0, cells["col"] - c0] = cells[self.sources].to_numpy().T
+        return grid, (r0, c0)
+
+
+# ═══════════════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════════════
+def country_points(country, fpath, chunksize=CHUNK_ROWS, use_cache=True):
+    """Located plants of one country file after cleaning steps 2a–2d.
+
+    Returns ``(frame of lat / lon / capacity / source, stats)``; plants
+    without valid coordinates are counted in ``stats["no_coords"]``.
+    """
+    parts, stats = [], {"rows": 0, "located": 0, "no_coords": 0}
+    for raw in iter_plant_chunks(fpath, SPATIAL_COLS, chunksize, use_cache):
+        df, _ = clean_chunk(raw, country)
+        lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=float)
+        lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype=float)
+        ok = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)     # False for NaN too
+        stats["rows"] += len(raw)
+        stats["located"] += int(ok.sum())
+        stats["no_coords"] += int(len(df) - ok.sum())
+        parts.append(pd.DataFrame({
+            "lat": lat[ok].astype(np.float32),
+            "lon": lon[ok].astype(np.float32),
+            "capacity": df["electrical_capacity"].to_numpy()[ok].astype(np.float32),
+            "source": df["energy_source_level_2"].to_numpy()[ok],
+        }))
+    pts = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["lat", "lon", "capacity", "source"])
+    return pts, stats
+
+
+def fingerprint(jobs):
+    """``{file name: content hash}`` of the plant files the index is built from."""
+    return {os.path.basename(p): source_hash(p) for _, p in jobs if os.path.exists(p)}
+
+
+def build_index(workers=1, chunksize=CHUNK_ROWS, use_cache=True, log=print, metrics=None):
+    """Read every country file (in parallel with ``workers`` > 1) into a :class:`PlantIndex`."""
+    jobs = country_jobs()
+    work = partial(country_points, chunksize=chunksize, use_cache=use_cache)
+    frames, countries, timings = [], [], {}
+    for country, result, err in map_countries(work, jobs, workers, timings):
+        if err is not None:
+            log(f"   ⚠️  {country}: {err}")
+            continue
+        pts, stats = result
+        pts["country"] = len(countries)
+        frames.append(pts)
+        countries.append(country)
+        if metrics is not None:
+            metrics.item("load", country, rows_in=stats["rows"], rows_out=stats["located"], **timings[country])
+        missing = f" ({stats['no_coords']} without coordinates)" if stats["no_coords"] else ""
+        log(f"   ✅ {country}: {stats['located']} plants located{missing}")
+    pts = pd.concat(frames, ignore_index=True)
+    codes, sources = pd.factorize(pts["source"], sort=True)
+    return PlantIndex(pts["lat"], pts["lon"], pts["capacity"], codes, pts["country"], sources.tolist(),
+                      countries, fingerprint(jobs))
+
+
+def load_index(path=SPATIAL_INDEX, workers=1, use_cache=True, log=print):
+    """The saved index if it matches the current plant files; otherwise build and save it."""
+    idx = PlantIndex.load(path)
+    if idx is not None and idx.fingerprint == fingerprint(country_jobs()):
+        return idx
+    log("🗺️  Plant files changed or no index yet — building the spatial index ...")
+    idx = build_index(workers, use_cache=use_cache, log=log)
+    idx.save(path)
+    return idx
+
+
+def raster_json(index, resolutions=RASTER_DEG):
+    """Sparse gridded capacity per source at each resolution, for the dashboard."""
+    out = {"sources": index.sources, "rasters": []}
+    for deg in resolutions:
+        cells = index.cell_capacity(deg)
+        out["rasters"].append({
+            "deg": deg,
+            "cells": len(cells),
+            "row": cells["row"].tolist(),
+            "col": cells["col"].tolist(),
+            "lat": cells["lat"].tolist(),
+            "lon": cells["lon"].tolist(),
+            "plants": cells["plants"].tolist(),
+            "capacity_MW": cells["capacity_MW"].round(3).tolist(),
+            "by_source": {s: cells[s].round(3).tolist() for s in index.sources},
+        })
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMMANDS
+# ═══════════════════════════════════════════════════════════════
+def run_build(workers=1, chunksize=CHUNK_ROWS, use_cache=True, profile=False):
+    """The ``spatial build`` command: plant_index.npz + plant_rasters.json."""
+    from .metrics import RunMetrics
+    metrics = RunMetrics("spatial", profile)
+    print("🗺️  Building the spatial plant index ...")
+    with metrics.stage("load") as st:
+        index = build_index(workers, chunksize, use_cache, metrics=metrics)
+        st.rows_out = len(index)
+    with metrics.stage("index", rows_in=len(index)):
+        index.save(SPATIAL_INDEX)
+    mb = os.path.getsize(SPATIAL_INDEX) / 1e6
+    print(f"\n   {len(index):,} plants in {len(index.cells):,} cells of {CELL_DEG}° → {SPATIAL_INDEX} ({mb:.1f} MB)")
+    with metrics.stage("rasters", rows_in=len(index)):
+        rasters = raster_json(index)
+        with open(RASTERS, "w", encoding="utf-8") as f:
+            json.dump(rasters, f, separators=(",", ":"))
+    sizes = ", ".join(f"{r['deg']}° {r['cells']:,}" for r in rasters["rasters"])
+    print(f"   Rasters ({sizes} cells) → {RASTERS}")
+    metrics.save()
+    print("\n✅ All done!")
+    return index
+
+
+def print_near(result):
+    print(f"📍 Within {result['radius_km']:g} km of ({result['lat']:.4f}, {result['lon']:.4f}): "
+          f"{result['plants']:,} plants, {result['capacity_MW']:,.2f} MW")
+    if result["nearest_km"] is not None:
+        print(f"   Nearest plant: {result['nearest_km']:.3f} km")
+    width = max(map(len, result["by_source"]), default=0)
+    for src, s in result["by_source"].items():
+        print(f"   {src:<{width}} {s['capacity_MW']:>12,.2f} MW  ({s['plants']:,} plants)")
+
+
+def print_cells(cells, deg, top):
+    print(f"🔲 {len(cells):,} occupied {deg}° cells — top {min(top, len(cells))} by capacity:")
+    for _, c in cells.head(top).iterrows():
+        print(f"   ({c['lat']:8.3f}, {c['lon']:8.3f})  {c['capacity_MW']:>12,.2f} MW  ({int(c['plants']):,} plants)")
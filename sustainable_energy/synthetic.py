@@ -0,0 +1,292 @@
+"""
+Synthetic OPSD Inputs
+=====================
+OPSD-compatible load-test data at any scale: one
+renewable_power_plants_XX.csv per country of load.COUNTRY_FILES (the same
+columns as the OPSD release) and a renewable_capacity_timeseries.csv of
+cumulative capacity per ``<country>_<technology>_capacity`` column.
+
+  • NumPy-vectorised — a chunk of rows is a handful of array operations;
+    dates are looked up in a precomputed (format × day) string table
+  • streamed to disk ``chunk_rows`` at a time, so memory is bounded by the
+    chunk, not the plant count
+  • optionally sharded across processes: a country's chunks are split into
+    shards written to part files and concatenated in order
+  • deterministic by seed — every chunk has its own generator seeded by
+    (seed, country, chunk), so the output is identical for any number of
+    workers or shard size
+  • written with pyarrow's CSV writer when it is installed (pandas
+    ``to_csv`` otherwise — same values, but whole floats print as ``1``
+    rather than ``1.0``)
+
+The deliberate dirt of generate_dataset.py is kept: ``mixed_dates`` of the
+commissioning dates use a non-ISO format and ~``blank_rate`` of the plant
+cells (and timeseries points) are blank.  The timeseries ``day`` column
+stays ISO, like the OPSD release.
+"""
+
+import os, time, shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from .csv_cache import enabled as arrow_available
+from .load import COUNTRY_FILES
+
+CHUNK_ROWS = 500_000
+SHARD_ROWS = 4_000_000      # rows per process job; rounded to whole chunks
+
+# Share of the plant rows per country — roughly the OPSD proportions
+COUNTRY_SHARE = {
+    "Germany": 0.55, "France": 0.12, "UK": 0.10, "Czechia": 0.06,
+    "Switzerland": 0.06, "Denmark": 0.05, "Sweden": 0.03, "Poland": 0.03,
+}
+# (lat, lon) bounding box per country
+COUNTRY_BOX = {
+    "Germany": (47.3, 55.0, 5.9, 15.0), "France": (42.3, 51.1, -4.8, 8.2),
+    "UK": (49.9, 58.7, -6.4, 1.8), "Czechia": (48.6, 51.1, 12.1, 18.9),
+    "Switzerland": (45.8, 47.8, 6.0, 10.5), "Denmark": (54.6, 57.7, 8.1, 12.7),
+    "Sweden": (55.3, 69.1, 11.1, 24.2), "Poland": (49.0, 54.8, 14.1, 24.1),
+}
+
+# energy_source_level_2 → (share, median MW, lognormal sigma, [(level_3, technology, weight)])
+SOURCES = {
+    "Solar": (0.70, 0.012, 1.2, [("Solar", "Photovoltaics", 0.9), ("Solar", "Photovoltaics ground", 0.1)]),
+    "Wind": (0.12, 1.5, 0.8, [("Onshore", "Onshore", 0.93), ("Offshore", "Offshore", 0.07)]),
+    "Bioenergy": (0.10, 0.5, 1.0, [("Biomass and biogas", "Steam turbine", 0.4),
+                                   ("Biomass and biogas", "Combustion engine", 0.5),
+                                   ("Sewage and landfill gas", "Combustion engine", 0.1)]),
+    "Hydro": (0.08, 0.3, 1.3, [("Run-of-river", "Run-of-river", 0.8), ("Reservoir", "Reservoir", 0.2)]),
+}
+
+PLANT_COLS = ["electrical_capacity", "energy_source_level_1", "energy_source_level_2",
+              "energy_source_level_3", "technology", "commissioning_date", "lat", "lon"]
+
+# Date format pool (intentional inconsistency) — the formats of generate_dataset.py
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%m-%d-%Y", "%d-%b-%Y", "%Y/%m/%d"]
+FIRST_DAY, LAST_DAY = "1990-01-01", "2020-08-25"
+YEAR_GROWTH = 0.08          # commissioning grows ~8 %/year
+
+# Timeseries: the columns of the real file first, then further country × technology pairs
+TS_COLUMNS = [
+    "DE_solar", "DE_wind_onshore", "DE_wind_offshore", "DE_bioenergy", "DK_solar",
+    "DK_wind_onshore", "GB-UKM_solar", "GB-UKM_wind_onshore", "GB-UKM_wind_offshore",
+    "CH_solar", "SE_wind_onshore", "FR_wind_onshore", "FR_solar", "DK_wind_offshore", "DE_hydro",
+]
+TS_COUNTRIES = ["DE", "DK", "GB-UKM", "CH", "SE", "FR", "CZ", "PL", "AT", "BE", "ES", "IT", "NL",
+                "PT", "IE", "NO", "FI", "HU", "SK", "SI", "HR", "RO", "BG", "GR", "LT", "LV", "EE", "LU"]
+TS_TECHS = ["solar", "wind_onshore", "wind_offshore", "bioenergy", "hydro"]
+TS_FIRST, TS_LAST = "1995-01-01", "2020-06-30"
+TS_CHUNK_DAYS = 1000
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOOKUP TABLES
+# ═══════════════════════════════════════════════════════════════
+_COMBOS = [(l2, l3, tech, share * w / sum(x[2] for x in sub), median, sigma)
+           for l2, (share, median, sigma, sub) in SOURCES.items() for l3, tech, w in sub]
+COMBO_L2 = np.array([c[0] for c in _COMBOS], dtype=object)
+COMBO_L3 = np.array([c[1] for c in _COMBOS], dtype=object)
+COMBO_TECH = np.array([c[2] for c in _COMBOS], dtype=object)
+COMBO_P = np.array([c[3] for c in _COMBOS]) / sum(c[3] for c in _COMBOS)
+COMBO_MEDIAN = np.array([c[4] for c in _COMBOS])
+COMBO_SIGMA = np.array([c[5] for c in _COMBOS])
+
+_table = None
+
+
+def date_table():
+    """``(formats × days)`` array of every commissioning date string, plus per-day year weights."""
+    global _table
+    if _table is None:
+        days = pd.date_range(FIRST_DAY, LAST_DAY, freq="D")
+        strings = np.array([days.strftime(fmt).to_numpy(dtype=object) for fmt in DATE_FORMATS])
+        weights = np.exp(YEAR_GROWTH * (days.year.values - days.year.values[0]))
+        _table = strings, weights / weights.sum()
+    return _table
+
+
+def country_rows(n_plants):
+    """Plant rows per country: ``n_plants`` split by :data:`COUNTRY_SHARE`."""
+    shares = np.array([COUNTRY_SHARE[c] for c in COUNTRY_FILES])
+    rows = np.floor(n_plants * shares / shares.sum()).astype(int)
+    rows[np.argmax(shares)] += n_plants - rows.sum()
+    return dict(zip(COUNTRY_FILES, rows.tolist()))
+
+
+# ═══════════════════════════════════════════════════════════════
+# PLANTS
+# ═══════════════════════════════════════════════════════════════
+def plant_chunk(seed, country, chunk, n, mixed_dates=0.2, blank_rate=0.05):
+    """``n`` plant rows — chunk number ``chunk`` of ``country`` — as an OPSD-style frame."""
+    rng = np.random.default_rng([seed, list(COUNTRY_FILES).index(country), chunk])
+    strings, day_p = date_table()
+
+    combo = rng.choice(len(COMBO_P), size=n, p=COMBO_P)
+    capacity = np.round(COMBO_MEDIAN[combo] * np.exp(COMBO_SIGMA[combo] * rng.standard_normal(n)), 4)
+    day = rng.choice(len(day_p), size=n, p=day_p)
+    fmt = np.where(rng.random(n) < mixed_dates, rng.integers(1, len(DATE_FORMATS), size=n), 0)
+    lat0, lat1, lon0, lon1 = COUNTRY_BOX[country]
+
+    cols = {
+        "electrical_capacity": capacity,
+        "energy_source_level_1": np.full(n, "Renewable energy", dtype=object),
+        "energy_source_level_2": COMBO_L2[combo],
+        "energy_source_level_3": COMBO_L3[combo],
+        "technology": COMBO_TECH[combo],
+        "commissioning_date": strings[fmt, day],
+        "lat": np.round(rng.uniform(lat0, lat1, n), 6),
+        "lon": np.round(rng.uniform(lon0, lon1, n), 6),
+    }
+    # ~blank_rate of every column left empty
+    blank = rng.random((len(cols), n)) < blank_rate
+    for mask, (name, values) in zip(blank, cols.items()):
+        values[mask] = np.nan if values.dtype.kind == "f" else None
+    return pd.DataFrame(cols, columns=PLANT_COLS)
+
+
+def write_csv(df, f, header=False):
+    """Append ``df`` to the binary file ``f`` — pyarrow's writer is ~7× faster than ``to_csv``."""
+    if arrow_available():
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        # Generated labels never contain separators or quotes
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f,
+                        pacsv.WriteOptions(include_header=header, quoting_style="none"))
+    else:
+        df.to_csv(f, header=header, index=False, encoding="utf-8")
+
+
+def write_shard(path, seed, country, chunks, rows, mixed_dates, blank_rate):
+    """Write chunks ``chunks`` (of ``rows`` rows each, in order) of one country to ``path``, headerless."""
+    with open(path, "wb") as f:
+        for chunk, n in zip(chunks, rows):
+            write_csv(plant_chunk(seed, country, chunk, n, mixed_dates, blank_rate), f)
+    return sum(rows)
+
+
+def plant_jobs(out_dir, n_plants, chunk_rows=CHUNK_ROWS, shard_rows=SHARD_ROWS):
+    """``(country, csv path, [(part path, chunk numbers, chunk rows)])`` for every country file."""
+    per_shard = max(shard_rows // chunk_rows, 1)
+    jobs = []
+    for country, n in country_rows(n_plants).items():
+        path = os.path.join(out_dir, COUNTRY_FILES[country])
+        sizes = [chunk_rows] * (n // chunk_rows) + ([n % chunk_rows] if n % chunk_rows else [])
+        shards = []
+        for s in range(0, len(sizes), per_shard):
+            chunks = list(range(s, min(s + per_shard, len(sizes))))
+            shards.append((f"{path}.part{s:06d}.tmp", chunks, sizes[s:s + per_shard]))
+        jobs.append((country, path, shards))
+    return jobs
+
+
+def write_plants(out_dir, n_plants, seed=42, chunk_rows=CHUNK_ROWS, shard_rows=SHARD_ROWS, workers=1,
+                 mixed_dates=0.2, blank_rate=0.05, log=print, metrics=None):
+    """Write every country's plant CSV; returns the rows written per country."""
+    jobs = plant_jobs(out_dir, n_plants, chunk_rows, shard_rows)
+    tasks = [(part, seed, country, chunks, rows, mixed_dates, blank_rate)
+             for country, _, shards in jobs for part, chunks, rows in shards]
+    t0 = time.perf_counter()
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_shard, *zip(*tasks)))
+    else:
+        for task in tasks:
+            write_shard(*task)
+
+    written = {}
+    for country, path, shards in jobs:
+        # Header, then the shards in chunk order
+        with open(path, "wb") as f:
+            f.write((",".join(PLANT_COLS) + "\n").encode())
+            for part, _, _ in shards:
+                with open(part, "rb") as src:
+                    shutil.copyfileobj(src, f, 1 << 20)
+                os.remove(part)
+        written[country] = sum(sum(rows) for _, _, rows in shards)
+        log(f"   ✅ {country}: {written[country]:,} plants → {os.path.basename(path)} "
+            f"({os.path.getsize(path) / 1e6:,.1f} MB)")
+        if metrics is not None:
+            metrics.item("plants", country, rows_out=written[country], bytes=os.path.getsize(path))
+    log(f"   {sum(written.values()):,} plants in {time.perf_counter() - t0:.1f}s")
+    return written
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIMESERIES
+# ═══════════════════════════════════════════════════════════════
+def ts_columns(n_series):
+    """The first ``n_series`` capacity column names (real OPSD columns first)."""
+    names = list(TS_COLUMNS)
+    extra = (f"{cc}_{tech}" for cc in TS_COUNTRIES for tech in TS_TECHS)
+    names += [c for c in extra if c not in set(TS_COLUMNS)]
+    region = 0
+    while len(names) < n_series:
+        # Beyond every country × technology: numbered regions, like GB-UKM
+        region += 1
+        names += [f"{cc}-{region:02d}_{tech}" for cc in TS_COUNTRIES for tech in TS_TECHS]
+    return [f"{c}_capacity" for c in names[:n_series]]
+
+
+def write_timeseries(path, n_series=len(TS_COLUMNS), seed=42, blank_rate=0.05, log=print):
+    """Write the daily cumulative-capacity timeseries, ``TS_CHUNK_DAYS`` rows at a time.
+
+    Every series is a noisy logistic ramp — zero before a random start,
+    then only ever growing (daily additions are non-negative).
+    """
+    cols = ts_columns(n_series)
+    days = pd.date_range(TS_FIRST, TS_LAST, freq="D")
+    rng = np.random.default_rng([seed, len(COUNTRY_FILES)])
+    final = np.exp(rng.normal(np.log(5000), 1.2, n_series))
+    start = rng.integers(0, len(days) * 2 // 3, n_series)
+    mid = start + rng.integers(len(days) // 6, len(days) // 2, n_series)
+    width = rng.uniform(300, 1500, n_series)
+
+    def ramp(t):
+        return final / (1 + np.exp(-(t[:, None] - mid) / width))
+
+    t0 = time.perf_counter()
+    level = ramp(np.array([-1.0]))[0]
+    with open(path, "wb") as f:
+        for c, lo in enumerate(range(0, len(days), TS_CHUNK_DAYS)):
+            crng = np.random.default_rng([seed, len(COUNTRY_FILES), c + 1])
+            t = np.arange(lo, min(lo + TS_CHUNK_DAYS, len(days)), dtype="float64")
+            added = np.diff(ramp(np.concatenate([[t[0] - 1], t])), axis=0)
+            # Additions arrive in lumps: most days nothing, some days several days' worth
+            lumps = crng.exponential(1.0, added.shape) * (crng.random(added.shape) < 0.3) / 0.3
+            values = level + np.cumsum(added * lumps, axis=0)
+            level = values[-1]
+            values = np.round(values, 2)
+            values[t[:, None] < start] = np.nan
+            values[crng.random(values.shape) < blank_rate] = np.nan
+            frame = pd.DataFrame(values, columns=cols)
+            frame.insert(0, "day", days[lo:lo + len(t)].strftime("%Y-%m-%d"))
+            if lo == 0:
+                f.write((",".join(frame.columns) + "\n").encode())
+            write_csv(frame, f)
+    log(f"   ✅ {n_series} series × {len(days):,} days → {os.path.basename(path)} "
+        f"({os.path.getsize(path) / 1e6:,.1f} MB, {time.perf_counter() - t0:.1f}s)")
+    return len(days)
+
+
+def run(out_dir, n_plants=1_000_000, n_series=len(TS_COLUMNS), seed=42, chunk_rows=CHUNK_ROWS,
+        shard_rows=SHARD_ROWS, workers=1, mixed_dates=0.2, blank_rate=0.05):
+    """The ``generate`` command: plant CSVs and the capacity timeseries into ``out_dir``."""
+    from .metrics import RunMetrics
+    metrics = RunMetrics("generate")
+    metrics.info["options"] = {"plants": n_plants, "series": n_series, "seed": seed, "chunk_rows": chunk_rows,
+                               "shard_rows": shard_rows, "workers": workers}
+    os.makedirs(out_dir, exist_ok=True)
+
+    print(f"🏭 Generating {n_plants:,} OPSD-schema plants (seed {seed}, {chunk_rows:,} rows/chunk"
+          f"{f', {workers} workers' if workers > 1 else ''}) → {out_dir}")
+    with metrics.stage("plants") as st:
+        st.rows_out = sum(write_plants(out_dir, n_plants, seed, chunk_rows, shard_rows, workers,
+                                       mixed_dates, blank_rate, metrics=metrics).values())
+
+    print("\n📈 Generating capacity timeseries ...")
+    with metrics.stage("timeseries") as st:
+        st.rows_out = write_timeseries(os.path.join(out_dir, "renewable_capacity_timeseries.csv"),
+                                       n_series, seed, blank_rate)
+    metrics.save()
+    print(f"\n✅ Synthetic OPSD data ready — run the pipeline on it with OPSD_DATA_DIR={out_dir}")